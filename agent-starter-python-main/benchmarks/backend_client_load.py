@@ -0,0 +1,115 @@
+"""
+Test de charge : une ClientSession par requête (avant) vs BackendClient poolé.
+
+Le stub aiohttp tourne dans un thread séparé et imite `/getProfile` et
+`/api/reports`. Affiche req/s et p50/p99 pour chaque mode.
+
+    uv run python benchmarks/backend_client_load.py --requests 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+import aiohttp
+from aiohttp import web
+
+from http_client import BackendClient
+
+
+def _start_stub():
+    async def get_profile(request):
+        return web.json_response(
+            {"profile": {"user_id": {"id": request.query["room"]}}}
+        )
+
+    async def post_report(request):
+        await request.read()
+        return web.json_response({"status": "ok"}, status=201)
+
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    holder = {}
+
+    async def _serve():
+        app = web.Application()
+        app.router.add_get("/getProfile", get_profile)
+        app.router.add_post("/api/reports", post_report)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        holder["port"] = site._server.sockets[0].getsockname()[1]
+
+    def _run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(_serve())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=_run, daemon=True).start()
+    ready.wait()
+    return f"http://127.0.0.1:{holder['port']}"
+
+
+async def _drive(label, n, concurrency, call):
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with sem:
+            start = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{label:<28} {n / elapsed:8.0f} req/s  "
+        f"p50={p50 * 1000:6.2f}ms  p99={p99 * 1000:6.2f}ms"
+    )
+
+
+async def main(args):
+    base = _start_stub()
+    report = {"session_id": "s", "overview": {"name": "x"}}
+
+    async def per_request(i):
+        # Comportement historique : nouvelle session à chaque appel
+        async with aiohttp.ClientSession() as session:
+            if i % 2:
+                async with session.post(f"{base}/api/reports", json=report) as resp:
+                    await resp.text()
+            else:
+                async with session.get(
+                    f"{base}/getProfile", params={"room": str(i)}
+                ) as resp:
+                    await resp.json()
+
+    client = BackendClient()
+
+    async def pooled(i):
+        if i % 2:
+            await client.post_json(f"{base}/api/reports", report)
+        else:
+            (await client.get(f"{base}/getProfile", params={"room": str(i)})).json()
+
+    await _drive(
+        "session per request (before)", args.requests, args.concurrency, per_request
+    )
+    await _drive(
+        "pooled BackendClient (after)", args.requests, args.concurrency, pooled
+    )
+    await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,84 @@
+"""
+Benchmark : débit de la génération en lot contre le faux serveur Gemini.
+
+Génère `--sessions` rapports via report_batch.run_batch (ReportEngine,
+prompt compact, ReportParser), pour plusieurs niveaux de concurrence, et
+affiche rapports/s. Le checkpoint et la sortie vont dans un dossier
+temporaire.
+
+    uv run python benchmarks/batch_reports.py --sessions 200 --delay 0.2
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+
+from fake_gemini import FakeGemini, make_client
+
+from prompts import build_report_prompt
+from report_batch import JsonlSink, run_batch
+from report_engine import ReportEngine
+from report_schema import ReportParser
+
+
+def _records(n):
+    return [
+        {
+            "session_id": f"bench-{i}",
+            "profile": {"id": f"patient-{i}", "name": "Jane Doe", "age": 34},
+            "dialogue": [
+                {"speaker": "AI", "text": "How have you been sleeping?"},
+                {"speaker": "Patient", "text": "Badly, I wake up at night worrying."},
+            ],
+        }
+        for i in range(n)
+    ]
+
+
+async def main(args):
+    logging.disable(logging.WARNING)
+    server = FakeGemini(delay=args.delay)
+    await server.start()
+    client = make_client(server.base_url)
+    parser = ReportParser()
+    workdir = tempfile.mkdtemp()
+
+    print(
+        f"{args.sessions} sessions, fake model latency {args.delay}s, rate {args.rate or 'unlimited'}/s"
+    )
+    for concurrency in args.concurrency:
+        engine = ReportEngine(client, max_concurrency=concurrency)
+
+        async def generate(profile, dialogue, session_id, engine=engine):
+            return parser.parse(
+                await engine.generate(
+                    build_report_prompt(profile, dialogue, session_id)
+                )
+            )
+
+        out = os.path.join(workdir, f"out-{concurrency}.jsonl")
+        stats = await run_batch(
+            _records(args.sessions),
+            generate,
+            JsonlSink(out),
+            checkpoint=out + ".done",
+            concurrency=concurrency,
+            rate=args.rate,
+        )
+        print(
+            f"concurrency {concurrency:>3}: {stats['reports_per_s']:8.1f} reports/s "
+            f"({stats['generated']} in {stats['elapsed_s']:.2f}s, failed={stats['failed']})"
+        )
+
+    await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.2)
+    parser.add_argument("--rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,68 @@
+"""
+Benchmark : taille du prompt de rapport et coût de la compaction du dialogue.
+
+Pour des sessions synthétiques de longueur croissante, compare le prompt
+construit avec le dialogue complet et avec la fenêtre (résumé + derniers
+tours), et mesure le coût d'ajout d'un tour dans la fenêtre.
+
+    uv run python benchmarks/dialogue_compaction.py --keep-last 40
+"""
+
+import argparse
+import time
+
+from dialogue_window import DialogueWindow
+from prompts import build_report_prompt, estimate_tokens
+
+
+def _dialogue(turns):
+    dialogue = []
+    for i in range(turns // 2):
+        dialogue.append(
+            {
+                "speaker": "AI",
+                "text": f"Question {i} : comment s'est passée votre semaine ?",
+            }
+        )
+        text = f"Semaine {i} : je dors mal, je me réveille vers 3h et je rumine le travail."
+        if i % 50 == 7:
+            text += " J'ai parfois bu de l'alcool pour m'endormir."
+        dialogue.append({"speaker": "Patient", "text": text})
+    return dialogue
+
+
+def main(args):
+    print(
+        f"{'turns':>6} {'full ~tok':>10} {'window ~tok':>12} "
+        f"{'add/turn':>10} {'build full':>11} {'build window':>13}"
+    )
+    for turns in (10, 100, 1000, 10000):
+        dialogue = _dialogue(turns)
+
+        start = time.perf_counter()
+        window = DialogueWindow(
+            keep_last=args.keep_last, summary_chars=args.summary_chars
+        )
+        for turn in dialogue:
+            window.add(turn["speaker"], turn["text"])
+        add_us = (time.perf_counter() - start) / len(dialogue) * 1e6
+
+        start = time.perf_counter()
+        full = build_report_prompt({}, dialogue, "bench")
+        build_full = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compact = build_report_prompt({}, window.recent, "bench", window.summary)
+        build_window = time.perf_counter() - start
+
+        print(
+            f"{turns:>6} {estimate_tokens(full):>10} {estimate_tokens(compact):>12} "
+            f"{add_us:>8.2f}us {build_full * 1000:>9.2f}ms {build_window * 1000:>11.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keep-last", type=int, default=40)
+    parser.add_argument("--summary-chars", type=int, default=4000)
+    main(parser.parse_args())
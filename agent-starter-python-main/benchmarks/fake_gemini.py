@@ -0,0 +1,153 @@
+"""
+Faux serveur Gemini local pour les benchmarks.
+
+Répond aux routes `:generateContent` et `:streamGenerateContent` de l'API
+REST avec un rapport JSON factice, après une latence configurable.
+Utilisable avec `genai.Client(http_options=HttpOptions(base_url=...))`.
+"""
+
+import asyncio
+import json
+import threading
+
+from aiohttp import web
+
+CANNED_REPORT = {
+    "session_id": "bench-session",
+    "patient_id": "bench-patient",
+    "overview": {
+        "name": "Jane Doe",
+        "age": 34,
+        "gender": "female",
+        "occupation": "teacher",
+        "education_level": "master",
+        "marital_status": "single",
+        "session_info": "Session bench-session - Consultation",
+        "initial_diagnosis": "Generalized anxiety",
+        "scores": [{"tool": "GAD-7", "intake": 14, "current": 12}],
+    },
+    "narrative": {
+        "description": "Patient reports persistent worry and poor sleep.",
+        "symptoms_observed": ["worry", "insomnia"],
+        "physical_markers": ["fatigue"],
+        "behavioral_markers": ["avoidance"],
+    },
+    "risk_indicators": {
+        "suicidal_ideation": "none reported",
+        "substance_use": "none",
+        "pregnancy": "no",
+        "family_history": "mother with anxiety",
+        "other_risks": [],
+    },
+    "clinical_inference": {
+        "primary_diagnosis": "Generalized anxiety disorder",
+        "differential_diagnoses": ["Panic disorder"],
+        "recommendations": ["CBT", "sleep hygiene"],
+    },
+    "dialogue": [
+        {"speaker": "AI", "text": "How have you been sleeping?"},
+        {"speaker": "Patient", "text": "Badly, I wake up at night worrying."},
+    ],
+    "doctor_notes": "",
+    "notified_to_doctor": True,
+}
+
+
+def canned_text():
+    return "```json\n" + json.dumps(CANNED_REPORT, indent=2) + "\n```"
+
+
+def _payload(text):
+    return {
+        "candidates": [
+            {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+        ]
+    }
+
+
+class FakeGemini:
+    """
+    Serveur aiohttp local ; `delay` avant la réponse, `chunks` pour le streaming.
+    Avec `paced`, la réponse non streamée attend aussi le temps de génération
+    de tous les morceaux, comme un vrai modèle.
+    """
+
+    def __init__(
+        self, *, delay=0.5, text=None, chunks=20, chunk_delay=0.02, paced=False
+    ):
+        self.delay = delay
+        self.paced = paced
+        self.text = text or canned_text()
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+        self.requests = 0
+        self._runner = None
+        self._thread_loop = None
+        self.base_url = None
+
+    async def _handle(self, request):
+        self.requests += 1
+        await request.read()
+        if request.path.endswith(":streamGenerateContent"):
+            return await self._stream(request)
+        await asyncio.sleep(
+            self.delay + (self.chunks * self.chunk_delay if self.paced else 0)
+        )
+        return web.json_response(_payload(self.text))
+
+    async def _stream(self, request):
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        await asyncio.sleep(self.delay)
+        size = max(1, len(self.text) // self.chunks)
+        for i in range(0, len(self.text), size):
+            piece = self.text[i : i + size]
+            await resp.write(f"data: {json.dumps(_payload(piece))}\n\n".encode())
+            await asyncio.sleep(self.chunk_delay)
+        await resp.write_eof()
+        return resp
+
+    async def start(self, host="127.0.0.1", port=0):
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def start_in_thread(self):
+        """Démarre le serveur dans sa propre boucle, pour mesurer un client bloquant."""
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def _run():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=_run, daemon=True, name="fake-gemini").start()
+        ready.wait()
+        self._thread_loop = loop
+        return self.base_url
+
+    def stop_thread(self):
+        loop = self._thread_loop
+        asyncio.run_coroutine_threadsafe(self.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+
+def make_client(base_url):
+    from google import genai
+    from google.genai import types
+
+    return genai.Client(
+        api_key="fake-key", http_options=types.HttpOptions(base_url=base_url)
+    )
@@ -0,0 +1,221 @@
+"""
+Faux LiveKit pour exécuter `agent.entrypoint` hors ligne.
+
+`install(agent)` remplace AgentSession, Agent et les plugins STT/LLM/TTS du
+module agent par des doublures : pas de réseau, pas d'audio, des latences
+configurables. Une FakeRoom reçoit les text streams (`report-request`) ; un
+FakeJobContext joue les callbacks de fermeture comme le worker LiveKit.
+La FakeAgentSession rejoue un tour de parole (fin d'énoncé -> transcription
+-> premier token LLM -> premier octet TTS) en émettant les mêmes évènements
+que la vraie session (`conversation_item_added`, `metrics_collected`).
+Le FakeTTS produit des trames (`synthesize`) après son délai de premier
+octet ; `say(text, audio=...)` les rejoue sans repasser par lui.
+"""
+
+import asyncio
+import itertools
+import time
+from types import SimpleNamespace
+
+
+class FakePlugin:
+    """Remplace deepgram.STT, google.LLM, speechify.TTS : seule la latence compte."""
+
+    def __init__(self, delay=0.0, **kwargs):
+        self.delay = delay
+        self.options = kwargs
+
+
+class FakeTTS(FakePlugin):
+    """speechify.TTS : `synthesize` rend `frames` trames après `delay` (premier octet)."""
+
+    def __init__(self, delay=0.0, frames=10, **kwargs):
+        super().__init__(delay, **kwargs)
+        self.frames = frames
+        self.requests = 0
+
+    def synthesize(self, text):
+        self.requests += 1
+        return _SynthesizeStream(self, text)
+
+    async def aclose(self):
+        return None
+
+
+class _SynthesizeStream:
+    def __init__(self, tts, text):
+        self._tts = tts
+        self._text = text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        await asyncio.sleep(self._tts.delay)
+        for i in range(self._tts.frames):
+            yield SimpleNamespace(frame=(self._text, i))
+
+
+class FakeChatContext:
+    def __init__(self, items=()):
+        self.items = list(items)
+
+    def copy(self):
+        return FakeChatContext(self.items)
+
+    def truncate(self, *, max_items):
+        del self.items[:-max_items]
+
+
+class FakeAgent:
+    def __init__(self, *, instructions=""):
+        self.instructions = instructions
+        self.chat_ctx = FakeChatContext()
+
+    async def update_chat_ctx(self, chat_ctx):
+        self.chat_ctx = chat_ctx
+
+    async def update_instructions(self, instructions):
+        self.instructions = instructions
+
+
+class FakeAgentSession:
+    _speech_ids = itertools.count()
+
+    def __init__(self, *, stt, llm, tts, vad=None, turn_cpu_ms=0.0, **kwargs):
+        self.stt = stt
+        self.llm = llm
+        self.tts = tts
+        self.turn_cpu_ms = turn_cpu_ms
+        self._handlers = {}
+        self.agent = None
+
+    def on(self, event):
+        def register(fn):
+            self._handlers.setdefault(event, []).append(fn)
+            return fn
+
+        return register
+
+    def _emit(self, event, **fields):
+        payload = SimpleNamespace(**fields)
+        for fn in self._handlers.get(event, ()):
+            fn(payload)
+
+    def _add_item(self, role, text):
+        item = SimpleNamespace(role=role, text_content=text)
+        self.agent.chat_ctx.items.append(item)
+        self._emit("conversation_item_added", item=item)
+
+    def _metrics(self, **fields):
+        self._emit("metrics_collected", metrics=SimpleNamespace(**fields))
+
+    async def start(self, *, agent, room):
+        self.agent = agent
+        room.session = self
+
+    async def say(self, text, *, audio=None, **kwargs):
+        """Retourne le délai avant la première trame audio (s)."""
+        start = time.perf_counter()
+        if audio is None:
+            async for _ in self.tts.synthesize(text):
+                break
+        else:
+            async for _ in audio:
+                break
+        first_audio = time.perf_counter() - start
+        self._add_item("assistant", text)
+        return first_audio
+
+    async def user_turn(self, text, reply):
+        """Rejoue un tour complet ; retourne la latence fin d'énoncé -> premier octet TTS (s)."""
+        speech_id = f"speech-{next(self._speech_ids)}"
+        start = time.perf_counter()
+        await asyncio.sleep(self.stt.delay)
+        if self.turn_cpu_ms:
+            # Travail synchrone (VAD, audio) qui occupe la boucle
+            busy_until = time.perf_counter() + self.turn_cpu_ms / 1000
+            while time.perf_counter() < busy_until:
+                pass
+        eou = time.perf_counter() - start
+        self._add_item("user", text)
+        self._metrics(
+            type="eou_metrics",
+            speech_id=speech_id,
+            end_of_utterance_delay=eou,
+            transcription_delay=eou,
+        )
+        mark = time.perf_counter()
+        await asyncio.sleep(self.llm.delay)
+        self._metrics(
+            type="llm_metrics", speech_id=speech_id, ttft=time.perf_counter() - mark
+        )
+        mark = time.perf_counter()
+        await asyncio.sleep(self.tts.delay)
+        self._metrics(
+            type="tts_metrics", speech_id=speech_id, ttfb=time.perf_counter() - mark
+        )
+        latency = time.perf_counter() - start
+        self._add_item("assistant", reply)
+        return latency
+
+
+class _TextReader:
+    def __init__(self, text):
+        self._chunks = [text.encode("utf-8")]
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for chunk in self._chunks:
+            yield chunk
+
+
+class FakeRoom:
+    def __init__(self, name):
+        self.name = name
+        self.session = None
+        self._text_handlers = {}
+
+    def register_text_stream_handler(self, topic, handler):
+        self._text_handlers[topic] = handler
+
+    def send_text(self, topic, text, identity="patient"):
+        self._text_handlers[topic](_TextReader(text), identity)
+
+
+class FakeJobContext:
+    def __init__(self, room_name, proc_userdata):
+        self.room = FakeRoom(room_name)
+        self.proc = SimpleNamespace(userdata=proc_userdata)
+        self._shutdown_callbacks = []
+
+    def add_shutdown_callback(self, callback):
+        self._shutdown_callbacks.append(callback)
+
+    async def connect(self):
+        return None
+
+    async def shutdown(self):
+        for callback in self._shutdown_callbacks:
+            await callback()
+
+
+def install(agent_module, *, stt_delay, llm_delay, tts_delay, turn_cpu_ms=0.0):
+    """Branche les doublures dans le module agent (la session d'une room est `ctx.room.session`)."""
+    agent_module.AgentSession = lambda **kw: FakeAgentSession(
+        turn_cpu_ms=turn_cpu_ms, **kw
+    )
+    agent_module.Agent = FakeAgent
+    agent_module.deepgram = SimpleNamespace(
+        STT=lambda **kw: FakePlugin(stt_delay, **kw)
+    )
+    agent_module.google = SimpleNamespace(LLM=lambda **kw: FakePlugin(llm_delay, **kw))
+    agent_module.speechify = SimpleNamespace(TTS=lambda **kw: FakeTTS(tts_delay, **kw))
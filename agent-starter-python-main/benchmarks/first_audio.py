@@ -0,0 +1,125 @@
+"""
+Benchmark : délai avant le premier son (accueil et tours de parole).
+
+1. Accueil : `--rooms` rooms prononcent le message d'accueil via
+   UTTERANCES.say sur une FakeAgentSession, d'abord cache vide (chaque room
+   attend le premier octet du FakeTTS), puis cache rempli comme dans prewarm.
+2. Tours : pour chaque préréglage de PIPELINE_PRESETS, un tour est rejoué
+   avec des étapes factices (finalisation STT après `endpointing_ms`, délai
+   de fin de tour `min_endpointing_delay`, premier token LLM, premier octet
+   TTS). Avec `preemptive_generation`, le LLM démarre dès la transcription
+   finale, en parallèle du délai de fin de tour ; sans `thinking_budget: 0`,
+   `--thinking-ms` s'ajoute au premier token.
+
+    uv run python benchmarks/first_audio.py --rooms 20 --tts-ttfb 0.35
+"""
+
+import argparse
+import asyncio
+import contextlib
+import statistics
+import time
+
+import fake_livekit
+
+from pipeline_presets import PIPELINE_PRESETS, voice_key
+from utterance_cache import GREETING, UtteranceCache
+
+# Valeurs par défaut de la session LiveKit quand le préréglage ne les fixe pas
+DEFAULT_MIN_ENDPOINTING_DELAY = 0.5
+DEFAULT_ENDPOINTING_MS = 25
+
+
+def _ms(values):
+    values = sorted(values)
+    return {
+        "p50": round(statistics.median(values) * 1000, 1),
+        "max": round(values[-1] * 1000, 1),
+    }
+
+
+async def _greetings(cache, voice, rooms, tts_ttfb):
+    async def one():
+        session = fake_livekit.FakeAgentSession(
+            stt=None, llm=None, tts=fake_livekit.FakeTTS(tts_ttfb)
+        )
+        session.agent = fake_livekit.FakeAgent()
+        return await cache.say(session, voice, GREETING)
+
+    return await asyncio.gather(*(one() for _ in range(rooms)))
+
+
+async def _turn(preset, args):
+    stt = (
+        preset["stt"].get("endpointing_ms", DEFAULT_ENDPOINTING_MS) / 1000
+        + args.stt_finalize
+    )
+    endpoint = preset["session"].get(
+        "min_endpointing_delay", DEFAULT_MIN_ENDPOINTING_DELAY
+    )
+    llm = args.llm_ttft
+    if preset["llm"].get("thinking_budget") != 0:
+        llm += args.thinking_ms / 1000
+
+    start = time.perf_counter()
+    await asyncio.sleep(stt)
+    if preset["session"].get("preemptive_generation"):
+        await asyncio.gather(asyncio.sleep(endpoint), asyncio.sleep(llm))
+    else:
+        await asyncio.sleep(endpoint)
+        await asyncio.sleep(llm)
+    await asyncio.sleep(args.tts_ttfb)
+    return time.perf_counter() - start
+
+
+async def main(args):
+    preset = PIPELINE_PRESETS["balanced"]
+    voice = voice_key(preset)
+
+    cache = UtteranceCache()
+    live = await _greetings(cache, voice, args.rooms, args.tts_ttfb)
+    cache.fill_in_background(
+        lambda: contextlib.nullcontext(fake_livekit.FakeTTS(args.tts_ttfb)), voice
+    ).join()
+    cached = await _greetings(cache, voice, args.rooms, args.tts_ttfb)
+    print(f"Accueil, {args.rooms} rooms, TTFB TTS {args.tts_ttfb * 1000:.0f} ms")
+    print(f"  TTS en direct  : {_ms(live)} ms")
+    print(
+        f"  pré-synthétisé : {_ms(cached)} ms  (synthèse prewarm {cache.synth_ms[GREETING]} ms)"
+    )
+
+    print(f"Tours ({args.turns} par préréglage)")
+    for name, preset in PIPELINE_PRESETS.items():
+        latencies = await asyncio.gather(
+            *(_turn(preset, args) for _ in range(args.turns))
+        )
+        print(f"  {name:<12}: {_ms(latencies)} ms")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument(
+        "--tts-ttfb", type=float, default=0.35, help="premier octet TTS (s)"
+    )
+    parser.add_argument(
+        "--stt-finalize",
+        type=float,
+        default=0.1,
+        help="transcription finale après l'endpointing (s)",
+    )
+    parser.add_argument(
+        "--llm-ttft", type=float, default=0.4, help="premier token LLM (s)"
+    )
+    parser.add_argument(
+        "--thinking-ms",
+        type=float,
+        default=300,
+        help="surcoût de la réflexion Gemini (ms)",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
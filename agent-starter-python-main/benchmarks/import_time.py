@@ -0,0 +1,98 @@
+"""
+Benchmark : coût d'import des points d'entrée (python -X importtime).
+
+Chaque cible est importée `--repeat` fois dans un interpréteur neuf ; on
+garde la médiane du temps cumulé du module et les modules les plus lourds
+de la dernière exécution. Cibles :
+
+- `agent`        : import du module (job LiveKit, `agent.py batch`, tests)
+- `agent+plugins`: idem puis chargement des plugins STT/LLM/TTS/VAD (prewarm)
+- `server`       : serveur de tokens Flask
+- `server_async` : serveur de tokens aiohttp
+
+    uv run python benchmarks/import_time.py --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+TARGETS = {
+    "agent": "import agent",
+    "agent+plugins": "import agent; agent.load_plugins()",
+    "server": "import server",
+    "server_async": "import server_async",
+}
+
+
+def _importtime(code):
+    """{module: µs cumulés} ; le nom garde son indentation (profondeur d'import)."""
+    env = {
+        **os.environ,
+        "PYTHONPATH": SRC,
+        "GENAI_API_KEY": os.environ.get("GENAI_API_KEY", "offline"),
+    }
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        modules[name.rstrip()[1:]] = int(cumulative_us)
+    return modules
+
+
+def _total_ms(modules):
+    # Les imports de premier niveau (sans indentation) s'additionnent
+    return sum(us for name, us in modules.items() if not name.startswith(" ")) / 1000
+
+
+# Dépendances lourdes suivies : lesquelles chaque point d'entrée charge-t-il ?
+HEAVY = (
+    "agent",
+    "flask",
+    "google.genai",
+    "livekit.agents",
+    "livekit.api",
+    "livekit.plugins.deepgram",
+    "livekit.plugins.google",
+    "livekit.plugins.silero",
+    "livekit.plugins.speechify",
+)
+
+
+def main(args):
+    for target, code in TARGETS.items():
+        if args.only and target not in args.only:
+            continue
+        totals = []
+        for _ in range(args.repeat):
+            modules = _importtime(code)
+            totals.append(_total_ms(modules))
+        loaded = {name.strip() for name in modules}
+        print(
+            f"{target:<14} {statistics.median(totals):8.0f} ms  (min {min(totals):.0f})"
+        )
+        print(f"{'':<14} {', '.join(m for m in HEAVY if m in loaded) or '-'}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", choices=sorted(TARGETS))
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,388 @@
+"""
+Harnais de charge : combien de rooms un processus worker tient-il ?
+
+Exécute le vrai `agent.entrypoint` pour N rooms simultanées, par paliers,
+avec des doublures STT/LLM/TTS (fake_livekit), le serveur de profils async
+local, le faux Gemini et un faux backend /api/reports (ces serveurs tournent
+dans leur propre thread : la boucle mesurée est celle de l'agent). Chaque
+room fait `--turns` tours puis demande son rapport.
+
+Par palier : latence de la boucle, mémoire par room, latence des tours (fin
+d'énoncé -> premier octet TTS) et des rapports (demande -> réception par le
+backend). Le résultat est écrit en JSON pour suivre les régressions ;
+`--max-turn-p95-ms` fait échouer l'exécution au-delà du seuil.
+
+Avec `--admission`, les rooms arrivent toutes les `--arrival-interval`
+secondes et chacune passe d'abord par la LoadPolicy de l'agent (mêmes
+seuils WORKER_*, surchargeables ici) : les rooms refusées sont comptées par
+signal responsable au lieu d'être lancées.
+
+Avec `--speculative`, l'agent prépare le rapport pendant la session
+(REPORT_SPECULATIVE) ; comparer `report p95` avec et sans, pour un même
+`--report-delay` (latence fixe du faux Gemini) et `--report-after`.
+
+    uv run python benchmarks/load_rooms.py --ramp 1 10 25 50 --turns 6 --output load_report.json
+    uv run python benchmarks/load_rooms.py --ramp 60 --turn-cpu-ms 15 --admission --arrival-interval 0.05
+    uv run python benchmarks/load_rooms.py --ramp 1 10 --report-delay 2 --report-after 1 --speculative
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+# Supprimé à la sortie du processus (finaliseur de TemporaryDirectory)
+_TMP_DIR = tempfile.TemporaryDirectory(prefix="load-rooms-")
+_TMP = _TMP_DIR.name
+# Avant l'import de l'agent : fichiers dans un dossier temporaire, pas de vraie clé
+os.environ.setdefault("GENAI_API_KEY", "offline")
+os.environ.setdefault("TRANSCRIPT_DIR", os.path.join(_TMP, "transcripts"))
+os.environ.setdefault("REPORT_OUTBOX_PATH", os.path.join(_TMP, "outbox.sqlite3"))
+os.environ.setdefault(
+    "REPORT_PENDING_PATH", os.path.join(_TMP, "reports_pending.jsonl")
+)
+os.environ.setdefault(
+    "SESSION_DIRECTORY_PATH", os.path.join(_TMP, "session_directory.sqlite3")
+)
+
+import aiohttp  # noqa: E402
+import fake_livekit  # noqa: E402
+from aiohttp import web  # noqa: E402
+from fake_gemini import FakeGemini, make_client  # noqa: E402
+
+import agent  # noqa: E402
+import server_async  # noqa: E402
+from http_client import BackendClient  # noqa: E402
+from report_engine import ReportEngine  # noqa: E402
+from report_outbox import ReportOutbox  # noqa: E402
+from telemetry import TELEMETRY  # noqa: E402
+from worker_load import LoadPolicy, worker_signals  # noqa: E402
+
+PROFILE = {
+    "user_id": {"id": "bench-patient", "name": "Jane", "last_name": "Doe"},
+    "age": 34,
+    "gender": "female",
+    "occupation": "teacher",
+}
+
+
+class _ThreadServer:
+    """Application aiohttp servie dans sa propre boucle, hors de la boucle mesurée."""
+
+    def __init__(self, app):
+        self.app = app
+        self.base_url = None
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+
+    def start(self):
+        ready = threading.Event()
+
+        async def setup():
+            self._runner = web.AppRunner(self.app, access_log=None)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, "127.0.0.1", 0)
+            await site.start()
+            self.base_url = (
+                f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+            )
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(setup())
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait()
+        return self.base_url
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+def _backend_app(arrivals):
+    async def post_report(request):
+        payload = await request.json()
+        if payload.get("status") == "finalized":
+            arrivals[payload["session_id"]] = time.perf_counter()
+        return web.json_response({"success": True}, status=201)
+
+    app = web.Application()
+    app.router.add_post("/api/reports", post_report)
+    return app
+
+
+def _rss_kb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        # Pas de /proc : pic RSS (ko sous Linux, octets sous macOS)
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def _summary(values_ms):
+    values = sorted(values_ms)
+    if not values:
+        return {"count": 0}
+
+    def pct(q):
+        return round(values[min(len(values) - 1, int(q * len(values)))], 2)
+
+    return {
+        "count": len(values),
+        "p50": pct(0.5),
+        "p95": pct(0.95),
+        "p99": pct(0.99),
+        "max": round(values[-1], 2),
+    }
+
+
+async def _probe(stop, samples, interval=0.01):
+    """Retard de réveil de la boucle et pic de RSS pendant le palier."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples["lag_ms"].append((time.perf_counter() - start - interval) * 1000)
+        samples["rss_kb"] = max(samples["rss_kb"], _rss_kb())
+
+
+async def _run_room(name, args, userdata, profile_url, arrivals, http):
+    result = {"turns_ms": [], "report_ms": None, "error": None}
+    ctx = fake_livekit.FakeJobContext(name, userdata)
+    try:
+        await http.post(
+            f"{profile_url}/connectAgent", json={"room": name, "profile": PROFILE}
+        )
+        await agent.entrypoint(ctx)
+        session = ctx.room.session
+        # Le frontend transcrit tout ce que dit l'agent, accueil compris
+        dialogue = [{"speaker": "AI", "text": agent.GREETING}]
+        for turn in range(args.turns):
+            question = f"Question {turn}: how have you been sleeping lately?"
+            if turn == args.turns - 1:
+                question = "Thank you, take care. [SESSION_END]"
+            # Dialogue propre à la room : le cache des rapports ne doit pas servir les autres
+            answer = f"Answer {turn} ({name}): badly, I wake up at 3am and keep thinking about work."
+            latency = await session.user_turn(answer, question)
+            result["turns_ms"].append(latency * 1000)
+            dialogue += [
+                {"speaker": "Patient", "text": answer},
+                {"speaker": "AI", "text": question},
+            ]
+            await asyncio.sleep(args.think_time)
+
+        # Le patient raccroche, puis le frontend demande le rapport
+        await asyncio.sleep(args.report_after)
+        session_id = f"{name}-session"
+        sent = time.perf_counter()
+        ctx.room.send_text(
+            "report-request",
+            json.dumps(
+                {
+                    "type": "GENERATE_REPORT",
+                    "data": {"dialogue": dialogue, "meta": {"sessionId": session_id}},
+                }
+            ),
+        )
+        deadline = sent + args.report_timeout
+        while session_id not in arrivals and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+        if session_id in arrivals:
+            result["report_ms"] = (arrivals[session_id] - sent) * 1000
+        else:
+            result["error"] = "report timeout"
+    except Exception as e:
+        result["error"] = repr(e)
+    finally:
+        await ctx.shutdown()
+    return result
+
+
+async def _run_step(rooms, step, args, userdata, profile_url, arrivals, policy):
+    samples = {"lag_ms": [], "rss_kb": _rss_kb()}
+    baseline_kb = samples["rss_kb"]
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(stop, samples))
+    rejected = {}
+    start = time.perf_counter()
+    async with aiohttp.ClientSession() as http:
+        tasks = []
+        for i in range(rooms):
+            if i and args.arrival_interval:
+                await asyncio.sleep(args.arrival_interval)
+            if policy is not None:
+                accepted, busiest, _ = policy.admit(
+                    **worker_signals(len(agent.JOBS), agent.report_engine)
+                )
+                if not accepted:
+                    rejected[busiest] = rejected.get(busiest, 0) + 1
+                    continue
+            tasks.append(
+                asyncio.create_task(
+                    _run_room(
+                        f"load-{step}-{i}", args, userdata, profile_url, arrivals, http
+                    )
+                )
+            )
+        results = await asyncio.gather(*tasks)
+    duration = time.perf_counter() - start
+    stop.set()
+    await probe
+
+    errors = [r["error"] for r in results if r["error"]]
+    return {
+        "rooms": rooms,
+        "admitted": len(results),
+        "rejected": rejected,
+        "duration_s": round(duration, 3),
+        "loop_lag_ms": _summary(samples["lag_ms"]),
+        "rss_per_room_kb": round((samples["rss_kb"] - baseline_kb) / rooms, 1),
+        "turn_latency_ms": _summary([ms for r in results for ms in r["turns_ms"]]),
+        "report_latency_ms": _summary(
+            [r["report_ms"] for r in results if r["report_ms"] is not None]
+        ),
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5],
+        "open_jobs": len(agent.JOBS),
+        "leaked_jobs": len(agent.JOBS.leaks()),
+    }
+
+
+async def main(args):
+    logging.getLogger("agent").setLevel(getattr(logging, args.log_level))
+    for name in ("server", "google_genai", "aiohttp.access", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    agent.REPORT_SPECULATIVE = args.speculative
+    fake_livekit.install(
+        agent,
+        stt_delay=args.stt_delay,
+        llm_delay=args.llm_delay,
+        tts_delay=args.tts_delay,
+        turn_cpu_ms=args.turn_cpu_ms,
+    )
+
+    gemini = FakeGemini(delay=args.report_delay, chunks=20, chunk_delay=0.01)
+    agent.report_engine = ReportEngine(make_client(gemini.start_in_thread()))
+    profiles = _ThreadServer(server_async.make_app())
+    agent.PROFILE_SERVER_URL = profiles.start()
+    arrivals = {}
+    backend_server = _ThreadServer(_backend_app(arrivals))
+    reports_url = f"{backend_server.start()}/api/reports"
+
+    # Ressources du processus, comme dans prewarm
+    backend = BackendClient()
+    userdata = {
+        "vad": object(),
+        "http": backend,
+        "outbox": ReportOutbox(
+            backend, reports_url, backoff_base=0.01, backoff_max=0.1
+        ),
+    }
+
+    policy = None
+    if args.admission:
+        overrides = {
+            "max_rooms": args.max_rooms,
+            "max_reports": args.max_reports,
+            "max_loop_lag_ms": args.max_loop_lag_ms,
+            "threshold": args.load_threshold,
+        }
+        policy = LoadPolicy(**{k: v for k, v in overrides.items() if v is not None})
+
+    steps = []
+    for step, rooms in enumerate(args.ramp):
+        result = await _run_step(
+            rooms, step, args, userdata, agent.PROFILE_SERVER_URL, arrivals, policy
+        )
+        steps.append(result)
+        print(
+            f"{rooms:>4} rooms ({result['admitted']} admitted): turn p95 {result['turn_latency_ms'].get('p95', 0):7.1f} ms  "
+            f"report p95 {result['report_latency_ms'].get('p95', 0):7.1f} ms  "
+            f"lag p99 {result['loop_lag_ms'].get('p99', 0):6.1f} ms  "
+            f"rss/room {result['rss_per_room_kb']:7.1f} kB  errors {result['errors']}"
+        )
+
+    await userdata["outbox"].stop()
+    userdata["outbox"].close()
+    await backend.close()
+    agent.report_engine.shutdown()
+    gemini.stop_thread()
+    profiles.stop()
+    backend_server.stop()
+
+    report = {
+        "harness": "load_rooms",
+        "version": 1,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "params": {
+            k: v for k, v in vars(args).items() if k not in ("output", "log_level")
+        },
+        "steps": steps,
+        "telemetry": TELEMETRY.snapshot()["spans"],
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"report written to {args.output}")
+
+    if args.max_turn_p95_ms and any(
+        s["turn_latency_ms"].get("p95", 0) > args.max_turn_p95_ms for s in steps
+    ):
+        return 1
+    return 1 if any(s["errors"] or s["leaked_jobs"] for s in steps) else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ramp", type=int, nargs="+", default=[1, 10, 25, 50])
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument(
+        "--think-time", type=float, default=0.05, help="pause entre deux tours (s)"
+    )
+    parser.add_argument("--stt-delay", type=float, default=0.05)
+    parser.add_argument("--llm-delay", type=float, default=0.2)
+    parser.add_argument("--tts-delay", type=float, default=0.08)
+    parser.add_argument(
+        "--turn-cpu-ms",
+        type=float,
+        default=0.0,
+        help="travail synchrone simulé par tour",
+    )
+    parser.add_argument("--report-delay", type=float, default=0.3)
+    parser.add_argument("--report-timeout", type=float, default=30.0)
+    parser.add_argument(
+        "--report-after",
+        type=float,
+        default=0.0,
+        help="fin de session -> GENERATE_REPORT (s)",
+    )
+    parser.add_argument(
+        "--speculative",
+        action="store_true",
+        help="préparer le rapport pendant la session",
+    )
+    parser.add_argument("--max-turn-p95-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--arrival-interval", type=float, default=0.0, help="délai entre deux rooms (s)"
+    )
+    parser.add_argument(
+        "--admission", action="store_true", help="filtrer les rooms par la LoadPolicy"
+    )
+    parser.add_argument("--max-rooms", type=int)
+    parser.add_argument("--max-reports", type=int)
+    parser.add_argument("--max-loop-lag-ms", type=float)
+    parser.add_argument("--load-threshold", type=float)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", default="load_report.json")
+    sys.exit(asyncio.run(main(parser.parse_args())))
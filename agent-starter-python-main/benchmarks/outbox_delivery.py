@@ -0,0 +1,101 @@
+"""
+Benchmark : débit de livraison de l'outbox des rapports.
+
+Un stub `/api/reports` (aiohttp, thread séparé) répond 503 à une fraction
+`--fail-rate` des requêtes. On met `--reports` rapports en file puis on
+mesure le temps jusqu'à ce que tout soit livré.
+
+    uv run python benchmarks/outbox_delivery.py --reports 2000 --fail-rate 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import threading
+import time
+
+from aiohttp import web
+
+from http_client import BackendClient
+from report_outbox import ReportOutbox
+
+
+def _start_stub(fail_rate, latency):
+    async def post_report(request):
+        await request.read()
+        await asyncio.sleep(latency)
+        if random.random() < fail_rate:
+            return web.Response(status=503)
+        return web.json_response({"success": True}, status=201)
+
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    holder = {}
+
+    async def _serve():
+        app = web.Application()
+        app.router.add_post("/api/reports", post_report)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        holder["port"] = site._server.sockets[0].getsockname()[1]
+
+    def _run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(_serve())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=_run, daemon=True, name="stub-backend").start()
+    ready.wait()
+    return f"http://127.0.0.1:{holder['port']}/api/reports"
+
+
+async def main(args):
+    url = _start_stub(args.fail_rate, args.latency)
+    client = BackendClient()
+    path = os.path.join(tempfile.mkdtemp(), "outbox.sqlite3")
+    outbox = ReportOutbox(
+        client,
+        url,
+        path=path,
+        batch_size=args.batch,
+        backoff_base=0.01,
+        backoff_max=0.2,
+    )
+
+    start = time.perf_counter()
+    for i in range(args.reports):
+        await outbox.put(
+            {
+                "session_id": f"bench-{i}",
+                "patient_id": "p",
+                "narrative": {"description": "x" * 500},
+            }
+        )
+    enqueued = time.perf_counter() - start
+    await outbox.flush()
+    elapsed = time.perf_counter() - start
+
+    m = outbox.metrics()
+    print(
+        f"{args.reports} reports, fail rate {args.fail_rate:.0%}, batch {args.batch}: "
+        f"enqueue {args.reports / enqueued:,.0f}/s, delivered {m['delivered'] / elapsed:,.0f}/s "
+        f"({elapsed:.2f}s), failed attempts={m['failed']} dead={m['dead']}"
+    )
+
+    await outbox.stop()
+    outbox.close()
+    await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reports", type=int, default=2000)
+    parser.add_argument("--fail-rate", type=float, default=0.2)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--batch", type=int, default=16)
+    asyncio.run(main(parser.parse_args()))
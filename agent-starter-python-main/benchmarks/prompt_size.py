@@ -0,0 +1,74 @@
+"""
+Benchmark : taille et temps de construction du prompt de rapport.
+
+Compare l'ancien prompt (profil et dialogue en `json.dumps(..., indent=2)`)
+au builder compact de `prompts.py`, sur des dialogues synthétiques de 10,
+100 et 1000 tours.
+
+    uv run python benchmarks/prompt_size.py --repeat 200
+"""
+
+import argparse
+import json
+import timeit
+
+from prompts import _REPORT_HEAD, _REPORT_TAIL, build_report_prompt, estimate_tokens
+
+PROFILE = {
+    "id": "bench-patient",
+    "name": "Jane Doe",
+    "age": 34,
+    "gender": "female",
+    "occupation": "teacher",
+    "education_level": "master",
+    "marital_status": "single",
+    "notes": "Anxiété depuis plusieurs mois, sommeil perturbé.",
+}
+
+
+def _dialogue(turns):
+    return [
+        {
+            "speaker": "AI" if i % 2 == 0 else "Patient",
+            "text": f"Tour {i} : je me sens un peu mieux cette semaine, mais le sommeil reste difficile.",
+        }
+        for i in range(turns)
+    ]
+
+
+def legacy_prompt(profile, dialogue, session_id):
+    # Reproduit l'ancien builder : f-strings et JSON indenté, accents échappés
+    return (
+        _REPORT_HEAD
+        + f"{json.dumps(profile, indent=2)}\n"
+        + f"Dialogue: {json.dumps(dialogue, indent=2)}\n"
+        + f"Session ID: {session_id}"
+        + _REPORT_TAIL
+    )
+
+
+def main(args):
+    print(f"{'turns':>6} {'builder':<8} {'chars':>9} {'~tokens':>9} {'build':>10}")
+    for turns in (10, 100, 1000):
+        dialogue = _dialogue(turns)
+        for label, build in (
+            ("legacy", legacy_prompt),
+            ("compact", build_report_prompt),
+        ):
+            prompt = build(PROFILE, dialogue, "bench-session")
+            seconds = timeit.timeit(
+                lambda build=build, dialogue=dialogue: build(
+                    PROFILE, dialogue, "bench-session"
+                ),
+                number=args.repeat,
+            )
+            print(
+                f"{turns:>6} {label:<8} {len(prompt):>9} {estimate_tokens(prompt):>9} "
+                f"{seconds / args.repeat * 1e6:>8.1f}us"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,83 @@
+"""
+Benchmark : latence de la boucle d'événements pendant N rapports en vol.
+
+Compare l'ancien appel synchrone `client.models.generate_content` fait
+depuis une coroutine avec le ReportEngine (client `aio`, puis fallback
+executor), contre un faux serveur Gemini local.
+
+    uv run python benchmarks/report_loop_lag.py --reports 8 --delay 0.5
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from fake_gemini import FakeGemini, make_client
+
+from report_engine import ReportEngine
+
+
+class _SyncOnlyClient:
+    """Masque `client.aio` pour forcer le fallback executor."""
+
+    def __init__(self, client):
+        self.models = client.models
+
+
+async def _measure_lag(stop, interval=0.01):
+    lags = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+    return lags
+
+
+async def _run(label, n, make_call):
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_measure_lag(stop))
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    await asyncio.gather(*(make_call(i) for i in range(n)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    lags = sorted(await probe)
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    print(
+        f"{label:<22} total={elapsed:6.2f}s  "
+        f"lag max={max(lags, default=0) * 1000:8.1f}ms  "
+        f"p99={p99 * 1000:8.1f}ms  "
+        f"mean={statistics.mean(lags or [0]) * 1000:6.2f}ms"
+    )
+
+
+async def main(args):
+    server = FakeGemini(delay=args.delay)
+    # Serveur dans un thread séparé : l'appel bloquant gèlerait sinon le serveur
+    base_url = server.start_in_thread()
+    client = make_client(base_url)
+    prompt = "benchmark prompt"
+
+    async def blocking(_):
+        # Comportement historique : appel synchrone dans une coroutine
+        client.models.generate_content(model="gemini-2.5-flash", contents=prompt)
+
+    engine = ReportEngine(client, max_concurrency=args.concurrency)
+    fallback = ReportEngine(_SyncOnlyClient(client), max_concurrency=args.concurrency)
+
+    print(f"{args.reports} reports, fake model latency {args.delay}s")
+    await _run("blocking (baseline)", args.reports, blocking)
+    await _run("engine aio", args.reports, lambda _: engine.generate(prompt))
+    await _run("engine executor", args.reports, lambda _: fallback.generate(prompt))
+
+    fallback.shutdown()
+    server.stop_thread()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reports", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, default=4)
+    asyncio.run(main(parser.parse_args()))
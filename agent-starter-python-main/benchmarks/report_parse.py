@@ -0,0 +1,106 @@
+"""
+Benchmark : parsing des réponses brutes du modèle, regex historique vs
+ReportParser (JSON direct, réparation, validation par schéma).
+
+Par défaut le corpus est dérivé du rapport canné de `fake_gemini` (bloc
+```json, JSON brut, texte autour, virgules finales, sortie tronquée, types
+approximatifs, long dialogue). `--corpus` charge à la place un JSONL de
+réponses enregistrées, une par ligne : {"text": "..."}.
+
+    uv run python benchmarks/report_parse.py --repeat 200
+"""
+
+import argparse
+import copy
+import json
+import logging
+import re
+import timeit
+
+from fake_gemini import CANNED_REPORT
+
+from report_schema import ReportParser
+
+# Parseur historique (regex sur le bloc ```json), gardé ici comme référence
+_FENCED_JSON = re.compile(r"```json\s*(\{.*\})\s*```", re.DOTALL)
+
+
+def parse_report_text(text):
+    match = _FENCED_JSON.search(text)
+    try:
+        return json.loads(match.group(1) if match else text)
+    except ValueError:
+        return {}
+
+
+def _synthetic_corpus():
+    plain = json.dumps(CANNED_REPORT)
+    pretty = json.dumps(CANNED_REPORT, indent=2)
+    loose = copy.deepcopy(CANNED_REPORT)
+    loose["overview"]["age"] = "34"
+    loose["narrative"]["symptoms_observed"] = "worry, insomnia"
+    loose["dialogue"][0]["speaker"] = "assistant"
+    long_dialogue = copy.deepcopy(CANNED_REPORT)
+    long_dialogue["dialogue"] = CANNED_REPORT["dialogue"] * 1000
+    return {
+        "fenced": "```json\n" + pretty + "\n```",
+        "raw json": plain,
+        "prose around": "Sure! Here is the report:\n```json\n"
+        + pretty
+        + "\n```\nLet me know.",
+        "trailing commas": pretty.replace('"insomnia"\n', '"insomnia",\n'),
+        "truncated": plain[: plain.index('"doctor_notes"')],
+        "loose types": json.dumps(loose),
+        "long dialogue": "```json\n" + json.dumps(long_dialogue, indent=2) + "\n```",
+    }
+
+
+def _usable(report):
+    return bool(report) and "overview" in report and "session_id" in report
+
+
+def main(args):
+    logging.disable(logging.CRITICAL)
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            corpus = {
+                f"#{i}": json.loads(line)["text"]
+                for i, line in enumerate(f)
+                if line.strip()
+            }
+    else:
+        corpus = _synthetic_corpus()
+
+    parser = ReportParser()
+    totals = {"legacy": 0.0, "parser": 0.0}
+    usable = {"legacy": 0, "parser": 0}
+    print(f"{'response':<16} {'chars':>8} {'legacy':>14} {'parser':>14}")
+    for name, text in corpus.items():
+        row = []
+        for label, parse in (("legacy", parse_report_text), ("parser", parser.parse)):
+            ok = _usable(parse(text))
+            seconds = (
+                timeit.timeit(
+                    lambda parse=parse, text=text: parse(text), number=args.repeat
+                )
+                / args.repeat
+            )
+            totals[label] += seconds
+            usable[label] += ok
+            row.append(f"{seconds * 1e6:9.1f}us {'ok' if ok else '--':>2}")
+        print(f"{name:<16} {len(text):>8} {row[0]:>14} {row[1]:>14}")
+
+    print(
+        f"usable: legacy {usable['legacy']}/{len(corpus)}, parser {usable['parser']}/{len(corpus)}; "
+        f"total time legacy {totals['legacy'] * 1e3:.2f}ms, parser {totals['parser'] * 1e3:.2f}ms"
+    )
+    print(f"parser counters: {parser.metrics()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--corpus", help='JSONL de réponses enregistrées ({"text": ...})'
+    )
+    parser.add_argument("--repeat", type=int, default=200)
+    main(parser.parse_args())
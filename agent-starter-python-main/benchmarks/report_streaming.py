@@ -0,0 +1,83 @@
+"""
+Benchmark : délai avant la première section du rapport, one-shot vs streaming.
+
+Le faux serveur Gemini renvoie le rapport canné en `--chunks` morceaux
+espacés de `--chunk-delay` ; la réponse one-shot attend la même durée
+totale. On mesure quand la première section (`overview`) est exploitable
+et quand le rapport complet est parsé.
+
+    uv run python benchmarks/report_streaming.py --runs 5 --chunks 40
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from fake_gemini import CANNED_REPORT, FakeGemini, make_client
+
+from report_engine import ReportEngine
+from report_schema import ReportParser
+from report_stream import StreamingReportParser
+
+PROMPT = "benchmark prompt"
+
+
+async def _one_shot(engine):
+    start = time.perf_counter()
+    report = ReportParser().parse(await engine.generate(PROMPT))
+    elapsed = time.perf_counter() - start
+    assert report == CANNED_REPORT
+    # Sans streaming, la première section n'existe qu'une fois tout reçu
+    return elapsed, elapsed
+
+
+async def _streaming(engine):
+    start = time.perf_counter()
+    parser = StreamingReportParser()
+    first = None
+    async for piece in engine.stream(PROMPT):
+        sections = parser.feed(piece)
+        if first is None and any(isinstance(v, (dict, list)) for _, v in sections):
+            first = time.perf_counter() - start
+    report = ReportParser().parse(parser.text)
+    assert report == CANNED_REPORT
+    return first, time.perf_counter() - start
+
+
+async def _run(label, runs, call):
+    firsts, totals = [], []
+    for _ in range(runs):
+        first, total = await call()
+        firsts.append(first)
+        totals.append(total)
+    print(
+        f"{label:<10} first section={statistics.median(firsts) * 1000:7.1f}ms  "
+        f"full report={statistics.median(totals) * 1000:7.1f}ms"
+    )
+
+
+async def main(args):
+    server = FakeGemini(
+        delay=args.delay, chunks=args.chunks, chunk_delay=args.chunk_delay, paced=True
+    )
+    await server.start()
+    engine = ReportEngine(make_client(server.base_url))
+
+    print(
+        f"{args.runs} runs, first token after {args.delay}s, "
+        f"{args.chunks} chunks every {args.chunk_delay}s"
+    )
+    await _run("one-shot", args.runs, lambda: _one_shot(engine))
+    await _run("streaming", args.runs, lambda: _streaming(engine))
+
+    await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--delay", type=float, default=0.3)
+    parser.add_argument("--chunks", type=int, default=40)
+    parser.add_argument("--chunk-delay", type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
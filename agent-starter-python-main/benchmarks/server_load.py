@@ -0,0 +1,136 @@
+"""
+Harnais de charge du serveur de tokens/profils : req/s et latence de queue
+par endpoint, pour le serveur Flask de dev et le mode async multi-workers.
+
+    uv run python benchmarks/server_load.py --requests 2000 --concurrency 50
+    uv run python benchmarks/server_load.py --modes async --workers 4
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_ready(base, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{base}/getProfile", params={"room": "ping"}):
+                    return
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {base} did not start")
+
+
+def _start(mode, port, workers):
+    cmd = [sys.executable, "src/server.py", "--port", str(port)]
+    if mode == "async":
+        cmd += ["--async", "--workers", str(workers)]
+    env = dict(os.environ, FLASK_DEBUG="0")
+    return subprocess.Popen(
+        cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+async def _drive(session, label, n, concurrency, request):
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with sem:
+            start = time.perf_counter()
+            async with request(session, i) as resp:
+                await resp.read()
+                if resp.status >= 300:
+                    errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print(
+        f"  {label:<22} {n / elapsed:8.0f} req/s  p50={pct(0.50):7.2f}ms  "
+        f"p95={pct(0.95):7.2f}ms  p99={pct(0.99):7.2f}ms  errors={errors}"
+    )
+
+
+async def bench(mode, args):
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    proc = _start(mode, port, args.workers)
+    try:
+        await _wait_ready(base)
+        label = mode if mode == "flask" else f"async x{args.workers}"
+        print(f"{label}:")
+        profile = {"user_id": {"id": "p", "name": "Jane"}, "age": 30}
+        connector = aiohttp.TCPConnector(limit=args.concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await _drive(
+                session,
+                "/getConnectionDetails",
+                args.requests,
+                args.concurrency,
+                lambda s, i: s.post(
+                    f"{base}/getConnectionDetails",
+                    json={"room": f"room-{i % 100}", "identity": f"u{i}"},
+                ),
+            )
+            await _drive(
+                session,
+                "/connectAgent",
+                args.requests,
+                args.concurrency,
+                lambda s, i: s.post(
+                    f"{base}/connectAgent",
+                    json={"room": f"room-{i}", "profile": profile},
+                ),
+            )
+            # En multi-workers sans store partagé, une partie des profils est
+            # introuvable : ces 404 apparaissent dans `errors`
+            await _drive(
+                session,
+                "/getProfile",
+                args.requests,
+                args.concurrency,
+                lambda s, i: s.get(f"{base}/getProfile", params={"room": f"room-{i}"}),
+            )
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+async def main(args):
+    for mode in args.modes.split(","):
+        await bench(mode, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", default="flask,async")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
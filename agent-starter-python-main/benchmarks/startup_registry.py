@@ -0,0 +1,67 @@
+"""
+Benchmark de démarrage : début du job -> premier audio, avec et sans registre.
+
+Sans registre, chaque job recharge `silero.VAD.load()` (comportement
+historique de `entrypoint`). Avec registre, le VAD est chargé une fois en
+prewarm. Le premier audio est simulé par un faux TTS à latence fixe.
+
+    uv run python benchmarks/startup_registry.py --jobs 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from livekit import rtc
+from livekit.plugins import silero
+
+from model_registry import ModelRegistry, rss_mb
+
+
+async def _fake_tts_first_frame(latency):
+    await asyncio.sleep(latency)
+    return rtc.AudioFrame.create(
+        sample_rate=24000, num_channels=1, samples_per_channel=240
+    )
+
+
+async def _job(load_vad, tts_latency):
+    start = time.perf_counter()
+    vad = load_vad()
+    stream = vad.stream()
+    await _fake_tts_first_frame(tts_latency)
+    elapsed = time.perf_counter() - start
+    await stream.aclose()
+    return elapsed
+
+
+async def _run(label, jobs, load_vad, tts_latency):
+    rss_before = rss_mb()
+    timings = [await _job(load_vad, tts_latency) for _ in range(jobs)]
+    print(
+        f"{label:<16} first audio mean={statistics.mean(timings) * 1000:7.1f}ms  "
+        f"p95={sorted(timings)[int(jobs * 0.95) - 1] * 1000:7.1f}ms  "
+        f"rss +{rss_mb() - rss_before:6.1f} MB"
+    )
+
+
+async def main(args):
+    await _run("no registry", args.jobs, silero.VAD.load, args.tts_latency)
+
+    registry = ModelRegistry()
+    registry.load("vad", silero.VAD.load)  # prewarm
+    await _run(
+        "registry",
+        args.jobs,
+        lambda: registry.load("vad", silero.VAD.load),
+        args.tts_latency,
+    )
+    print(f"registry stats: {registry.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--tts-latency", type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
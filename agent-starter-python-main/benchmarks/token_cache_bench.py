@@ -0,0 +1,44 @@
+"""
+Microbenchmark : tokens LiveKit servis par seconde, avec et sans cache.
+
+Simule une tempête de reconnexions : `--requests` appels répartis sur
+`--identities` identités dans `--rooms` rooms.
+
+    uv run python benchmarks/token_cache_bench.py --requests 20000
+"""
+
+import argparse
+import random
+import time
+
+from token_cache import TokenCache
+
+
+def _run(label, cache, calls):
+    start = time.perf_counter()
+    for room, identity in calls:
+        cache.token(room, identity, identity, room_join=True)
+    elapsed = time.perf_counter() - start
+    m = cache.metrics()
+    print(
+        f"{label:<10} {len(calls) / elapsed:10.0f} tokens/s  "
+        f"signed={m['signed']:<6} hit_rate={m['hit_rate']:.2f}"
+    )
+
+
+def main(args):
+    rng = random.Random(0)
+    calls = [
+        (f"room-{rng.randrange(args.rooms)}", f"user-{rng.randrange(args.identities)}")
+        for _ in range(args.requests)
+    ]
+    _run("no cache", TokenCache("key", "s" * 32, cache_ttl=0), calls)
+    _run("cache", TokenCache("key", "s" * 32), calls)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--identities", type=int, default=200)
+    parser.add_argument("--rooms", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,96 @@
+"""
+Benchmark : temps CPU par tour de la journalisation de la conversation.
+
+Compare l'ancien `log_conversation` (tout l'historique relu et logué à chaque
+tour, puis print + flush) avec TranscriptSink (tour anonymisé, mis en file,
+écrit par un thread), sur des sessions de `--turns` tours. Les logs vont
+vers un handler qui formate sans écrire, le print vers /dev/null.
+
+    uv run python benchmarks/transcript_cpu.py --sessions 3 --turns 1000
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from transcript import TranscriptSink, TranscriptWriter
+
+PROFILE = {"id": "u-4821", "name": "Jane Doe"}
+
+
+class _FormatOnly(logging.Handler):
+    def emit(self, record):
+        self.format(record)
+
+
+def _turn(i):
+    if i % 2 == 0:
+        return {"question": f"Question {i}: how did you sleep this week, Jane?"}
+    return {"answer": f"Answer {i}: badly, I wake up at 3am and think about work."}
+
+
+def log_conversation(log, conv):
+    # Copie de l'ancienne version de agent.py
+    log.info("===== Conversation =====")
+    for turn in conv:
+        if "question" in turn:
+            log.info("🤖 AI: %s", turn["question"])
+        elif "answer" in turn:
+            log.info("💬 Patient: %s", turn["answer"])
+    log.info("========================")
+    print(f"[DEBUG] Current conversation_history: {conv}")
+    sys.stdout.flush()
+
+
+def run_legacy(turns, log):
+    conv = []
+    start = time.process_time()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(turns):
+            conv.append(_turn(i))
+            log_conversation(log, conv)
+    return time.process_time() - start
+
+
+def run_sink(turns, writer, session):
+    sink = TranscriptSink(f"bench-{session}", PROFILE, writer=writer)
+    conv = []
+    start = time.process_time()
+    for i in range(turns):
+        conv.append(_turn(i))
+        sink.sync(conv)
+    sink.close()
+    writer.flush()
+    # Inclut le travail du thread d'écriture (process_time compte tous les threads)
+    return time.process_time() - start
+
+
+def main(args):
+    log = logging.getLogger("bench.transcript")
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    log.addHandler(_FormatOnly())
+    logging.getLogger("agent.transcript").propagate = False
+
+    writer = TranscriptWriter(tempfile.mkdtemp())
+    legacy = sum(run_legacy(args.turns, log) for _ in range(args.sessions))
+    sink = sum(run_sink(args.turns, writer, s) for s in range(args.sessions))
+    writer.stop()
+
+    turns = args.turns * args.sessions
+    print(f"{args.sessions} sessions x {args.turns} turns")
+    print(
+        f"log_conversation : {legacy / turns * 1e6:10.1f} µs CPU/turn ({legacy:.2f}s)"
+    )
+    print(f"TranscriptSink   : {sink / turns * 1e6:10.1f} µs CPU/turn ({sink:.2f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=3)
+    parser.add_argument("--turns", type=int, default=1000)
+    main(parser.parse_args())
@@ -1,14 +1,55 @@
-import logging
-import sys
 import asyncio
-import aiohttp
+import contextlib
+import functools
 import json
+import logging
 import os
-import re
-from google import genai
+import sqlite3
+import sys
+import time
+
+import aiohttp
 from dotenv import load_dotenv
-from livekit.agents import Agent, AgentSession, JobContext, WorkerOptions, cli
-from livekit.plugins import deepgram, silero, google, speechify
+from livekit.agents import (
+    Agent,
+    AgentSession,
+    JobContext,
+    JobRequest,
+    WorkerOptions,
+    cli,
+)
+
+import report_batch
+from dialogue_window import DialogueWindow, compact_dialogue
+from http_client import BackendClient
+from job_state import JobRegistry
+from model_registry import MODELS
+from pipeline_presets import PIPELINE_PRESET, get_preset, llm_options, voice_key
+from prompts import build_instructions, build_report_prompt, estimate_tokens
+from report_cache import ReportCache
+from report_engine import ReportEngine
+from report_outbox import ReportOutbox
+from report_pending import PendingReports
+from report_schema import ReportParser, structured_config
+from report_speculation import (
+    PLACEHOLDER_SESSION_ID,
+    REPORT_SPECULATIVE,
+    ReportSpeculator,
+)
+from report_stream import StreamingReportParser
+from session_directory import SessionDirectory, worker_id
+from session_store import SessionStore
+from task_supervisor import TaskSupervisor
+from telemetry import METRICS_PORT, TELEMETRY, queue_logging, start_metrics_server
+from transcript import TranscriptSink
+from utterance_cache import GREETING, UTTERANCES
+from worker_load import (
+    LOOP_LAG,
+    WORKER_LOAD_THRESHOLD,
+    LoadPolicy,
+    job_signals,
+    publish_job_load,
+)
 
 # ---------------- Logging ----------------
 logger = logging.getLogger("agent")
@@ -16,30 +57,87 @@ logger.setLevel(logging.INFO)
 handler = logging.StreamHandler(sys.stdout)
 formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 handler.setFormatter(formatter)
-logger.addHandler(handler)
+# Écriture sur stdout dans un thread : un log ne bloque plus la boucle des rooms
+queue_logging(logger, handler)
 
 # ---------------- Env variables ----------------
 load_dotenv(".env.local")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 GENAI_API_KEY = os.getenv("GENAI_API_KEY")
-client = genai.Client(api_key=GENAI_API_KEY)
+
+def make_genai_client():
+    # google.genai pèse ~0.8 s à l'import : client créé au premier rapport
+    from google import genai
+    return genai.Client(api_key=GENAI_API_KEY)
+
+report_engine = ReportEngine(make_genai_client)
+# Une génération par session à la fois, rapports terminés réutilisés
+report_cache = ReportCache()
+# Streaming : brouillons envoyés au backend au fil des sections complètes
+REPORT_STREAMING = os.getenv("REPORT_STREAMING", "1") == "1"
+REPORT_DRAFT_INTERVAL_S = float(os.getenv("REPORT_DRAFT_INTERVAL_S", "1.0"))
+# Sortie structurée : JSON contraint par le schéma du modèle Report, validé et réparé localement
+REPORT_STRUCTURED = os.getenv("REPORT_STRUCTURED", "1") == "1"
+
+@functools.cache
+def report_config():
+    return structured_config() if REPORT_STRUCTURED else None
+
+report_parser = ReportParser()
+REPORTS_URL = os.getenv("REPORTS_URL", "http://localhost:5000/api/reports")
+# Délai laissé à l'outbox pour livrer les rapports à la fermeture d'une room
+REPORT_OUTBOX_FLUSH_S = float(os.getenv("REPORT_OUTBOX_FLUSH_S", "5"))
+# Demandes de rapport suivies jusqu'à leur fin ; à la fermeture de la room,
+# REPORT_DRAIN_TIMEOUT_S pour finir, puis sauvegarde sur disque des restantes
+report_tasks = TaskSupervisor()
+pending_reports = PendingReports()
+REPORT_DRAIN_TIMEOUT_S = float(os.getenv("REPORT_DRAIN_TIMEOUT_S", "20"))
 
 # ----------------- Global sessions -----------------
-AGENT_SESSIONS = {}
+# Borné (LRU + TTL) et nettoyé à la fermeture de chaque room
+AGENT_SESSIONS = SessionStore(
+    max_size=int(os.getenv("AGENT_SESSIONS_MAX", "1000")),
+    ttl=float(os.getenv("AGENT_SESSIONS_TTL_S", "21600")),
+)
+# Un JobState par room, rangé dans AGENT_SESSIONS ; proc.userdata ne garde que les ressources du processus
+JOBS = JobRegistry(AGENT_SESSIONS)
+# Une room fermée depuis plus longtemps que ce délai ne doit plus être en mémoire
+JOB_LEAK_GRACE_S = float(os.getenv("JOB_LEAK_GRACE_S", "60"))
+# Annuaire partagé avec le serveur de tokens : profils des rooms et worker qui tient chacune
+DIRECTORY = SessionDirectory()
+
+# ----------------- Pipeline vocal -----------------
+# Préréglage validé au démarrage : un nom inconnu échoue avant le premier job
+PIPELINE = get_preset(PIPELINE_PRESET)
+VOICE = voice_key(PIPELINE)
+# Phrases fixes synthétisées une fois par processus pendant prewarm
+GREETING_CACHE = os.getenv("GREETING_CACHE", "1") == "1"
+
+# ----------------- Charge du worker -----------------
+LOAD_POLICY = LoadPolicy()
+
+
+def compute_load(worker):
+    # Appelé par LiveKit dans un thread du worker : rapports et latence de boucle
+    # viennent des processus de jobs, via l'annuaire partagé
+    rooms = [info.job.room.name for info in worker.active_jobs]
+    return LOAD_POLICY.load(**job_signals(DIRECTORY, rooms))
+
+
+async def request_fnc(req: JobRequest):
+    accepted, busiest, load = LOAD_POLICY.admit()
+    if not accepted:
+        logger.warning(f"🚦 Job refusé pour {req.room.name}: charge {load} ({busiest})")
+        await req.reject()
+        return
+    await req.accept()
+
+# ----------------- Profil patient -----------------
+PROFILE_SERVER_URL = os.getenv("PROFILE_SERVER_URL", "http://localhost:5001")
+PROFILE_WAIT_TIMEOUT_S = float(os.getenv("PROFILE_WAIT_TIMEOUT_S", "10"))
+PROFILE_POLL_FALLBACK_S = 0.5
 
 # ----------------- Helper -----------------
-def log_conversation(ctx):
-    conv = ctx.proc.userdata.get("conversation_history", [])
-    logger.info("===== Conversation =====")
-    for turn in conv:
-        if "question" in turn:
-            logger.info("🤖 AI: %s", turn["question"])
-        elif "answer" in turn:
-            logger.info("💬 Patient: %s", turn["answer"])
-    logger.info("========================")
-    print(f"[DEBUG] Current conversation_history: {ctx.proc.userdata.get('conversation_history', [])}")
-    sys.stdout.flush()
-
 def convert_sets(obj):
     if isinstance(obj, set):
         return list(obj)
@@ -50,115 +148,289 @@ def convert_sets(obj):
     return obj
 
 
-async def generate_report_with_gemini(profile, dialogue, session_id):
-    prompt = (
-        "You are Dr. Mira, a compassionate psychologist. "
-        "Based on the following patient profile and dialogue, generate a complete session report in JSON "
-        "with the exact following structure:\n\n"
-        "{\n"
-        "  \"session_id\": \"<session_id>\",\n"
-        "  \"patient_id\": \"<patient_id>\",\n"
-        "  \"overview\": {\n"
-        "    \"name\": \"<full name>\",\n"
-        "    \"age\": <age>,\n"
-        "    \"gender\": \"<gender>\",\n"
-        "    \"occupation\": \"<occupation>\",\n"
-        "    \"education_level\": \"<education level>\",\n"
-        "    \"marital_status\": \"<marital status>\",\n"
-        "    \"session_info\": \"Session <session_id> - Consultation\",\n"
-        "    \"initial_diagnosis\": \"<diagnosis>\",\n"
-        "    \"scores\": [\n"
-        "      {\"tool\": \"<tool>\", \"intake\": <intake>, \"current\": <current>}\n"
-        "    ]\n"
-        "  },\n"
-        "  \"narrative\": {\n"
-        "    \"description\": \"<short description>\",\n"
-        "    \"symptoms_observed\": [\"<symptom1>\", \"<symptom2>\"] ,\n"
-        "    \"physical_markers\": [\"<marker1>\", \"<marker2>\"] ,\n"
-        "    \"behavioral_markers\": [\"<behavior1>\", \"<behavior2>\"]\n"
-        "  },\n"
-        "  \"risk_indicators\": {\n"
-        "    \"suicidal_ideation\": \"<value>\",\n"
-        "    \"substance_use\": \"<value>\",\n"
-        "    \"pregnancy\": \"<value>\",\n"
-        "    \"family_history\": \"<value>\",\n"
-        "    \"other_risks\": [\"<risk1>\", \"<risk2>\"]\n"
-        "  },\n"
-        "  \"clinical_inference\": {\n"
-        "    \"primary_diagnosis\": \"<primary diagnosis>\",\n"
-        "    \"differential_diagnoses\": [\"<diagnosis1>\", \"<diagnosis2>\"] ,\n"
-        "    \"recommendations\": [\"<recommendation1>\", \"<recommendation2>\"]\n"
-        "  },\n"
-        "  \"dialogue\": <dialogue>,\n"
-        "  \"doctor_notes\": \"<doctor notes>\",\n"
-        "  \"notified_to_doctor\": true\n"
-        "}\n\n"
-        f"Patient profile: {json.dumps(profile, indent=2)}\n"
-        f"Dialogue: {json.dumps(dialogue, indent=2)}\n"
-        f"Session ID: {session_id}\n\n"
-        "Return only the JSON object without any extra text."
-    )
+async def wait_for_profile(backend, room_name, timeout=PROFILE_WAIT_TIMEOUT_S):
+    """
+    Attend le profil de la room via le long-poll /waitProfile : le serveur répond
+    dès que /connectAgent l'a stocké. Après `timeout` secondes on abandonne et
+    l'agent démarre avec un profil vide. Retourne (profil, secondes attendues).
+    Un profil déjà présent dans l'annuaire partagé évite l'aller-retour HTTP.
+    """
+    url = f"{PROFILE_SERVER_URL}/waitProfile"
+    start = time.perf_counter()
+    deadline = start + timeout
 
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=prompt
-    )
-
-    logger.info(f"💬 Gemini raw response: {response}")
-    text = getattr(response, "text", str(response))
-    logger.info(f"💬 Gemini raw text: {text}")
-
-    # 🔍 Extraire uniquement le JSON
     try:
-        # Enlever les backticks ```json ... ```
-        match = re.search(r"```json\s*(\{.*\})\s*```", text, re.DOTALL)
-        if match:
-            json_text = match.group(1)
-        else:
-            logger.warning("⚠️ Aucun bloc JSON trouvé, utilisation du texte brut")
-            json_text = text
-
-        return json.loads(json_text)
-
+        profile = await asyncio.to_thread(DIRECTORY.get, room_name)
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Annuaire des rooms illisible: {e!r}")
+        profile = None
+    if profile:
+        return profile, time.perf_counter() - start
+
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return {}, time.perf_counter() - start
+
+        call_start = time.perf_counter()
+        try:
+            resp = await backend.get(
+                url,
+                params={"room": room_name, "timeout": f"{remaining:.2f}"},
+                timeout=aiohttp.ClientTimeout(total=remaining + 2),
+                retries=0,
+            )
+            if resp.status == 200:
+                profile = (resp.json() or {}).get("profile") or {}
+                if profile:
+                    return profile, time.perf_counter() - start
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"⚠️ /waitProfile indisponible: {e!r}")
+
+        # Réponse immédiate sans profil (serveur sans long-poll, erreur) : on
+        # retombe sur un poll espacé plutôt que de boucler à vide
+        if time.perf_counter() - call_start < PROFILE_POLL_FALLBACK_S:
+            await asyncio.sleep(min(PROFILE_POLL_FALLBACK_S, max(0, deadline - time.perf_counter())))
+
+
+async def generate_report_with_gemini(profile, dialogue, session_id, on_draft=None):
+    """
+    Génère le rapport de session. En mode streaming, `on_draft(sections)` est
+    appelé (au plus toutes les REPORT_DRAFT_INTERVAL_S) dès que de nouvelles
+    sections de premier niveau sont complètes.
+    """
+    # Résumé des anciens tours + derniers tours verbatim : prompt borné
+    summary, recent = compact_dialogue(dialogue)
+    prompt = build_report_prompt(profile, recent, session_id, summary)
+    logger.info(f"🧮 Prompt rapport {session_id}: {len(prompt)} caractères, ~{estimate_tokens(prompt)} tokens")
+
+    if not REPORT_STREAMING:
+        # Appel non bloquant : la boucle continue de servir l'audio des rooms
+        text = await report_engine.generate(prompt, config=report_config())
+        logger.info(f"💬 Gemini raw text: {text}")
+        report = report_parser.parse(text)
+        logger.info(f"🧾 Parsing des rapports: {report_parser.metrics()}")
+        return _with_full_dialogue(report, dialogue, recent)
+
+    parser = StreamingReportParser()
+    start = time.perf_counter()
+    first_section_at = None
+    last_draft = float("-inf")
+    async for piece in report_engine.stream(prompt, config=report_config()):
+        # Les identifiants seuls ne font pas un brouillon : on attend une vraie section
+        if not any(isinstance(value, (dict, list)) for _, value in parser.feed(piece)):
+            continue
+        now = time.perf_counter()
+        if first_section_at is None:
+            first_section_at = now - start
+            logger.info(f"⏱ Première section du rapport {session_id} après {first_section_at * 1000:.0f} ms")
+        if on_draft is not None and not parser.complete and now - last_draft >= REPORT_DRAFT_INTERVAL_S:
+            last_draft = now
+            await on_draft(dict(parser.sections))
+
+    logger.info(f"💬 Gemini raw text: {parser.text}")
+    report = report_parser.parse(parser.text)
+    logger.info(f"🧾 Parsing des rapports: {report_parser.metrics()}")
+    return _with_full_dialogue(report, dialogue, recent)
+
+
+def stamp_report(report, session_id, patient_id):
+    """Identifiants connus de l'agent : ceux produits par le modèle ne font pas foi."""
+    report["session_id"] = session_id
+    report["patient_id"] = patient_id
+    return report
+
+
+def _with_full_dialogue(report, dialogue, recent):
+    # Le modèle n'a vu que les derniers tours : le rapport garde la transcription complète
+    if report and len(recent) < len(dialogue):
+        report["dialogue"] = dialogue
+    return report
+
+async def regenerate_pending_report(record, outbox):
+    """Régénère une demande abandonnée par un worker précédent et la met dans l'outbox."""
+    session_id = record["session_id"]
+    profile = record.get("profile") or {}
+    dialogue = record.get("dialogue") or []
+    try:
+        report = await report_cache.get_or_generate(
+            session_id,
+            profile,
+            dialogue,
+            functools.partial(generate_report_with_gemini, profile, dialogue, session_id),
+        )
+        if report:
+            stamp_report(report, session_id, record.get("patient_id") or profile.get("id", "unknown"))
+            await outbox.put(report, status="finalized")
+            report_tasks.on_abandon(None)
+            logger.info(f"📮 Rapport repris {session_id} mis en file pour livraison")
+            return
+        logger.error(f"❌ Rapport vide pour la session reprise {session_id}")
     except Exception as e:
-        logger.error(f"❌ Error parsing Gemini output: {e}")
-        return {}
+        logger.error(f"❌ Reprise du rapport {session_id} échouée: {e!r}")
+    # Le fichier a déjà été réclamé : sans cela, la demande serait perdue
+    report_tasks.on_abandon(None)
+    await asyncio.to_thread(pending_reports.retry, record)
+
+
+async def resume_pending_reports(room_name, outbox):
+    """Les demandes reprises deviennent des tâches de la room, vidangées avec elle."""
+    for record in await asyncio.to_thread(pending_reports.claim):
+        report_tasks.spawn(
+            room_name,
+            regenerate_pending_report(record, outbox),
+            on_abandon=functools.partial(pending_reports.put, record),
+        )
+
+# ----------------- Plugins LiveKit -----------------
+# Importés au premier besoin : `import agent` (batch, tests, outils) n'en a pas
+# besoin. LiveKit exige un enregistrement sur le thread principal : prewarm
+# (processus du job) et le lancement du worker (download-files, exécuteur thread).
+deepgram = silero = google = speechify = None
+
+
+def load_plugins():
+    global deepgram, silero, google, speechify
+    if deepgram is None:
+        from livekit.plugins import deepgram, google, silero, speechify
+    return deepgram, silero, google, speechify
+
+
+@contextlib.asynccontextmanager
+async def greeting_tts():
+    """
+    TTS de la pré-synthèse. prewarm tourne hors job, sans contexte HTTP
+    LiveKit : le client Speechify est passé explicitement au plugin, puis
+    fermé avec lui.
+    """
+    import httpx
+    from speechify.client import AsyncSpeechify
+
+    http = httpx.AsyncClient(timeout=httpx.Timeout(30.0, connect=15.0))
+    tts = speechify.TTS(
+        **PIPELINE["tts"],
+        client=AsyncSpeechify(token=os.getenv("SPEECHIFY_API_KEY"), httpx_client=http),
+    )
+    try:
+        yield tts
+    finally:
+        await tts.aclose()
+        await http.aclose()
 
 # ----------------- Pré-chargement -----------------
 def prewarm(proc):
     logger.info("🔹 Prewarming session...")
-    proc.userdata["vad"] = silero.VAD.load()
-    proc.userdata["conversation_history"] = []
-    proc.userdata["end_call"] = False
-    proc.userdata["report_generated"] = False
-    logger.info("🔹 Prewarm completed")
-    print("[DEBUG] Prewarm done. userdata keys:", list(proc.userdata.keys()))
+    load_plugins()
+    # Chargé une seule fois par processus, réutilisé par chaque job
+    proc.userdata["vad"] = MODELS.load("vad", silero.VAD.load)
+    # Client HTTP partagé par tout le processus (session ouverte au premier appel)
+    proc.userdata["http"] = BackendClient()
+    # Rapports écrits sur disque puis livrés en arrière-plan (reprise après redémarrage)
+    proc.userdata["outbox"] = ReportOutbox(proc.userdata["http"], REPORTS_URL)
+    # Accueil pré-synthétisé en arrière-plan ; la première room peut encore passer par le TTS
+    if GREETING_CACHE:
+        UTTERANCES.fill_in_background(greeting_tts, VOICE)
+    logger.info(f"🔹 Prewarm completed, models: {MODELS.stats()}")
+    logger.debug(f"Prewarm done. userdata keys: {list(proc.userdata.keys())}")
+
+def job_started(userdata):
+    userdata["active_jobs"] = userdata.get("active_jobs", 0) + 1
+
+
+async def job_finished(userdata):
+    """
+    Fin de la fermeture d'un job. Le dernier du processus arrête l'outbox et
+    ferme le client HTTP (pool de connexions) ; un job suivant les rouvre.
+    Retourne True si les ressources ont été libérées.
+    """
+    userdata["active_jobs"] -= 1
+    if userdata["active_jobs"]:
+        return False
+    await userdata["outbox"].stop()
+    await userdata["http"].close()
+    return True
 
 # ----------------- Entrypoint -----------------
 async def entrypoint(ctx: JobContext):
     room_name = ctx.room.name
     logger.info(f"📌 Entrypoint started for room: {room_name}")
-    print(f"[DEBUG] Entrypoint started. Room name: {room_name}")
-
-    # Charger le profil patient
-    server_url = "http://localhost:5001/getProfile"
-    profile = {}
-
-    for attempt in range(5):
-        async with aiohttp.ClientSession() as session:
-            async with session.get(server_url, params={"room": room_name}) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    profile = data.get("profile", {})
-                    if profile:
-                        logger.info(f"✅ Profile loaded successfully on attempt {attempt + 1}")
-                        print(f"[DEBUG] Profile loaded: {profile}")
-                        break
-        if not profile:
-            logger.warning(f"⚠️ Profil vide, tentative {attempt + 1}/5...")
-            await asyncio.sleep(0.5)
-
-    ctx.proc.userdata["patient_profile"] = {
+    leaked = JOBS.check(older_than=JOB_LEAK_GRACE_S)
+    if leaked:
+        logger.warning(f"⚠️ États de job encore en mémoire après fermeture: {leaked}")
+    state = JOBS.open(room_name)
+    LOOP_LAG.start()
+    # Identifiant lu dans ce processus : en mode process, chaque job a son pid
+    worker = worker_id()
+    backend = ctx.proc.userdata["http"]
+    outbox = ctx.proc.userdata["outbox"]
+    load_publisher = None
+
+    # Nettoyage ordonné à la fermeture de la room
+    async def cleanup_room():
+        # Les rapports demandés finissent (ou sont sauvegardés) avant l'annulation du reste
+        drain = await report_tasks.drain(room_name, timeout=REPORT_DRAIN_TIMEOUT_S)
+        if drain["finished"] or drain["abandoned"]:
+            TELEMETRY.record("report_drain", drain["drain_ms"], room_name)
+            logger.info(f"⏳ Rapports de {room_name} vidangés: {drain}")
+        await report_engine.cancel_room(room_name)
+        if not await outbox.flush(timeout=REPORT_OUTBOX_FLUSH_S):
+            logger.warning(f"⚠️ Outbox non vidée à la fermeture de {room_name}: {outbox.metrics()}")
+        if state.transcript is not None:
+            state.transcript.close()
+            logger.info(f"🗒 Transcription {room_name} fermée: {state.transcript.stats()}")
+        JOBS.close(room_name)
+        if load_publisher is not None:
+            load_publisher.cancel()
+        await asyncio.to_thread(DIRECTORY.unassign, room_name, worker)
+        try:
+            await backend.post_json(f"{PROFILE_SERVER_URL}/disconnectAgent", {"room": room_name}, retries=0)
+        except Exception as e:
+            logger.warning(f"⚠️ /disconnectAgent a échoué pour {room_name}: {e!r}")
+        logger.info(f"🧹 Room {room_name} nettoyée, jobs: {JOBS.summary()}")
+
+    async def on_room_shutdown():
+        try:
+            await cleanup_room()
+        finally:
+            # Les callbacks d'arrêt des rooms tournent en parallèle : le client
+            # n'est fermé qu'une fois le dernier /disconnectAgent envoyé
+            if await job_finished(ctx.proc.userdata):
+                logger.info("🔌 Client HTTP du processus fermé")
+
+    # Enregistré avant toute mise en place : si l'une échoue, LiveKit appelle
+    # quand même le callback et le compteur de jobs / le client sont libérés
+    job_started(ctx.proc.userdata)
+    ctx.add_shutdown_callback(on_room_shutdown)
+
+    await asyncio.to_thread(DIRECTORY.assign, room_name, worker)
+    # Rapports en vol et latence de boucle de ce processus, relus par compute_load
+    load_publisher = asyncio.create_task(publish_job_load(DIRECTORY, room_name, report_engine))
+    # Reprend aussi les rapports laissés en attente par un worker précédent
+    outbox.start()
+    await resume_pending_reports(room_name, outbox)
+    if METRICS_PORT and "metrics" not in ctx.proc.userdata:
+        ctx.proc.userdata["metrics"], _ = await start_metrics_server(
+            extra=lambda: {
+                "outbox": outbox.metrics(),
+                "report_cache": report_cache.metrics(),
+                "utterances": UTTERANCES.metrics(),
+                "report_tasks": report_tasks.metrics(),
+                "pending_reports": pending_reports.metrics(),
+                "directory": DIRECTORY.last_summary,
+            }
+        )
+
+    # Charger le profil patient (push via long-poll, délai max PROFILE_WAIT_TIMEOUT_S)
+    with TELEMETRY.span("profile_fetch", room_name):
+        profile, waited = await wait_for_profile(backend, room_name)
+    state.profile_wait_ms = round(waited * 1000, 1)
+    if profile:
+        logger.info(f"✅ Profile loaded for room {room_name} after {waited * 1000:.0f} ms")
+        logger.debug(f"Profile loaded: {profile}")
+    else:
+        logger.warning(f"⚠️ Aucun profil reçu pour {room_name} après {waited * 1000:.0f} ms, profil vide utilisé")
+
+    state.profile = {
         "id": profile.get("user_id", {}).get("id", "unknown"),
         "name": f"{profile.get('user_id', {}).get('name','')} {profile.get('user_id', {}).get('last_name','')}".strip() or "Unknown",
         "age": profile.get("age"),
@@ -168,20 +440,32 @@ async def entrypoint(ctx: JobContext):
         "marital_status": profile.get("marital_status"),
         "notes": profile.get("notes", ""),
     }
-    logger.info(f"📌 Patient profile set: {ctx.proc.userdata['patient_profile']}")
-    print(f"[DEBUG] Patient profile stored: {ctx.proc.userdata['patient_profile']}")
-
-    AGENT_SESSIONS[room_name] = ctx
-    logger.info(f"📌 Session added to AGENT_SESSIONS: {room_name}")
-    print(f"[DEBUG] AGENT_SESSIONS keys now: {list(AGENT_SESSIONS.keys())}")
-
-    # Création de la session agent
+    logger.info(f"📌 Patient profile set: {state.profile}")
+
+    # Transcription anonymisée, écrite tour par tour hors de la boucle
+    state.transcript = TranscriptSink(room_name, state.profile)
+    # Rapport préparé en arrière-plan au fil des tours (REPORT_SPECULATIVE=1)
+    if REPORT_SPECULATIVE:
+        async def speculate(dialogue, profile=state.profile):
+            # Places limitées : sans place libre, pas de préparation (rapport généré à la demande)
+            with report_engine.speculation() as slot:
+                if not slot:
+                    return None
+                with TELEMETRY.span("report_speculation", room_name):
+                    return await generate_report_with_gemini(profile, dialogue, PLACEHOLDER_SESSION_ID)
+
+        state.speculator = ReportSpeculator(
+            speculate, functools.partial(report_engine.run_for_room, room_name)
+        )
+    logger.debug(f"Jobs: {JOBS.summary()}")
+
+    # Création de la session agent (plugins par room : liés au contexte HTTP du job)
     session_agent = AgentSession(
-        stt=deepgram.STT(model="nova-3", language="multi"),
-        llm=google.LLM(model="gemini-2.5-flash", temperature=0.7, max_output_tokens=500),
-        tts=speechify.TTS(model="simba-english", voice_id="jack"),
-        vad=silero.VAD.load(),
-        use_tts_aligned_transcript=True,
+        stt=deepgram.STT(**PIPELINE["stt"]),
+        llm=google.LLM(**llm_options(PIPELINE)),
+        tts=speechify.TTS(**PIPELINE["tts"]),
+        vad=ctx.proc.userdata.get("vad") or MODELS.load("vad", silero.VAD.load),
+        **PIPELINE["session"],
     )
 
     # Gestion du report-request
@@ -202,52 +486,160 @@ async def entrypoint(ctx: JobContext):
 
                     logger.info(f"📝 Génération du rapport pour session {session_id}")
 
-                    report = await generate_report_with_gemini(
-                        ctx.proc.userdata["patient_profile"],
-                        dialogue,
-                        session_id
-                    )
+                    patient_id = state.patient_id
+                    profile = state.profile
+                    # Arrêt du worker avant la fin : la demande est gardée sur disque
+                    report_tasks.on_abandon(functools.partial(pending_reports.put, {
+                        "session_id": session_id,
+                        "patient_id": patient_id,
+                        "profile": profile,
+                        "dialogue": dialogue,
+                        "room": room_name,
+                    }))
+
+                    async def post_draft(sections, session_id=session_id, patient_id=patient_id):
+                        draft = {"session_id": session_id, "patient_id": patient_id, **sections}
+                        await outbox.put(draft, status="draft")
+                        logger.info(f"📝 Brouillon ({len(sections)} sections) mis en file pour {session_id}")
+
+                    with TELEMETRY.span("report_generation", room_name):
+                        report = None
+                        if state.speculator is not None:
+                            report = await state.speculator.reconcile(dialogue, session_id)
+                            logger.info(f"⚡ Préparation des rapports: {state.speculator.metrics()}")
+                        if report is None:
+                            report = await report_cache.get_or_generate(
+                                session_id,
+                                profile,
+                                dialogue,
+                                functools.partial(
+                                    generate_report_with_gemini, profile, dialogue, session_id, on_draft=post_draft
+                                ),
+                            )
+                    logger.info(f"📊 Cache des rapports: {report_cache.metrics()}")
+                    if not report:
+                        logger.error(f"❌ Rapport vide pour la session {session_id}, rien à envoyer")
+                        continue
 
+                    stamp_report(report, session_id, patient_id)
                     logger.info(f"🖨 Rapport structuré prêt :\n{json.dumps(report, indent=2)}")
 
-                    # -------------------- Envoi au backend --------------------
-                    backend_url = "http://localhost:5000/api/reports"
-                    async with aiohttp.ClientSession() as session:
-                        async with session.post(backend_url, json=report) as resp:
-                            if resp.status in (200, 201):
-                                logger.info("✅ Rapport envoyé au backend avec succès")
-                                print("[DEBUG] Rapport envoyé au backend")
-                            else:
-                                logger.error(f"❌ Échec envoi rapport au backend: {resp.status} - {await resp.text()}")
+                    # -------------------- Envoi au backend (via l'outbox) --------------------
+                    await outbox.put(report, status="finalized")
+                    state.report_generated = True
+                    logger.info(f"📮 Rapport {session_id} mis en file pour livraison")
 
                 except Exception as e:
                     logger.error(f"❌ Erreur traitement report-request: {e}")
+                finally:
+                    report_tasks.on_abandon(None)
 
-        asyncio.create_task(process_report_request())
+        report_tasks.spawn(room_name, process_report_request())
 
     ctx.room.register_text_stream_handler("report-request", handle_report_request)
     logger.info("✅ Registered report-request handler")
 
     # Instructions
-    profile_info = json.dumps(ctx.proc.userdata["patient_profile"], indent=2)
-    instructions = (
-        "You are Dr. Mira, a compassionate psychologist conducting a short interview. "
-        "You will ask 3-6 short, empathetic questions to understand the patient's mental state. "
-        "Keep questions simple and supportive. "
-        f"Patient profile:\n{profile_info}\n"
-        "At the end of the conversation, summarize what the patient has shared in a concise way. "
-        "Do NOT generate a diagnostic report automatically. "
-        "The AI should only send '[SESSION_END]' after the patient confirms that everything is fine."
-    )
+    instructions = build_instructions(state.profile)
+    logger.info(f"🧮 Instructions: {len(instructions)} caractères, ~{estimate_tokens(instructions)} tokens")
 
     agent = Agent(instructions=instructions)
 
+    # Contexte live borné : au-delà de DIALOGUE_KEEP_TURNS, les anciens tours
+    # sortent du chat et sont résumés dans les instructions, par lots
+    window = DialogueWindow()
+    folded_since_compaction = 0
+
+    async def compact_live_context():
+        chat_ctx = agent.chat_ctx.copy()
+        chat_ctx.truncate(max_items=window.keep_last)
+        await agent.update_chat_ctx(chat_ctx)
+        await agent.update_instructions(
+            build_instructions(state.profile, window.summary)
+        )
+        logger.info(f"🗜 Contexte live compacté pour {room_name}: {window.stats()}")
+
+    @session_agent.on("conversation_item_added")
+    def on_conversation_item(event):
+        nonlocal folded_since_compaction
+        item = event.item
+        text = getattr(item, "text_content", None)
+        if not text or item.role not in ("assistant", "user") or state.closed:
+            return
+        speaker = "AI" if item.role == "assistant" else "Patient"
+        state.transcript.add(speaker, text)
+        if state.speculator is not None:
+            state.speculator.add(speaker, text)
+        if window.add(speaker, text):
+            folded_since_compaction += 1
+        if folded_since_compaction >= max(1, window.keep_last // 4):
+            folded_since_compaction = 0
+            report_engine.run_for_room(room_name, compact_live_context())
+
+    # Latence de chaque tour : fin de parole -> 1er token LLM -> 1er octet TTS
+    turns = {}
+
+    @session_agent.on("metrics_collected")
+    def on_metrics(event):
+        m = event.metrics
+        speech_id = getattr(m, "speech_id", None)
+        if m.type == "eou_metrics":
+            TELEMETRY.record("stt_transcription", m.transcription_delay * 1000, room_name)
+            part, value = "eou", m.end_of_utterance_delay
+        elif m.type == "llm_metrics":
+            part, value = "llm", m.ttft
+        elif m.type == "tts_metrics":
+            part, value = "tts", m.ttfb
+        else:
+            return
+        TELEMETRY.record(f"{part}_latency", value * 1000, room_name)
+        if speech_id is None or value < 0:
+            return
+        # Tour interrompu : certaines mesures n'arrivent jamais, on borne le dict
+        if speech_id not in turns and len(turns) >= 32:
+            turns.pop(next(iter(turns)))
+        parts = turns.setdefault(speech_id, {})
+        parts[part] = value
+        if len(parts) == 3:
+            del turns[speech_id]
+            TELEMETRY.record("turn", sum(parts.values()) * 1000, room_name)
+
     # Démarrage session agent
-    await session_agent.start(agent=agent, room=ctx.room)
-    await ctx.connect()
-    await session_agent.say("Hello, my name is Dr. Mira. I will ask you a few quick questions about how you feel.")
-    logger.info("💬 Initial message sent to patient")
-    print("[DEBUG] Initial message sent")
+    with TELEMETRY.span("session_start", room_name):
+        await session_agent.start(agent=agent, room=ctx.room)
+        await ctx.connect()
+    # Lecture complète de l'accueil (le premier son est dans les métriques TTS du tour)
+    with TELEMETRY.span("greeting_playout", room_name):
+        await UTTERANCES.say(session_agent, VOICE, GREETING)
+    logger.info(
+        f"💬 Initial message sent to patient ({PIPELINE_PRESET}), latences: {TELEMETRY.room(room_name)}, "
+        f"cache: {UTTERANCES.metrics()}"
+    )
+
+# ----------------- Génération en lot -----------------
+async def run_report_batch(argv):
+    backend = BackendClient()
+    try:
+        return await report_batch.main(
+            argv,
+            generate_report_with_gemini,
+            make_outbox=lambda: ReportOutbox(backend, REPORTS_URL),
+        )
+    finally:
+        await backend.close()
+        report_engine.shutdown()
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
+    if sys.argv[1:2] == ["batch"]:
+        asyncio.run(run_report_batch(sys.argv[2:]))
+    else:
+        load_plugins()
+        cli.run_app(WorkerOptions(
+            entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
+            request_fnc=request_fnc,
+            load_fnc=compute_load,
+            load_threshold=WORKER_LOAD_THRESHOLD,
+            # Vidange des rapports et de l'outbox avant que LiveKit tue le job
+            shutdown_process_timeout=REPORT_DRAIN_TIMEOUT_S + REPORT_OUTBOX_FLUSH_S + 5,
+        ))
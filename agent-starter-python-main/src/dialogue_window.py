@@ -0,0 +1,137 @@
+"""
+Fenêtre glissante sur le dialogue d'une session : les N derniers tours
+verbatim, plus un résumé extractif des tours plus anciens.
+
+Le résumé est construit au fil de l'eau, au moment où un tour sort de la
+fenêtre : ajouter un tour coûte O(1) amorti, quelle que soit la longueur de
+la session. Il ne garde que ce que le patient a dit (précédé de la question
+quand la réponse seule n'a pas de sens) et reste borné en caractères ; les
+déclarations à risque (suicide, substances, grossesse...) sont évincées en
+dernier. Utilisé par l'agent en direct et par la génération du rapport.
+"""
+
+import os
+import re
+from collections import deque
+
+# ---------------- Configuration ----------------
+DIALOGUE_KEEP_TURNS = int(os.getenv("DIALOGUE_KEEP_TURNS", "40"))
+DIALOGUE_SUMMARY_CHARS = int(os.getenv("DIALOGUE_SUMMARY_CHARS", "4000"))
+# Longueur maximale d'un fait dans le résumé
+FACT_CHARS = 240
+# En dessous, une réponse (« oui », « parfois ») est gardée avec sa question
+SHORT_ANSWER_CHARS = 40
+
+RISK_TERMS = re.compile(
+    r"suicid|kill myself|end my life|self[- ]harm|hurt myself|overdose|"
+    r"alcohol|drink|drug|cannabis|cocaine|pregnan|medication|pills|"
+    r"hallucinat|voices|abuse|violence|"
+    r"me tuer|mourir|automutil|alcool|drogue|enceinte|médicament",
+    re.IGNORECASE,
+)
+
+
+def turn_speaker(turn):
+    if "speaker" in turn:
+        return turn["speaker"]
+    return "AI" if "question" in turn else "Patient"
+
+
+def turn_text(turn):
+    return turn.get("text") or turn.get("question") or turn.get("answer") or ""
+
+
+def _clip(text, limit=FACT_CHARS):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+class DialogueWindow:
+    def __init__(
+        self, *, keep_last=DIALOGUE_KEEP_TURNS, summary_chars=DIALOGUE_SUMMARY_CHARS
+    ):
+        if keep_last < 1:
+            raise ValueError("keep_last must be >= 1")
+        self.keep_last = keep_last
+        self.summary_chars = summary_chars
+        self._recent = deque()
+        # Faits extraits des tours sortis de la fenêtre : [texte, à_risque]
+        self._facts = []
+        self._facts_chars = 0
+        self._last_question = None
+        self._summary = ""
+        self._summary_dirty = False
+        self.turns = 0
+        self.compacted = 0
+        self.dropped_facts = 0
+
+    # ---------------- Ajout des tours ----------------
+    def add(self, speaker, text):
+        """Ajoute un tour ; retourne True si un ancien tour a été résumé."""
+        self.turns += 1
+        self._recent.append({"speaker": speaker, "text": text})
+        if len(self._recent) <= self.keep_last:
+            return False
+        self._fold(self._recent.popleft())
+        return True
+
+    def extend(self, turns):
+        for turn in turns:
+            self.add(turn_speaker(turn), turn_text(turn))
+        return self
+
+    def _fold(self, turn):
+        self.compacted += 1
+        text = turn["text"].strip()
+        if turn["speaker"] != "Patient":
+            self._last_question = text
+            return
+        if not text:
+            return
+        fact = _clip(text)
+        if len(text) < SHORT_ANSWER_CHARS and self._last_question:
+            fact = f"{_clip(self._last_question, FACT_CHARS // 2)} -> {fact}"
+        self._last_question = None
+        self._add_fact(fact, bool(RISK_TERMS.search(text)))
+
+    def _add_fact(self, fact, risky):
+        if self._facts and self._facts[-1][0] == fact:
+            return
+        self._facts.append([fact, risky])
+        self._facts_chars += len(fact) + 3
+        self._summary_dirty = True
+        while self._facts_chars > self.summary_chars and len(self._facts) > 1:
+            # Le plus ancien fait ordinaire part d'abord, sinon le plus ancien tout court
+            index = next((i for i, (_, r) in enumerate(self._facts) if not r), 0)
+            removed, _ = self._facts.pop(index)
+            self._facts_chars -= len(removed) + 3
+            self.dropped_facts += 1
+
+    # ---------------- Lecture ----------------
+    @property
+    def recent(self):
+        return list(self._recent)
+
+    @property
+    def summary(self):
+        """Résumé des tours sortis de la fenêtre (chaîne vide s'il n'y en a pas)."""
+        if self._summary_dirty:
+            self._summary = "\n".join(f"- {fact}" for fact, _ in self._facts)
+            self._summary_dirty = False
+        return self._summary
+
+    def stats(self):
+        return {
+            "turns": self.turns,
+            "recent": len(self._recent),
+            "compacted": self.compacted,
+            "facts": len(self._facts),
+            "dropped_facts": self.dropped_facts,
+            "summary_chars": len(self.summary),
+        }
+
+
+def compact_dialogue(dialogue, **kwargs):
+    """Retourne (résumé, tours récents) pour un dialogue complet."""
+    window = DialogueWindow(**kwargs).extend(dialogue)
+    return window.summary, window.recent
@@ -0,0 +1,130 @@
+"""
+Client HTTP partagé pour le trafic agent -> backend (profil, rapports).
+
+Une seule `aiohttp.ClientSession` par processus worker, avec un pool de
+connexions keep-alive, des limites par hôte, des timeouts configurables et
+des retries avec backoff exponentiel « full jitter ». La session est ouverte
+paresseusement dans la boucle qui l'utilise (prewarm tourne hors boucle).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+
+import aiohttp
+
+logger = logging.getLogger("agent.http")
+
+# ---------------- Configuration ----------------
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+HTTP_KEEPALIVE_S = float(os.getenv("HTTP_KEEPALIVE_S", "60"))
+HTTP_TIMEOUT_S = float(os.getenv("HTTP_TIMEOUT_S", "10"))
+HTTP_CONNECT_TIMEOUT_S = float(os.getenv("HTTP_CONNECT_TIMEOUT_S", "3"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class BackendResponse:
+    __slots__ = ("status", "text")
+
+    def __init__(self, status, text):
+        self.status = status
+        self.text = text
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    def json(self):
+        return json.loads(self.text) if self.text else None
+
+
+class BackendClient:
+    def __init__(
+        self,
+        *,
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_S,
+        timeout=HTTP_TIMEOUT_S,
+        connect_timeout=HTTP_CONNECT_TIMEOUT_S,
+        retries=HTTP_RETRIES,
+        backoff_base=0.1,
+        backoff_max=2.0,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._session = None
+
+    def _open(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            self._session = self._open()
+        return self._session
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def request(self, method, url, *, idempotent=None, retries=None, **kwargs):
+        """
+        Envoie une requête et retourne un BackendResponse (corps déjà lu).
+
+        Les requêtes non idempotentes (POST par défaut) ne sont rejouées que si
+        la connexion n'a jamais pu s'établir, pour ne pas dupliquer d'envoi.
+        """
+        if idempotent is None:
+            idempotent = method.upper() in ("GET", "HEAD", "PUT", "DELETE")
+        retries = self.retries if retries is None else retries
+
+        for attempt in range(retries + 1):
+            last = attempt == retries
+            try:
+                async with self.session.request(method, url, **kwargs) as resp:
+                    result = BackendResponse(resp.status, await resp.text())
+                if idempotent and result.status in RETRY_STATUSES and not last:
+                    logger.warning(
+                        f"⚠️ {method} {url} -> {result.status}, retry {attempt + 1}/{retries}"
+                    )
+                else:
+                    return result
+            except aiohttp.ClientConnectorError as e:
+                if last:
+                    raise
+                logger.warning(
+                    f"⚠️ {method} {url} connexion impossible ({e}), retry {attempt + 1}/{retries}"
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if last or not idempotent:
+                    raise
+                logger.warning(
+                    f"⚠️ {method} {url} a échoué ({e!r}), retry {attempt + 1}/{retries}"
+                )
+            await asyncio.sleep(self.backoff(attempt))
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post_json(self, url, payload, **kwargs):
+        return await self.request("POST", url, json=payload, **kwargs)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
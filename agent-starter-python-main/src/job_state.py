@@ -0,0 +1,134 @@
+"""
+État propre à chaque job (une room), au lieu de `ctx.proc.userdata`.
+
+`proc.userdata` est partagé par tous les jobs d'un même processus worker :
+profil patient, indicateurs de fin d'appel ou de rapport y écrasaient ceux
+de la room voisine. `proc.userdata` ne garde plus que les ressources du
+processus (VAD, client HTTP, outbox) ; chaque job reçoit un JobState à
+slots, ouvert au début de `entrypoint` et fermé à la fin de la room. La
+fermeture vide l'état ; un état fermé qui reste référencé est signalé comme
+fuite.
+
+L'état n'est pas posé comme attribut sur le JobContext, qui appartient à
+LiveKit : il est rangé dans un registre indexé par room (LiveKit n'envoie
+qu'un job par room à un worker), ouvert par `entrypoint` et fermé par le
+callback d'arrêt du JobContext, donc avec exactement la durée de vie du job.
+Le registre borne aussi les états ouverts (AGENT_SESSIONS) et porte la
+détection des fuites.
+"""
+
+import gc
+import logging
+import time
+import weakref
+
+logger = logging.getLogger("agent.jobs")
+
+
+class JobState:
+    __slots__ = (
+        "__weakref__",
+        "closed_at",
+        "end_call",
+        "profile",
+        "profile_wait_ms",
+        "report_generated",
+        "room",
+        "speculator",
+        "transcript",
+    )
+
+    def __init__(self, room):
+        self.room = room
+        self.profile = {}
+        self.profile_wait_ms = 0.0
+        self.end_call = False
+        self.report_generated = False
+        self.transcript = None
+        self.speculator = None
+        self.closed_at = None
+
+    @property
+    def closed(self):
+        return self.closed_at is not None
+
+    @property
+    def patient_id(self):
+        return self.profile.get("id", "unknown")
+
+    def clear(self, now):
+        self.closed_at = now
+        self.profile = {}
+        self.transcript = None
+        self.speculator = None
+
+    def __repr__(self):
+        return f"JobState(room={self.room!r}, closed={self.closed})"
+
+
+class JobRegistry:
+    """
+    Jobs ouverts du processus. `live` est le stockage des états ouverts
+    (par défaut un dict ; AGENT_SESSIONS dans l'agent).
+    """
+
+    def __init__(self, live=None, *, clock=time.monotonic):
+        self._live = {} if live is None else live
+        self._clock = clock
+        # États fermés encore vivants : doivent disparaître au prochain GC
+        self._released = weakref.WeakSet()
+        self._last_check = None
+        self.opened = 0
+        self.closed = 0
+
+    def open(self, room):
+        previous = self._live.get(room)
+        if previous is not None:
+            # Job relancé pour la même room sans fermeture du précédent
+            logger.warning(f"⚠️ État de {room} déjà ouvert, fermé avant réouverture")
+            self.close(room)
+        state = JobState(room)
+        self._live[room] = state
+        self.opened += 1
+        return state
+
+    def get(self, room):
+        return self._live.get(room)
+
+    def close(self, room):
+        """Retire et vide l'état de la room (idempotent) ; retourne l'état fermé ou None."""
+        state = self._live.pop(room, None)
+        if state is None:
+            return None
+        state.clear(self._clock())
+        self._released.add(state)
+        self.closed += 1
+        return state
+
+    def leaks(self, older_than=0.0):
+        """
+        Rooms fermées depuis plus de `older_than` secondes dont l'état est
+        encore référencé après un GC complet. Le GC (coûteux, il bloque la
+        boucle) n'est lancé que s'il reste de tels états.
+        """
+        limit = self._clock() - older_than
+        if not any(state.closed_at <= limit for state in self._released):
+            return []
+        gc.collect()
+        return sorted(
+            state.room for state in self._released if state.closed_at <= limit
+        )
+
+    def check(self, older_than):
+        """`leaks(older_than)` au plus une fois toutes les `older_than` secondes."""
+        now = self._clock()
+        if self._last_check is not None and now - self._last_check < older_than:
+            return []
+        self._last_check = now
+        return self.leaks(older_than)
+
+    def __len__(self):
+        return len(self._live)
+
+    def summary(self):
+        return {"open": len(self._live), "opened": self.opened, "closed": self.closed}
@@ -0,0 +1,93 @@
+"""
+Registre des modèles lourds (VAD Silero, assets de plugins) par processus.
+
+Chaque asset est chargé une seule fois par processus worker, typiquement
+dans `prewarm`, puis partagé par tous les jobs. Le chargement est protégé
+par un verrou (prewarm et threads d'arrière-plan) et on mesure pour chaque entrée
+la durée de chargement et la mémoire résidente ajoutée.
+"""
+
+import logging
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil vient avec livekit-agents
+    psutil = None
+
+logger = logging.getLogger("agent.models")
+
+
+def rss_mb():
+    """Mémoire résidente du processus courant, en Mo."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    import resource
+
+    # ru_maxrss est un pic (ko sous Linux), faute de mieux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._models = {}
+        self._stats = {}
+        # Chargements (lents) et compteurs séparés : un hit n'attend pas le chargement d'un autre modèle
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def _hit(self, name):
+        with self._stats_lock:
+            self._stats[name]["hits"] += 1
+
+    def load(self, name, loader):
+        """Retourne le modèle `name`, en appelant `loader()` au premier accès."""
+        model = self._models.get(name)
+        if model is not None:
+            self._hit(name)
+            return model
+
+        with self._lock:
+            model = self._models.get(name)
+            if model is not None:
+                self._hit(name)
+                return model
+
+            rss_before = rss_mb()
+            start = time.perf_counter()
+            model = loader()
+            load_s = time.perf_counter() - start
+            with self._stats_lock:
+                self._stats[name] = {
+                    "load_s": round(load_s, 4),
+                    "rss_delta_mb": round(rss_mb() - rss_before, 1),
+                    "hits": 0,
+                }
+            # Publié après ses stats : le chemin rapide les trouve toujours
+            self._models[name] = model
+
+        logger.info(
+            f"📦 Model '{name}' loaded in {load_s * 1000:.0f} ms "
+            f"(+{self._stats[name]['rss_delta_mb']} MB, rss={rss_mb():.0f} MB)"
+        )
+        return model
+
+    def get(self, name):
+        return self._models[name]
+
+    def __contains__(self, name):
+        return name in self._models
+
+    def stats(self):
+        with self._stats_lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def clear(self):
+        with self._lock, self._stats_lock:
+            self._models.clear()
+            self._stats.clear()
+
+
+# Un registre par processus worker
+MODELS = ModelRegistry()
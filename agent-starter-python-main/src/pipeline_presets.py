@@ -0,0 +1,79 @@
+"""
+Préréglages nommés du pipeline vocal (STT -> LLM -> TTS).
+
+Un préréglage regroupe les options des plugins et de l'AgentSession qui
+jouent sur la latence : détection de fin d'énoncé (endpointing Deepgram,
+délais de fin de tour de la session), génération anticipée, longueur et
+« réflexion » des réponses du LLM. Seules les options qui s'écartent des
+valeurs par défaut des plugins y figurent (Deepgram : résultats
+intermédiaires, no_delay et endpointing à 25 ms ; session : fin de tour
+entre 0,5 et 3 s). `balanced`
+reproduit la configuration historique ; `low_latency` répond plus tôt au
+prix de quelques coupures sur les pauses longues ; `patient` laisse plus de
+temps aux patients qui cherchent leurs mots.
+"""
+
+import os
+
+# ---------------- Configuration ----------------
+PIPELINE_PRESET = os.getenv("PIPELINE_PRESET", "balanced")
+
+_STT = {"model": "nova-3", "language": "multi"}
+_LLM = {"model": "gemini-2.5-flash", "temperature": 0.7}
+_TTS = {"model": "simba-english", "voice_id": "jack"}
+
+PIPELINE_PRESETS = {
+    "balanced": {
+        "stt": {**_STT},
+        "llm": {**_LLM, "max_output_tokens": 500},
+        "tts": {**_TTS},
+        "session": {"use_tts_aligned_transcript": True},
+    },
+    "low_latency": {
+        "stt": {**_STT},
+        # Réponses courtes et sans phase de réflexion : premier token plus tôt
+        "llm": {**_LLM, "max_output_tokens": 300, "thinking_budget": 0},
+        "tts": {**_TTS},
+        "session": {
+            "use_tts_aligned_transcript": True,
+            "preemptive_generation": True,
+            "min_endpointing_delay": 0.3,
+        },
+    },
+    "patient": {
+        "stt": {**_STT, "endpointing_ms": 300},
+        "llm": {**_LLM, "max_output_tokens": 500},
+        "tts": {**_TTS},
+        "session": {
+            "use_tts_aligned_transcript": True,
+            "min_endpointing_delay": 0.8,
+            "max_endpointing_delay": 6.0,
+        },
+    },
+}
+
+
+def get_preset(name=PIPELINE_PRESET):
+    try:
+        return PIPELINE_PRESETS[name]
+    except KeyError:
+        raise ValueError(
+            f"unknown pipeline preset {name!r}, expected one of {sorted(PIPELINE_PRESETS)}"
+        ) from None
+
+
+def voice_key(preset):
+    """Identifie la voix du préréglage : l'audio mis en cache n'est valable que pour elle."""
+    tts = preset["tts"]
+    return f"{tts['model']}:{tts['voice_id']}"
+
+
+def llm_options(preset):
+    """Options de google.LLM ; `thinking_budget` devient un ThinkingConfig."""
+    options = dict(preset["llm"])
+    budget = options.pop("thinking_budget", None)
+    if budget is not None:
+        from google.genai import types
+
+        options["thinking_config"] = types.ThinkingConfig(thinking_budget=budget)
+    return options
@@ -0,0 +1,110 @@
+"""
+Construction des prompts de l'agent (instructions LiveKit, rapport Gemini).
+
+Les parties statiques (consignes, schéma JSON du rapport) sont assemblées
+une seule fois à l'import. Seuls le profil et le dialogue sont sérialisés à
+chaque appel, en JSON compact : l'indentation de `json.dumps(..., indent=2)`
+coûte des tokens, donc du temps et de l'argent, sur les longues sessions.
+"""
+
+import json
+
+_COMPACT = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=list)
+
+_REPORT_HEAD = (
+    "You are Dr. Mira, a compassionate psychologist. "
+    "Based on the following patient profile and dialogue, generate a complete session report in JSON "
+    "with the exact following structure:\n\n"
+    "{\n"
+    '  "session_id": "<session_id>",\n'
+    '  "patient_id": "<patient_id>",\n'
+    '  "overview": {\n'
+    '    "name": "<full name>",\n'
+    '    "age": <age>,\n'
+    '    "gender": "<gender>",\n'
+    '    "occupation": "<occupation>",\n'
+    '    "education_level": "<education level>",\n'
+    '    "marital_status": "<marital status>",\n'
+    '    "session_info": "Session <session_id> - Consultation",\n'
+    '    "initial_diagnosis": "<diagnosis>",\n'
+    '    "scores": [\n'
+    '      {"tool": "<tool>", "intake": <intake>, "current": <current>}\n'
+    "    ]\n"
+    "  },\n"
+    '  "narrative": {\n'
+    '    "description": "<short description>",\n'
+    '    "symptoms_observed": ["<symptom1>", "<symptom2>"] ,\n'
+    '    "physical_markers": ["<marker1>", "<marker2>"] ,\n'
+    '    "behavioral_markers": ["<behavior1>", "<behavior2>"]\n'
+    "  },\n"
+    '  "risk_indicators": {\n'
+    '    "suicidal_ideation": "<value>",\n'
+    '    "substance_use": "<value>",\n'
+    '    "pregnancy": "<value>",\n'
+    '    "family_history": "<value>",\n'
+    '    "other_risks": ["<risk1>", "<risk2>"]\n'
+    "  },\n"
+    '  "clinical_inference": {\n'
+    '    "primary_diagnosis": "<primary diagnosis>",\n'
+    '    "differential_diagnoses": ["<diagnosis1>", "<diagnosis2>"] ,\n'
+    '    "recommendations": ["<recommendation1>", "<recommendation2>"]\n'
+    "  },\n"
+    '  "dialogue": <dialogue>,\n'
+    '  "doctor_notes": "<doctor notes>",\n'
+    '  "notified_to_doctor": true\n'
+    "}\n\n"
+    "Patient profile: "
+)
+_REPORT_TAIL = "\n\nReturn only the JSON object without any extra text."
+
+_INSTRUCTIONS_HEAD = (
+    "You are Dr. Mira, a compassionate psychologist conducting a short interview. "
+    "You will ask 3-6 short, empathetic questions to understand the patient's mental state. "
+    "Keep questions simple and supportive. "
+    "Patient profile:\n"
+)
+_INSTRUCTIONS_TAIL = (
+    "\nAt the end of the conversation, summarize what the patient has shared in a concise way. "
+    "Do NOT generate a diagnostic report automatically. "
+    "The AI should only send '[SESSION_END]' after the patient confirms that everything is fine."
+)
+
+
+def dumps(obj):
+    """JSON compact, non échappé (les accents restent un caractère)."""
+    return _COMPACT.encode(obj)
+
+
+def estimate_tokens(text):
+    """Estimation grossière (~4 caractères par token), sans appel au modèle."""
+    return (len(text) + 3) // 4
+
+
+def build_report_prompt(profile, dialogue, session_id, summary=""):
+    """`summary` résume les tours plus anciens que `dialogue` (voir dialogue_window)."""
+    return "".join(
+        (
+            _REPORT_HEAD,
+            dumps(profile),
+            f"\nEarlier in the session (summary of what the patient said):\n{summary}"
+            if summary
+            else "",
+            "\nDialogue (most recent turns): " if summary else "\nDialogue: ",
+            dumps(dialogue),
+            "\nSession ID: ",
+            str(session_id),
+            _REPORT_TAIL,
+        )
+    )
+
+
+def build_instructions(profile, summary=""):
+    if summary:
+        return (
+            _INSTRUCTIONS_HEAD
+            + dumps(profile)
+            + "\nWhat the patient said earlier in this session (older turns are no longer in the chat):\n"
+            + summary
+            + _INSTRUCTIONS_TAIL
+        )
+    return _INSTRUCTIONS_HEAD + dumps(profile) + _INSTRUCTIONS_TAIL
@@ -0,0 +1,181 @@
+"""
+Génération de rapports en lot, hors room LiveKit (rattrapage après panne).
+
+Lit un JSONL de {profile, dialogue, session_id}, génère les rapports en
+parallèle sous une limite de débit, et écrit chaque résultat dès qu'il est
+prêt dans un fichier JSONL ou dans l'outbox du backend. Chaque session
+terminée est ajoutée à un fichier de checkpoint : une exécution interrompue
+reprend là où elle s'est arrêtée.
+
+    uv run python src/agent.py batch sessions.jsonl --output reports.jsonl
+    uv run python src/agent.py batch sessions.jsonl --backend --rate 2
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+logger = logging.getLogger("agent.batch")
+
+
+class RateLimiter:
+    """Seau à jetons : `rate` démarrages par seconde, rafale de `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not record.get("session_id"):
+                raise ValueError(f"{path}:{line_no}: missing session_id")
+            yield record
+
+
+def load_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {line.strip() for line in f if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+
+class JsonlSink:
+    def __init__(self, path):
+        # Ouvert pour tout le lot, fermé par close()
+        self._file = open(path, "a", encoding="utf-8")  # noqa: SIM115
+
+    async def __call__(self, report):
+        self._file.write(json.dumps(report, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    async def close(self):
+        self._file.close()
+
+
+class OutboxSink:
+    def __init__(self, outbox, flush_timeout=None):
+        self._outbox = outbox
+        self.flush_timeout = flush_timeout
+
+    async def __call__(self, report):
+        await self._outbox.put(report, status="finalized")
+
+    async def close(self):
+        if not await self._outbox.flush(timeout=self.flush_timeout):
+            logger.warning(
+                f"⚠️ Outbox non vidée en fin de lot: {self._outbox.metrics()}"
+            )
+        await self._outbox.stop()
+
+
+async def run_batch(records, generate, sink, *, checkpoint, concurrency=4, rate=0.0):
+    """
+    Génère un rapport par enregistrement non encore checkpointé.
+    `generate(profile, dialogue, session_id)` retourne le rapport ({} si échec).
+    """
+    done = load_checkpoint(checkpoint)
+    limiter = RateLimiter(rate, burst=max(1, concurrency))
+    stats = {"generated": 0, "skipped": 0, "failed": 0}
+    pending = iter(records)
+    start = time.perf_counter()
+
+    with open(checkpoint, "a", encoding="utf-8") as ckpt:
+
+        async def worker():
+            for record in pending:
+                session_id = str(record["session_id"])
+                if session_id in done:
+                    stats["skipped"] += 1
+                    continue
+                done.add(session_id)
+                await limiter.acquire()
+                profile = record.get("profile") or {}
+                try:
+                    report = await generate(
+                        profile, record.get("dialogue") or [], session_id
+                    )
+                except Exception as e:
+                    logger.error(f"❌ Rapport {session_id} en échec: {e!r}")
+                    report = None
+                if not report:
+                    # Pas de checkpoint : la session sera retentée au prochain lancement
+                    stats["failed"] += 1
+                    continue
+                report["session_id"] = session_id
+                report["patient_id"] = profile.get("id", "unknown")
+                await sink(report)
+                ckpt.write(session_id + "\n")
+                ckpt.flush()
+                stats["generated"] += 1
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    await sink.close()
+    elapsed = time.perf_counter() - start
+    stats["elapsed_s"] = round(elapsed, 3)
+    stats["reports_per_s"] = round(stats["generated"] / elapsed, 2) if elapsed else 0.0
+    return stats
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="agent.py batch", description="Batch report generation"
+    )
+    parser.add_argument("input", help="JSONL de {profile, dialogue, session_id}")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--output", help="fichier JSONL de sortie (ajout)")
+    target.add_argument(
+        "--backend", action="store_true", help="envoyer au backend via l'outbox"
+    )
+    parser.add_argument(
+        "--checkpoint", help="fichier des sessions terminées (défaut: <input>.done)"
+    )
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--rate", type=float, default=1.0, help="démarrages par seconde (0 = illimité)"
+    )
+    args = parser.parse_args(argv)
+    args.checkpoint = args.checkpoint or f"{args.input}.done"
+    return args
+
+
+async def main(argv, generate, make_outbox=None):
+    """Point d'entrée de `agent.py batch` ; `make_outbox()` crée l'outbox du backend."""
+    args = parse_args(argv)
+    sink = OutboxSink(make_outbox()) if args.backend else JsonlSink(args.output)
+    stats = await run_batch(
+        read_records(args.input),
+        generate,
+        sink,
+        checkpoint=args.checkpoint,
+        concurrency=args.concurrency,
+        rate=args.rate,
+    )
+    logger.info(f"📦 Lot terminé: {stats}")
+    return stats
@@ -0,0 +1,95 @@
+"""
+Déduplication des demandes de rapport et cache des rapports terminés.
+
+Un double-clic ou une reconnexion du frontend renvoie `GENERATE_REPORT` pour
+la même session : la seconde demande attend la génération déjà en cours
+(single-flight par `session_id`) au lieu de relancer Gemini. Les rapports
+terminés sont gardés dans un SessionStore borné, indexés par un hash du
+profil et du dialogue ; une demande identique est servie immédiatement.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import os
+
+from session_store import SessionStore
+
+# ---------------- Configuration ----------------
+REPORT_CACHE_MAX = int(os.getenv("REPORT_CACHE_MAX", "256"))
+REPORT_CACHE_TTL_S = float(os.getenv("REPORT_CACHE_TTL_S", "3600"))
+
+
+def content_key(profile, dialogue):
+    """Hash stable du profil et du dialogue (ordre des clés indifférent)."""
+    blob = json.dumps(
+        [profile, dialogue],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=list,
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    def __init__(
+        self, *, max_size=REPORT_CACHE_MAX, ttl=REPORT_CACHE_TTL_S, clock=None
+    ):
+        kwargs = {"clock": clock} if clock is not None else {}
+        self._results = SessionStore(max_size=max_size, ttl=ttl, **kwargs)
+        # session_id -> (clé de contenu, tâche de génération)
+        self._inflight = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.generated = 0
+
+    async def get_or_generate(self, session_id, profile, dialogue, generate):
+        """
+        Retourne le rapport pour ce contenu : depuis le cache, en rejoignant une
+        génération en cours pour la même session, ou en appelant `generate()`.
+        Chaque appelant reçoit sa propre copie.
+        """
+        self.requests += 1
+        key = content_key(profile, dialogue)
+
+        cached = self._results.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        inflight = self._inflight.get(session_id)
+        if inflight is not None and inflight[0] == key:
+            self.coalesced += 1
+            # shield : l'annulation d'un suiveur n'interrompt pas la génération
+            return copy.deepcopy(await asyncio.shield(inflight[1]))
+
+        # Contenu différent (dialogue plus long) : nouvelle génération
+        self.generated += 1
+        task = asyncio.ensure_future(generate())
+        self._inflight[session_id] = (key, task)
+        try:
+            report = await task
+        finally:
+            if self._inflight.get(session_id, (None, None))[1] is task:
+                del self._inflight[session_id]
+
+        if report:
+            self._results[key] = report
+        return copy.deepcopy(report)
+
+    def in_flight(self):
+        return len(self._inflight)
+
+    def metrics(self):
+        store = self._results.metrics()
+        served = store["hits"] + self.coalesced
+        return {
+            "requests": self.requests,
+            "cache_hits": store["hits"],
+            "coalesced": self.coalesced,
+            "generated": self.generated,
+            "hit_rate": round(served / self.requests, 4) if self.requests else 0.0,
+            "size": store["size"],
+            "evictions": store["evictions"],
+        }
@@ -0,0 +1,234 @@
+"""
+Moteur asynchrone de génération de rapports Gemini.
+
+L'appel au modèle ne doit jamais bloquer la boucle d'événements du worker :
+pendant un appel synchrone, l'audio STT/TTS/VAD de toutes les rooms du
+processus est gelé. Le moteur utilise le client natif `client.aio` quand il
+existe, sinon un ThreadPoolExecutor borné, avec une limite de concurrence,
+un timeout par appel et l'annulation des tâches à la fermeture de la room.
+`stream()` rend la réponse morceau par morceau pour les brouillons de rapport.
+Les générations spéculatives (report_speculation) passent par `speculation()` :
+elles ont leur propre limite, plus petite, et sont sautées plutôt que mises en
+file quand elle est atteinte, pour laisser des places aux rapports demandés.
+Le client peut être remplacé par une fonction qui le crée au premier appel
+(import de google.genai différé au premier rapport).
+"""
+
+import asyncio
+import contextlib
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("agent.reports")
+
+# ---------------- Configuration ----------------
+REPORT_MODEL = os.getenv("REPORT_MODEL", "gemini-2.5-flash")
+REPORT_MAX_CONCURRENCY = int(os.getenv("REPORT_MAX_CONCURRENCY", "4"))
+REPORT_TIMEOUT_S = float(os.getenv("REPORT_TIMEOUT_S", "90"))
+# Générations spéculatives simultanées, toujours < REPORT_MAX_CONCURRENCY
+REPORT_SPECULATE_MAX_CONCURRENCY = int(
+    os.getenv("REPORT_SPECULATE_MAX_CONCURRENCY", "1")
+)
+
+
+class ReportTimeoutError(Exception):
+    """Le modèle n'a pas répondu dans le délai imparti."""
+
+
+class ReportEngine:
+    def __init__(
+        self,
+        client,
+        *,
+        model=REPORT_MODEL,
+        max_concurrency=REPORT_MAX_CONCURRENCY,
+        timeout=REPORT_TIMEOUT_S,
+        max_speculative=REPORT_SPECULATE_MAX_CONCURRENCY,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        self._client = client
+        self.model = model
+        self.max_concurrency = max_concurrency
+        # Au moins une place reste toujours aux rapports demandés
+        self.max_speculative = max(0, min(max_speculative, max_concurrency - 1))
+        self.timeout = timeout
+        # Le sémaphore est créé dans la boucle qui l'utilise (prewarm tourne hors boucle)
+        self._semaphore = None
+        self._executor = None
+        self._room_tasks = {}
+        self.in_flight = 0
+        self.speculating = 0
+        self.speculations_skipped = 0
+
+    # ---------------- Appels au modèle ----------------
+    def _get_client(self):
+        if callable(self._client) and not hasattr(self._client, "models"):
+            self._client = self._client()
+        return self._client
+
+    def _get_semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="report-engine"
+            )
+        return self._executor
+
+    async def _call_model(self, prompt, config=None):
+        kwargs = {"model": self.model, "contents": prompt}
+        if config is not None:
+            kwargs["config"] = config
+
+        aio = getattr(self._get_client(), "aio", None)
+        if aio is not None:
+            return await aio.models.generate_content(**kwargs)
+
+        # Fallback : client synchrone uniquement, exécuté hors de la boucle.
+        # Le thread ne peut pas être interrompu, mais la coroutine rend la main.
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self._get_client().models.generate_content, **kwargs)
+        return await loop.run_in_executor(self._get_executor(), call)
+
+    async def generate(self, prompt, *, config=None, timeout=None):
+        """Retourne le texte brut produit par le modèle pour `prompt`."""
+        timeout = self.timeout if timeout is None else timeout
+        async with self._get_semaphore():
+            self.in_flight += 1
+            try:
+                response = await asyncio.wait_for(
+                    self._call_model(prompt, config), timeout
+                )
+            except asyncio.TimeoutError as e:
+                raise ReportTimeoutError(
+                    f"no response from {self.model} after {timeout}s"
+                ) from e
+            finally:
+                self.in_flight -= 1
+
+        return getattr(response, "text", None) or str(response)
+
+    async def _stream_model(self, prompt, config=None):
+        kwargs = {"model": self.model, "contents": prompt}
+        if config is not None:
+            kwargs["config"] = config
+
+        aio = getattr(self._get_client(), "aio", None)
+        if aio is not None:
+            async for chunk in await aio.models.generate_content_stream(**kwargs):
+                yield chunk
+            return
+
+        # Fallback : l'itérateur synchrone tourne dans l'executor et pousse
+        # chaque morceau dans une file lue par la boucle
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+
+        def _pump():
+            try:
+                for chunk in self._get_client().models.generate_content_stream(
+                    **kwargs
+                ):
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+            except BaseException as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            else:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        loop.run_in_executor(self._get_executor(), _pump)
+        while True:
+            item = await queue.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    async def stream(self, prompt, *, config=None, timeout=None):
+        """
+        Rend le texte du modèle morceau par morceau. `timeout` borne la durée
+        totale du flux, comme pour `generate`.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        async with self._get_semaphore():
+            self.in_flight += 1
+            chunks = self._stream_model(prompt, config)
+            deadline = asyncio.get_running_loop().time() + timeout
+            try:
+                while True:
+                    remaining = deadline - asyncio.get_running_loop().time()
+                    try:
+                        chunk = await asyncio.wait_for(
+                            chunks.__anext__(), max(remaining, 0)
+                        )
+                    except StopAsyncIteration:
+                        return
+                    except asyncio.TimeoutError as e:
+                        raise ReportTimeoutError(
+                            f"stream from {self.model} incomplete after {timeout}s"
+                        ) from e
+                    text = getattr(chunk, "text", None)
+                    if text:
+                        yield text
+            finally:
+                self.in_flight -= 1
+                await chunks.aclose()
+
+    @contextlib.contextmanager
+    def speculation(self):
+        """
+        Place pour une génération spéculative : rend True si elle est prise,
+        False si les `max_speculative` places sont occupées (la préparation
+        est alors sautée, le rapport final sera généré normalement).
+        """
+        if self.speculating >= self.max_speculative:
+            self.speculations_skipped += 1
+            yield False
+            return
+        self.speculating += 1
+        try:
+            yield True
+        finally:
+            self.speculating -= 1
+
+    # ---------------- Tâches liées à une room ----------------
+    def run_for_room(self, room_name, coro):
+        """Lance `coro` en tâche de fond, annulée à la fermeture de la room."""
+        task = asyncio.get_running_loop().create_task(coro)
+        tasks = self._room_tasks.setdefault(room_name, set())
+        tasks.add(task)
+
+        def _done(t):
+            tasks.discard(t)
+            if not tasks and self._room_tasks.get(room_name) is tasks:
+                del self._room_tasks[room_name]
+
+        task.add_done_callback(_done)
+        return task
+
+    def pending(self, room_name=None):
+        if room_name is not None:
+            return len(self._room_tasks.get(room_name, ()))
+        return sum(len(tasks) for tasks in self._room_tasks.values())
+
+    async def cancel_room(self, room_name):
+        tasks = list(self._room_tasks.pop(room_name, ()))
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.info(
+                f"🛑 {len(tasks)} report task(s) cancelled for room {room_name}"
+            )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
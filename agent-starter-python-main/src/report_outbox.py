@@ -0,0 +1,260 @@
+"""
+Outbox SQLite pour la livraison des rapports au backend.
+
+Un rapport généré est d'abord écrit sur disque, puis envoyé par une tâche de
+fond : un échec du backend ne perd plus le rapport, et un redémarrage du
+worker reprend les envois en attente. Une seule ligne par `session_id` : un
+nouveau brouillon remplace le précédent, le rapport final remplace le
+brouillon, un brouillon tardif ne remplace jamais le final. Les lignes sont
+réservées par lot avec un bail, pour que plusieurs processus partageant le
+fichier n'envoient pas deux fois la même chose.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from telemetry import TELEMETRY
+
+logger = logging.getLogger("agent.outbox")
+
+# ---------------- Configuration ----------------
+REPORT_OUTBOX_PATH = os.getenv("REPORT_OUTBOX_PATH", "report_outbox.sqlite3")
+REPORT_OUTBOX_BATCH = int(os.getenv("REPORT_OUTBOX_BATCH", "16"))
+REPORT_OUTBOX_MAX_ATTEMPTS = int(os.getenv("REPORT_OUTBOX_MAX_ATTEMPTS", "20"))
+# Durée pendant laquelle une ligne réservée n'est pas reprise par un autre envoi
+REPORT_OUTBOX_LEASE_S = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    session_id   TEXT PRIMARY KEY,
+    status       TEXT NOT NULL,
+    payload      TEXT NOT NULL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    dead         INTEGER NOT NULL DEFAULT 0,
+    last_error   TEXT
+)
+"""
+_UPSERT = """
+INSERT INTO outbox (session_id, status, payload, next_attempt)
+VALUES (?, ?, ?, ?)
+ON CONFLICT(session_id) DO UPDATE SET
+    status = excluded.status,
+    payload = excluded.payload,
+    attempts = 0,
+    next_attempt = excluded.next_attempt,
+    dead = 0,
+    last_error = NULL
+WHERE excluded.status != 'draft' OR outbox.status = 'draft'
+"""
+
+
+class ReportOutbox:
+    def __init__(
+        self,
+        backend,
+        url,
+        *,
+        path=REPORT_OUTBOX_PATH,
+        batch_size=REPORT_OUTBOX_BATCH,
+        max_attempts=REPORT_OUTBOX_MAX_ATTEMPTS,
+        lease=REPORT_OUTBOX_LEASE_S,
+        backoff_base=0.5,
+        backoff_max=60.0,
+        clock=time.time,
+    ):
+        self._backend = backend
+        self.url = url
+        self.path = path
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._clock = clock
+        # Connexion partagée entre les threads de asyncio.to_thread, sérialisée par le verrou
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute(_SCHEMA)
+        self._wakeup = None
+        self._task = None
+        self.delivered = 0
+        self.failed = 0
+        # Compteurs pour metrics(), relus après chaque écriture (déjà hors de la boucle)
+        self._pending = self._dead = 0
+        with self._lock:
+            self._recount()
+
+    # ---------------- Stockage ----------------
+    def _recount(self):
+        """Appelé verrou tenu, depuis les threads de asyncio.to_thread."""
+        self._pending, self._dead = self._db.execute(
+            "SELECT COUNT(*) - COALESCE(SUM(dead), 0), COALESCE(SUM(dead), 0) FROM outbox"
+        ).fetchone()
+
+    def _put(self, session_id, status, payload):
+        with self._lock:
+            self._db.execute(_UPSERT, (session_id, status, payload, self._clock()))
+            self._recount()
+
+    def _claim(self):
+        now = self._clock()
+        with self._lock, self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            rows = self._db.execute(
+                "SELECT session_id, status, payload, attempts FROM outbox "
+                "WHERE dead = 0 AND next_attempt <= ? ORDER BY next_attempt LIMIT ?",
+                (now, self.batch_size),
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE outbox SET next_attempt = ? WHERE session_id = ?",
+                [(now + self.lease, row[0]) for row in rows],
+            )
+        return rows
+
+    def _ack(self, session_id, payload):
+        # Un envoi plus récent a pu remplacer la ligne pendant la livraison
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM outbox WHERE session_id = ? AND payload = ?",
+                (session_id, payload),
+            )
+            self._recount()
+
+    def _nack(self, session_id, payload, attempts, error):
+        dead = attempts >= self.max_attempts
+        delay = random.uniform(
+            0, min(self.backoff_max, self.backoff_base * 2**attempts)
+        )
+        with self._lock:
+            self._db.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt = ?, dead = ?, last_error = ? "
+                "WHERE session_id = ? AND payload = ?",
+                (
+                    attempts,
+                    self._clock() + delay,
+                    int(dead),
+                    error,
+                    session_id,
+                    payload,
+                ),
+            )
+            self._recount()
+        return dead
+
+    def _scalar(self, query, *params):
+        with self._lock:
+            return self._db.execute(query, params).fetchone()[0]
+
+    def _next_due(self):
+        return self._scalar("SELECT MIN(next_attempt) FROM outbox WHERE dead = 0")
+
+    def pending(self):
+        return self._scalar("SELECT COUNT(*) FROM outbox WHERE dead = 0")
+
+    def dead(self):
+        return self._scalar("SELECT COUNT(*) FROM outbox WHERE dead = 1")
+
+    # ---------------- API ----------------
+    async def put(self, report, *, status="finalized"):
+        """Enregistre le rapport sur disque ; l'envoi se fait en arrière-plan."""
+        session_id = str(report.get("session_id") or "")
+        if not session_id:
+            raise ValueError("report has no session_id")
+        payload = json.dumps({**report, "status": status}, ensure_ascii=False)
+        await asyncio.to_thread(self._put, session_id, status, payload)
+        self.start()
+        self._wakeup.set()
+
+    async def _deliver(self, session_id, status, payload, attempts):
+        try:
+            with TELEMETRY.span("report_delivery"):
+                resp = await self._backend.post_json(
+                    self.url, json.loads(payload), retries=0
+                )
+            error = None if resp.ok else f"HTTP {resp.status}: {resp.text[:200]}"
+        except Exception as e:
+            error = repr(e)
+
+        if error is None:
+            await asyncio.to_thread(self._ack, session_id, payload)
+            self.delivered += 1
+            return
+        self.failed += 1
+        if await asyncio.to_thread(
+            self._nack, session_id, payload, attempts + 1, error
+        ):
+            logger.error(
+                f"❌ Rapport {session_id} ({status}) abandonné après {attempts + 1} essais: {error}"
+            )
+        else:
+            logger.warning(
+                f"⚠️ Envoi du rapport {session_id} ({status}) échoué, nouvel essai: {error}"
+            )
+
+    async def send_due(self):
+        """Envoie un lot de lignes dues ; retourne le nombre de lignes traitées."""
+        rows = await asyncio.to_thread(self._claim)
+        if rows:
+            await asyncio.gather(*(self._deliver(*row) for row in rows))
+        return len(rows)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            if await self.send_due() == self.batch_size:
+                continue
+            next_due = await asyncio.to_thread(self._next_due)
+            timeout = None if next_due is None else max(0.0, next_due - self._clock())
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+
+    def start(self):
+        """Démarre l'envoi en arrière-plan dans la boucle courante (idempotent)."""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            self._task.add_done_callback(self._on_done)
+        return self._task
+
+    def _on_done(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"❌ Envoi de l'outbox arrêté: {task.exception()!r}")
+
+    async def flush(self, timeout=None):
+        """Attend que les lignes dues soient livrées (ou abandonnées) ; True si tout est parti."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while await asyncio.to_thread(self.pending):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            if not await self.send_due():
+                await asyncio.sleep(0.05)
+        return True
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def metrics(self):
+        """Sans requête SQLite : appelable depuis la boucle (/metrics, logs de fermeture)."""
+        return {
+            "pending": self._pending,
+            "dead": self._dead,
+            "delivered": self.delivered,
+            "failed": self.failed,
+        }
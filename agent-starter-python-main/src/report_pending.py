@@ -0,0 +1,93 @@
+"""
+Demandes de rapport abandonnées à l'arrêt d'un worker, gardées sur disque.
+
+Une demande encore en cours à l'échéance de la vidange (voir
+task_supervisor) est ajoutée à REPORT_PENDING_PATH, un JSONL au format de
+`agent.py batch` ({session_id, profile, dialogue, ...}). Le premier job du
+worker suivant réclame le fichier (renommage atomique : un seul processus
+le reprend) et régénère ces rapports ; à défaut, `agent.py batch
+reports_pending.jsonl --backend` les rattrape. Une reprise qui échoue remet
+la demande dans le fichier (`retry`), au plus REPORT_PENDING_MAX_ATTEMPTS fois.
+"""
+
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger("agent.reports")
+
+# ---------------- Configuration ----------------
+REPORT_PENDING_PATH = os.getenv("REPORT_PENDING_PATH", "reports_pending.jsonl")
+REPORT_PENDING_MAX_ATTEMPTS = int(os.getenv("REPORT_PENDING_MAX_ATTEMPTS", "3"))
+
+
+class PendingReports:
+    def __init__(
+        self, path=REPORT_PENDING_PATH, *, max_attempts=REPORT_PENDING_MAX_ATTEMPTS
+    ):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.saved = 0
+        self.resumed = 0
+        self.retried = 0
+        self.dropped = 0
+
+    def put(self, record):
+        """Ajoute une demande ; synchrone et fsync : appelé pendant l'arrêt."""
+        line = json.dumps(
+            {**record, "abandoned_at": time.time()}, ensure_ascii=False, default=list
+        )
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.saved += 1
+        logger.warning(
+            f"💾 Demande de rapport {record.get('session_id')} sauvegardée dans {self.path}"
+        )
+
+    def retry(self, record):
+        """
+        Remet une demande dont la reprise a échoué (Gemini, rapport vide) ;
+        abandonnée après `max_attempts` reprises. Retourne True si remise.
+        """
+        attempts = record.get("attempts", 0) + 1
+        if attempts >= self.max_attempts:
+            self.dropped += 1
+            logger.error(
+                f"❌ Demande de rapport {record.get('session_id')} abandonnée après {attempts} reprises"
+            )
+            return False
+        self.put({**record, "attempts": attempts})
+        self.retried += 1
+        return True
+
+    def claim(self):
+        """Retire le fichier et retourne ses demandes ([] s'il n'y en a pas)."""
+        claimed = f"{self.path}.{os.getpid()}.claimed"
+        try:
+            os.replace(self.path, claimed)
+        except FileNotFoundError:
+            return []
+        records = []
+        try:
+            with open(claimed, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # Ligne tronquée par un arrêt brutal
+                        logger.warning(f"⚠️ Ligne illisible ignorée dans {self.path}")
+        finally:
+            os.remove(claimed)
+        self.resumed += len(records)
+        return records
+
+    def metrics(self):
+        return {
+            "saved": self.saved,
+            "resumed": self.resumed,
+            "retried": self.retried,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,392 @@
+"""
+Sortie structurée des rapports : schéma du modèle `Report` du backend,
+validation précompilée et réparation des sorties presque correctes.
+
+Le schéma est passé à Gemini (`response_schema`) pour obtenir du JSON brut
+conforme. La même définition est compilée une fois en fonctions de
+validation ; elles corrigent ce qui peut l'être sans nouvel appel au modèle
+(nombres en texte, chaîne au lieu de liste, champ requis manquant, sortie
+tronquée ou virgule en trop) plutôt que de jeter tout le rapport.
+`session_id` et `patient_id` ne sont jamais complétés : l'appelant les pose.
+"""
+
+import copy
+import json
+import logging
+import re
+
+logger = logging.getLogger("agent.reports")
+
+_STRING = {"type": "STRING"}
+_STRINGS = {"type": "ARRAY", "items": _STRING}
+
+REPORT_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "session_id": _STRING,
+        "patient_id": _STRING,
+        "overview": {
+            "type": "OBJECT",
+            "properties": {
+                "name": _STRING,
+                "age": {"type": "NUMBER", "nullable": True},
+                "gender": _STRING,
+                "occupation": _STRING,
+                "education_level": _STRING,
+                "marital_status": _STRING,
+                "session_info": _STRING,
+                "initial_diagnosis": _STRING,
+                "scores": {
+                    "type": "ARRAY",
+                    "items": {
+                        "type": "OBJECT",
+                        "properties": {
+                            "tool": _STRING,
+                            "intake": {"type": "NUMBER"},
+                            "current": {"type": "NUMBER"},
+                        },
+                        "required": ["tool", "intake", "current"],
+                    },
+                },
+            },
+            "required": ["name"],
+        },
+        "narrative": {
+            "type": "OBJECT",
+            "properties": {
+                "description": _STRING,
+                "symptoms_observed": _STRINGS,
+                "physical_markers": _STRINGS,
+                "behavioral_markers": _STRINGS,
+            },
+        },
+        "risk_indicators": {
+            "type": "OBJECT",
+            "properties": {
+                "suicidal_ideation": _STRING,
+                "substance_use": _STRING,
+                "pregnancy": _STRING,
+                "family_history": _STRING,
+                "other_risks": _STRINGS,
+            },
+        },
+        "clinical_inference": {
+            "type": "OBJECT",
+            "properties": {
+                "primary_diagnosis": _STRING,
+                "differential_diagnoses": _STRINGS,
+                "recommendations": _STRINGS,
+            },
+        },
+        "dialogue": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "speaker": {"type": "STRING", "enum": ["AI", "Patient"]},
+                    "text": _STRING,
+                },
+                "required": ["speaker", "text"],
+            },
+        },
+        "doctor_notes": _STRING,
+        "notified_to_doctor": {"type": "BOOLEAN"},
+    },
+    "required": ["session_id", "patient_id", "overview"],
+}
+
+# Variantes courantes des valeurs d'enum produites par le modèle
+ENUM_ALIASES = {
+    "assistant": "AI",
+    "ai assistant": "AI",
+    "dr. mira": "AI",
+    "doctor": "AI",
+    "psychologist": "AI",
+    "user": "Patient",
+    "client": "Patient",
+}
+
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_TRUE = {"true", "yes", "oui", "1"}
+_FALSE = {"false", "no", "non", "0", ""}
+
+
+class _InvalidError(Exception):
+    pass
+
+
+# Pas de valeur par défaut : on n'invente pas un score clinique
+_NO_DEFAULT = object()
+# Identifiants posés par l'appelant : une valeur inventée ("") masquerait leur absence
+_IDENTIFIERS = frozenset({"session_id", "patient_id"})
+
+
+# ---------------- Compilation du schéma ----------------
+def _compile(schema):
+    """Transforme un nœud du schéma en fonction `(valeur, repairs) -> valeur`."""
+    kind = schema["type"]
+    nullable = schema.get("nullable", False)
+
+    if kind == "OBJECT":
+        fields = {
+            name: _compile(sub) for name, sub in schema.get("properties", {}).items()
+        }
+        defaults = {
+            name: _default(schema["properties"][name])
+            for name in schema.get("required", ())
+            if name not in _IDENTIFIERS
+        }
+
+        def check_object(value, repairs):
+            if value is None and nullable:
+                return None
+            if not isinstance(value, dict):
+                raise _InvalidError(f"expected object, got {type(value).__name__}")
+            out = dict(value)
+            for name, check in fields.items():
+                if name in out:
+                    try:
+                        out[name] = check(out[name], repairs)
+                    except _InvalidError:
+                        if name not in defaults:
+                            del out[name]
+                            repairs.append(f"dropped {name}")
+                            continue
+                        out[name] = _required(name, defaults[name])
+                        repairs.append(f"reset {name}")
+                elif name in defaults:
+                    out[name] = _required(name, defaults[name])
+                    repairs.append(f"added {name}")
+            return out
+
+        return check_object
+
+    if kind == "ARRAY":
+        item = _compile(schema["items"])
+
+        def check_array(value, repairs):
+            if value is None:
+                repairs.append("null -> []")
+                return []
+            if not isinstance(value, list):
+                repairs.append("scalar -> [scalar]")
+                value = [value]
+            out = []
+            for element in value:
+                try:
+                    out.append(item(element, repairs))
+                except _InvalidError:
+                    repairs.append("dropped array item")
+            return out
+
+        return check_array
+
+    if kind == "STRING":
+        enum = schema.get("enum")
+        by_lower = {v.lower(): v for v in enum} if enum else None
+
+        def check_string(value, repairs):
+            if value is None:
+                if nullable:
+                    return None
+                repairs.append("null -> ''")
+                value = ""
+            elif isinstance(value, list):
+                repairs.append("list -> string")
+                value = ", ".join(str(v) for v in value)
+            elif isinstance(value, dict):
+                repairs.append("object -> string")
+                value = json.dumps(value, ensure_ascii=False)
+            elif not isinstance(value, str):
+                repairs.append("scalar -> string")
+                value = str(value).lower() if isinstance(value, bool) else str(value)
+            if by_lower is None or value in enum:
+                return value
+            key = value.strip().lower()
+            fixed = by_lower.get(key) or ENUM_ALIASES.get(key)
+            if fixed is None or fixed not in enum:
+                raise _InvalidError(f"{value!r} not in {enum}")
+            repairs.append("enum alias")
+            return fixed
+
+        return check_string
+
+    if kind in ("NUMBER", "INTEGER"):
+
+        def check_number(value, repairs):
+            if (
+                isinstance(value, bool)
+                or value is None
+                or not isinstance(value, (int, float))
+            ):
+                if value is None and nullable:
+                    return None
+                try:
+                    value = float(str(value).strip().replace(",", "."))
+                except ValueError:
+                    if nullable:
+                        repairs.append("invalid number -> null")
+                        return None
+                    raise _InvalidError(f"not a number: {value!r}") from None
+                repairs.append("string -> number")
+                if value.is_integer():
+                    value = int(value)
+            return int(value) if kind == "INTEGER" else value
+
+        return check_number
+
+    if kind == "BOOLEAN":
+
+        def check_boolean(value, repairs):
+            if isinstance(value, bool):
+                return value
+            text = str(value).strip().lower()
+            if text in _TRUE or text in _FALSE:
+                repairs.append("string -> boolean")
+                return text in _TRUE
+            raise _InvalidError(f"not a boolean: {value!r}")
+
+        return check_boolean
+
+    raise ValueError(f"unsupported schema type {kind}")
+
+
+def _default(schema):
+    kind = schema["type"]
+    if schema.get("nullable"):
+        return None
+    if kind == "OBJECT":
+        return _compile(schema)({}, [])
+    return {"ARRAY": [], "STRING": "", "BOOLEAN": False}.get(kind, _NO_DEFAULT)
+
+
+def _required(name, default):
+    if default is _NO_DEFAULT:
+        raise _InvalidError(f"missing required {name}")
+    # Copie : les valeurs par défaut mutables ne doivent pas être partagées
+    return copy.deepcopy(default)
+
+
+_VALIDATE_REPORT = _compile(REPORT_SCHEMA)
+
+
+# ---------------- Réparation de la syntaxe ----------------
+def _close_truncated(text):
+    """Ferme chaînes et conteneurs laissés ouverts par une sortie tronquée."""
+    stack = []
+    in_string = escape = False
+    last_safe = 0
+    for i, c in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+            continue
+        if c == '"':
+            in_string = True
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+        elif c in "}]":
+            if stack:
+                stack.pop()
+            last_safe = i + 1
+        elif c == ",":
+            last_safe = i
+    if not stack:
+        return text
+    # On coupe au dernier élément complet, puis on referme ce qui reste ouvert
+    head = text[:last_safe].rstrip().rstrip(",")
+    stack = []
+    in_string = escape = False
+    for c in head:
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+        elif c in "}]" and stack:
+            stack.pop()
+    return head + "".join(reversed(stack))
+
+
+class ReportParser:
+    def __init__(self, schema_validator=_VALIDATE_REPORT):
+        self._validate = schema_validator
+        self.parsed = 0
+        self.clean = 0
+        self.syntax_repairs = 0
+        self.field_repairs = 0
+        self.failures = 0
+
+    def _load(self, text):
+        """JSON brut d'abord (mode structuré), puis extraction et réparation."""
+        if text.lstrip().startswith("{"):
+            try:
+                return json.loads(text), False
+            except ValueError:
+                pass
+        start, end = text.find("{"), text.rfind("}")
+        if start < 0:
+            raise ValueError("no JSON object in model output")
+        body = text[start : end + 1] if end > start else text[start:]
+        try:
+            return json.loads(body), False
+        except ValueError:
+            pass
+        # Presque du JSON : virgules finales, sortie coupée en plein milieu
+        repaired = _TRAILING_COMMA.sub(r"\1", text[start:])
+        try:
+            return json.loads(repaired[: repaired.rfind("}") + 1]), True
+        except ValueError:
+            return json.loads(_close_truncated(repaired)), True
+
+    def parse(self, text):
+        """Retourne le rapport validé, ou {} si rien d'exploitable."""
+        self.parsed += 1
+        try:
+            data, syntax_fixed = self._load(text)
+            repairs = []
+            report = self._validate(data, repairs)
+        except (ValueError, _InvalidError) as e:
+            self.failures += 1
+            logger.error(f"❌ Sortie du modèle inexploitable: {e}")
+            return {}
+
+        if syntax_fixed:
+            self.syntax_repairs += 1
+        if repairs:
+            self.field_repairs += 1
+            logger.warning(
+                f"🔧 Rapport réparé ({len(repairs)}): {', '.join(repairs[:10])}"
+            )
+        if not syntax_fixed and not repairs:
+            self.clean += 1
+        return report
+
+    def metrics(self):
+        return {
+            "parsed": self.parsed,
+            "clean": self.clean,
+            "syntax_repairs": self.syntax_repairs,
+            "field_repairs": self.field_repairs,
+            "failures": self.failures,
+        }
+
+
+def structured_config():
+    """Config Gemini demandant du JSON conforme à REPORT_SCHEMA."""
+    from google.genai import types
+
+    return types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=REPORT_SCHEMA,
+    )
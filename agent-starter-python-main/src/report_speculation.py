@@ -0,0 +1,181 @@
+"""
+Rapport préparé pendant la session, avant la demande `GENERATE_REPORT`.
+
+Sans ce mode, le clinicien attend un aller-retour Gemini complet après la
+fin de l'appel. Le ReportSpeculator suit le dialogue vu par l'agent et lance
+une génération en arrière-plan tous les REPORT_SPECULATE_EVERY tours et
+quand l'agent prononce `[SESSION_END]` ; une seule génération par room à la
+fois, la suivante reprend le dialogue le plus récent. À la demande finale,
+le dernier rapport préparé est réutilisé si son dialogue est un préfixe du
+dialogue envoyé par le frontend et que le reste (le « delta ») est court et
+sans propos à risque : seul le dialogue du rapport est remplacé. Sinon le
+rapport est généré comme avant.
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+from dialogue_window import RISK_TERMS, turn_speaker, turn_text
+
+logger = logging.getLogger("agent.reports")
+
+# ---------------- Configuration ----------------
+REPORT_SPECULATIVE = os.getenv("REPORT_SPECULATIVE", "0") == "1"
+# 0 : seulement sur [SESSION_END]
+REPORT_SPECULATE_EVERY = int(os.getenv("REPORT_SPECULATE_EVERY", "8"))
+# Tours ajoutés après la dernière préparation encore acceptés sans régénérer
+REPORT_SPECULATE_MAX_DELTA = int(os.getenv("REPORT_SPECULATE_MAX_DELTA", "2"))
+
+SESSION_END = "[SESSION_END]"
+# session_id inconnu pendant la session : remplacé à la demande finale
+PLACEHOLDER_SESSION_ID = "pending-session"
+
+
+def _normalize(text):
+    return " ".join(text.replace(SESSION_END, "").split()).casefold()
+
+
+def rebind_session(value, placeholder, session_id):
+    """Remplace `placeholder` par `session_id` dans toutes les chaînes du rapport."""
+    if isinstance(value, str):
+        return value.replace(placeholder, session_id)
+    if isinstance(value, dict):
+        return {k: rebind_session(v, placeholder, session_id) for k, v in value.items()}
+    if isinstance(value, list):
+        return [rebind_session(v, placeholder, session_id) for v in value]
+    return value
+
+
+class ReportSpeculator:
+    """
+    `generate(dialogue)` produit un rapport pour un instantané du dialogue ;
+    `spawn(coro)` lance la tâche (report_engine.run_for_room, pour qu'elle
+    soit annulée avec la room).
+    """
+
+    def __init__(
+        self,
+        generate,
+        spawn,
+        *,
+        every_turns=REPORT_SPECULATE_EVERY,
+        max_delta=REPORT_SPECULATE_MAX_DELTA,
+        clock=time.perf_counter,
+    ):
+        self._generate = generate
+        self._spawn = spawn
+        self.every_turns = every_turns
+        self.max_delta = max_delta
+        self._clock = clock
+        self.dialogue = []
+        self._since = 0
+        # (instantané du dialogue, tâche) de la génération en cours
+        self._running = None
+        self._rerun = False
+        # (instantané du dialogue, rapport, instant où il était prêt)
+        self.latest = None
+        self.started = 0
+        self.failed = 0
+        self.reused = 0
+        self.missed = 0
+
+    def add(self, speaker, text):
+        """Ajoute un tour ; retourne True si une préparation est demandée."""
+        self.dialogue.append({"speaker": speaker, "text": text})
+        self._since += 1
+        if SESSION_END in text:
+            self.trigger(final=True)
+            return True
+        if self.every_turns and self._since >= self.every_turns:
+            self.trigger()
+            return True
+        return False
+
+    def trigger(self, *, final=False):
+        """
+        Lance une préparation. Une seule à la fois : la suivante partira du
+        dialogue à jour, sauf en fin de session où l'ancienne est abandonnée.
+        """
+        self._since = 0
+        if self._running is not None and not self._running[1].done():
+            if not final:
+                self._rerun = True
+                return
+            self._running[1].cancel()
+        self._rerun = False
+        self._start()
+
+    def _start(self):
+        snapshot = list(self.dialogue)
+        self.started += 1
+        self._running = (snapshot, self._spawn(self._run(snapshot)))
+
+    async def _run(self, snapshot):
+        try:
+            report = await self._generate(snapshot)
+        except Exception as e:
+            self.failed += 1
+            logger.warning(
+                f"⚠️ Préparation du rapport ({len(snapshot)} tours) échouée: {e!r}"
+            )
+            report = None
+        if report:
+            self.latest = (snapshot, report, self._clock())
+        if self._rerun:
+            self._rerun = False
+            self._start()
+        return report
+
+    def _usable(self, snapshot, dialogue):
+        """Le delta entre l'instantané et le dialogue final est-il négligeable ?"""
+        if len(snapshot) > len(dialogue):
+            return False
+        for ours, theirs in zip(snapshot, dialogue):
+            if _normalize(ours["text"]) != _normalize(turn_text(theirs)):
+                return False
+        delta = dialogue[len(snapshot) :]
+        if len(delta) > self.max_delta:
+            return False
+        return not any(
+            turn_speaker(turn) != "AI" and RISK_TERMS.search(turn_text(turn))
+            for turn in delta
+        )
+
+    async def reconcile(self, dialogue, session_id):
+        """
+        Rapport préparé pour le dialogue final, ou None s'il faut générer.
+        Attend la préparation en cours quand elle couvre ce dialogue.
+        """
+        while self._running is not None and not self._running[1].done():
+            snapshot, task = self._running
+            # Préparation utile, ou relance à venir sur le dialogue à jour
+            if not (self._usable(snapshot, dialogue) or self._rerun):
+                break
+            # shield : la demande finale peut être annulée sans perdre la préparation
+            await asyncio.gather(asyncio.shield(task), return_exceptions=True)
+            if self._running[1] is task:
+                break
+
+        if self.latest is None or not self._usable(self.latest[0], dialogue):
+            self.missed += 1
+            return None
+        snapshot, report, ready_at = self.latest
+        self.reused += 1
+        logger.info(
+            f"⚡ Rapport préparé réutilisé ({len(snapshot)}/{len(dialogue)} tours, "
+            f"prêt depuis {max(0.0, self._clock() - ready_at) * 1000:.0f} ms)"
+        )
+        report = rebind_session(report, PLACEHOLDER_SESSION_ID, session_id)
+        report["dialogue"] = dialogue
+        return report
+
+    def metrics(self):
+        return {
+            "turns": len(self.dialogue),
+            "started": self.started,
+            "failed": self.failed,
+            "reused": self.reused,
+            "missed": self.missed,
+        }
@@ -0,0 +1,97 @@
+"""
+Parseur JSON incrémental pour les rapports Gemini en streaming.
+
+Le modèle renvoie un objet JSON (souvent entouré de ```json ... ```) par
+morceaux. Le parseur avance d'un seul passage sur le texte reçu et rend
+chaque membre de premier niveau (`overview`, `narrative`, ...) dès que sa
+valeur est complète, sans attendre la fin de la réponse. Le rapport final
+est relu sur le texte complet (`text`) par report_schema.ReportParser.
+"""
+
+import json
+import logging
+
+logger = logging.getLogger("agent.reports")
+
+
+class StreamingReportParser:
+    def __init__(self):
+        self.sections = {}
+        self._chunks = []
+        self._buf = ""
+        self._pos = 0
+        self._started = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = 0
+
+    @property
+    def text(self):
+        """Texte brut reçu jusqu'ici."""
+        return "".join(self._chunks)
+
+    @property
+    def complete(self):
+        return self._done
+
+    def feed(self, chunk):
+        """Ajoute un morceau et retourne la liste des (clé, valeur) nouvellement complètes."""
+        self._chunks.append(chunk)
+        if self._done:
+            return []
+
+        if not self._started:
+            start = chunk.find("{")
+            if start < 0:
+                return []
+            self._started = True
+            chunk = chunk[start:]
+        self._buf += chunk
+        return self._scan()
+
+    def _scan(self):
+        completed = []
+        buf = self._buf
+        i = self._pos
+        n = len(buf)
+        while i < n:
+            c = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = i + 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed += self._close_member(buf[self._member_start : i])
+                    self._done = True
+                    i += 1
+                    break
+            elif c == "," and self._depth == 1:
+                completed += self._close_member(buf[self._member_start : i])
+                self._member_start = i + 1
+            i += 1
+        self._pos = i
+        return completed
+
+    def _close_member(self, member):
+        if not member.strip():
+            return []
+        try:
+            parsed = json.loads("{" + member + "}")
+        except ValueError as e:
+            logger.warning(f"⚠️ Section JSON illisible ignorée: {e}")
+            return []
+        self.sections.update(parsed)
+        return list(parsed.items())
@@ -1,15 +1,20 @@
 # --- server.py ---
-import os
-import asyncio
+import argparse
 import logging
-import nest_asyncio
-from flask import Flask, request, jsonify
+import math
+import os
+import threading
+import time
+
 from dotenv import load_dotenv
+from flask import Flask, jsonify, request
 from flask_cors import CORS
-from livekit import api
 
-# Importer ton agent (AGENT_SESSIONS doit contenir des JobContext)
-from agent import AGENT_SESSIONS  # 🔥 on n'importe plus generate_diagnostic_report
+from session_directory import SessionDirectory
+from token_cache import TokenCache
+
+# Le serveur n'importe plus `agent` : les jobs vivent dans les processus des
+# workers LiveKit ; serveur et workers partagent l'annuaire des rooms (SQLite)
 
 # ------------------ Configuration Logging ------------------
 logger = logging.getLogger("server")
@@ -32,66 +37,116 @@ if not LIVEKIT_API_KEY or not LIVEKIT_API_SECRET or not LIVEKIT_URL:
 app = Flask(__name__)
 CORS(app, origins=["http://localhost:3000"])
 
-# Stocke juste les profils à part (facultatif)
-AGENT_CONTEXT = {}
+# Profils par room dans l'annuaire partagé, purgés par /disconnectAgent : visibles de
+# tous les processus du serveur et des workers de l'agent. TTL et taille bornée
+# viennent de SESSION_DIRECTORY_TTL_S / SESSION_DIRECTORY_MAX, communs à tous.
+AGENT_CONTEXT = SessionDirectory()
+
+# Tokens déjà signés, réutilisés lors des reconnexions rapides
+TOKEN_CACHE = TokenCache(LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
 
-# Permet d’éviter les erreurs de loop avec asyncio + Flask
-nest_asyncio.apply()
+# Réveille les long-polls /waitProfile dès qu'un profil est stocké
+PROFILE_READY = threading.Condition()
+PROFILE_WAIT_MAX_S = 30.0
+# Un profil écrit par un autre processus ne réveille pas la Condition : relecture périodique
+PROFILE_POLL_S = 0.1
 
 # ------------------ Utils ------------------
 def error_response(message, code=400):
     return jsonify({"error": message}), code
 
-# ------------------ Routes ------------------
-@app.route("/getConnectionDetails", methods=["POST"])
-def get_connection_details():
-    data = request.json or {}
+def wait_timeout(raw):
+    """
+    Timeout demandé par /waitProfile, borné à PROFILE_WAIT_MAX_S (None si invalide).
+    `nan` ou `inf` sont refusés : nan passe à travers min/max et l'échéance
+    ne serait jamais atteinte.
+    """
+    try:
+        timeout = float(raw if raw is not None else 10)
+    except ValueError:
+        return None
+    if not math.isfinite(timeout):
+        return None
+    return max(min(timeout, PROFILE_WAIT_MAX_S), 0)
+
+# ------------------ Logique commune (Flask + mode async) ------------------
+# Chaque fonction retourne (payload JSON, code HTTP) : les deux serveurs
+# exposent ainsi exactement les mêmes contrats.
+def connection_details(data):
     room_name = data.get("room")
     identity = data.get("identity", "web_user")
     name = data.get("name", identity)
 
     if not room_name:
-        return error_response("room required", 400)
+        return {"error": "room required"}, 400
 
     logger.info(f"🎫 Génération d'un token pour room={room_name}, identity={identity}")
 
-    token = api.AccessToken(LIVEKIT_API_KEY, LIVEKIT_API_SECRET) \
-        .with_identity(identity) \
-        .with_name(name) \
-        .with_grants(api.VideoGrants(
-            room_join=True,
-            room=room_name,
-        ))
+    token = TOKEN_CACHE.token(room_name, identity, name, room_join=True)
 
-    return jsonify({
+    return {
         "serverUrl": LIVEKIT_URL,
         "roomName": room_name,
         "participantName": name,
-        "participantToken": token.to_jwt(),
-    })
+        "participantToken": token,
+    }, 200
 
-@app.route("/connectAgent", methods=["POST"])
-def connect_agent():
-    """
-    Associe un agent à une room (profil côté front).
-    """
-    data = request.json or {}
+def register_profile(data):
     room_name = data.get("room")
     profile = data.get("profile")
 
-    logger.info(f"📨 [connectAgent] Payload brut: {data}")
+    logger.info(f"📨 [connectAgent] room={room_name}")
     if not room_name:
-        return error_response("room required")
+        return {"error": "room required"}, 400
+    if not profile:
+        return {"error": "profile required"}, 400
+
+    with PROFILE_READY:
+        AGENT_CONTEXT[room_name] = profile
+        PROFILE_READY.notify_all()
+
+    logger.info(f"🤖 Agent associé à la room '{room_name}'")
+
+    return {"status": f"Agent ready for room {room_name}"}, 200
+
+def release_room(data):
+    room_name = data.get("room")
+    if not room_name:
+        return {"error": "room required"}, 400
+
+    removed = AGENT_CONTEXT.pop(room_name, None) is not None
+    logger.info(f"🧹 Room '{room_name}' libérée (profil supprimé: {removed})")
+    return {"status": "released", "removed": removed}, 200
+
+def profile_response(room_name, pushed=False):
+    profile = AGENT_CONTEXT.get(room_name)
     if not profile:
-        return error_response("profile required")
+        return {"error": "profile not found"}, 404
 
-    AGENT_CONTEXT[room_name] = profile
+    logger.info(f"📌 Profil {'poussé' if pushed else 'récupéré'} pour room '{room_name}'")
+    return {"profile": profile}, 200
 
-    logger.info(f"🤖 Agent associé à la room '{room_name}' avec profil: {profile}")
-    logger.info(f"📂 Etat complet de AGENT_CONTEXT: {AGENT_CONTEXT}")
-    logger.info(f"📋 Sessions actives côté agent: {list(AGENT_SESSIONS.keys())}")
+# ------------------ Routes ------------------
+@app.route("/getConnectionDetails", methods=["POST"])
+def get_connection_details():
+    payload, code = connection_details(request.json or {})
+    return jsonify(payload), code
 
-    return jsonify({"status": f"Agent ready for room {room_name}"}), 200
+@app.route("/connectAgent", methods=["POST"])
+def connect_agent():
+    """
+    Associe un agent à une room (profil côté front).
+    """
+    payload, code = register_profile(request.json or {})
+    return jsonify(payload), code
+
+@app.route("/disconnectAgent", methods=["POST"])
+def disconnect_agent():
+    """
+    Appelé par l'agent à la fermeture de la room : libère le profil stocké.
+    """
+    payload, code = release_room(request.json or {})
+    return jsonify(payload), code
 
 @app.route("/getProfile", methods=["GET"])
 def get_profile():
@@ -99,12 +154,32 @@ def get_profile():
     if not room_name:
         return error_response("room required")
 
-    profile = AGENT_CONTEXT.get(room_name)
-    if not profile:
-        return error_response("profile not found", 404)
+    payload, code = profile_response(room_name)
+    return jsonify(payload), code
+
+@app.route("/waitProfile", methods=["GET"])
+def wait_profile():
+    """
+    Long-poll : répond dès que /connectAgent a stocké le profil de la room,
+    ou 404 après `timeout` secondes (max PROFILE_WAIT_MAX_S).
+    """
+    room_name = request.args.get("room")
+    if not room_name:
+        return error_response("room required")
+    timeout = wait_timeout(request.args.get("timeout"))
+    if timeout is None:
+        return error_response("invalid timeout")
+
+    deadline = time.monotonic() + timeout
+    with PROFILE_READY:
+        while room_name not in AGENT_CONTEXT:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            PROFILE_READY.wait(min(remaining, PROFILE_POLL_S))
 
-    logger.info(f"📌 Profil récupéré pour room '{room_name}': {profile}")
-    return jsonify({"profile": profile})
+    payload, code = profile_response(room_name, pushed=True)
+    return jsonify(payload), code
 
 # ------------------ Désactivation de la génération côté backend ------------------
 """
@@ -117,5 +192,17 @@ def generate_report():
 """
 
 if __name__ == "__main__":
-    logger.info("🚀 Démarrage du serveur Flask sur http://localhost:5001")
-    app.run(port=5001, debug=True)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="serveur aiohttp (production) au lieu du serveur de dev Flask")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SERVER_WORKERS", "1")))
+    parser.add_argument("--host", default=os.getenv("SERVER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVER_PORT", "5001")))
+    args = parser.parse_args()
+
+    if args.use_async:
+        from server_async import serve
+        serve(host=args.host, port=args.port, workers=args.workers)
+    else:
+        logger.info(f"🚀 Démarrage du serveur Flask sur http://{args.host}:{args.port}")
+        app.run(host=args.host, port=args.port, debug=os.getenv("FLASK_DEBUG", "1") == "1")
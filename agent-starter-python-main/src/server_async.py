@@ -0,0 +1,166 @@
+"""
+Mode async (aiohttp) du serveur de tokens et de profils.
+
+Mêmes routes et mêmes contrats JSON que `server.py` (la logique est
+partagée), mais sans le serveur de dev Flask : les long-polls /waitProfile
+ne bloquent plus un thread chacun et plusieurs processus workers peuvent
+écouter le même port (SO_REUSEPORT), les profils étant partagés par
+l'annuaire des rooms (session_directory). L'annuaire est un fichier
+SQLite synchrone : chaque accès passe par `asyncio.to_thread`.
+
+    python src/server.py --async --workers 4
+"""
+
+import asyncio
+import contextlib
+import logging
+import multiprocessing
+
+from aiohttp import web
+
+import server
+
+logger = logging.getLogger("server")
+
+ALLOWED_ORIGINS = {"http://localhost:3000"}
+PROFILE_READY = web.AppKey("profile_ready", asyncio.Condition)
+
+
+# ------------------ Middlewares ------------------
+@web.middleware
+async def cors_middleware(request, handler):
+    origin = request.headers.get("Origin")
+    if request.method == "OPTIONS":
+        response = web.Response(status=200)
+    else:
+        response = await handler(request)
+    if origin in ALLOWED_ORIGINS:
+        response.headers["Access-Control-Allow-Origin"] = origin
+        response.headers["Vary"] = "Origin"
+        if request.method == "OPTIONS":
+            response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
+            response.headers["Access-Control-Allow-Headers"] = request.headers.get(
+                "Access-Control-Request-Headers", "Content-Type"
+            )
+    return response
+
+
+# ------------------ Utils ------------------
+def _json(result):
+    payload, code = result
+    return web.json_response(payload, status=code)
+
+
+def _has_profile(room_name):
+    return room_name in server.AGENT_CONTEXT
+
+
+async def _body(request):
+    try:
+        return await request.json() or {}
+    except ValueError:
+        return {}
+
+
+# ------------------ Routes ------------------
+async def get_connection_details(request):
+    return _json(server.connection_details(await _body(request)))
+
+
+async def connect_agent(request):
+    result = await asyncio.to_thread(server.register_profile, await _body(request))
+    if result[1] == 200:
+        ready = request.app[PROFILE_READY]
+        async with ready:
+            ready.notify_all()
+    return _json(result)
+
+
+async def disconnect_agent(request):
+    return _json(await asyncio.to_thread(server.release_room, await _body(request)))
+
+
+async def get_profile(request):
+    room_name = request.query.get("room")
+    if not room_name:
+        return _json(({"error": "room required"}, 400))
+    return _json(await asyncio.to_thread(server.profile_response, room_name))
+
+
+async def wait_profile(request):
+    room_name = request.query.get("room")
+    if not room_name:
+        return _json(({"error": "room required"}, 400))
+    timeout = server.wait_timeout(request.query.get("timeout"))
+    if timeout is None:
+        return _json(({"error": "invalid timeout"}, 400))
+
+    ready = request.app[PROFILE_READY]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    # Réveil immédiat pour un /connectAgent de ce processus, relecture
+    # périodique de l'annuaire pour ceux des autres processus. La lecture
+    # SQLite se fait hors du verrou : les long-polls ne s'attendent pas entre
+    # eux ; un réveil manqué entre lecture et attente coûte au plus un tour.
+    while not await asyncio.to_thread(_has_profile, room_name):
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        async with ready:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    ready.wait(), min(remaining, server.PROFILE_POLL_S)
+                )
+    return _json(await asyncio.to_thread(server.profile_response, room_name, True))
+
+
+async def _on_startup(app):
+    # La Condition doit appartenir à la boucle du worker
+    app[PROFILE_READY] = asyncio.Condition()
+
+
+def make_app():
+    app = web.Application(middlewares=[cors_middleware])
+    app.on_startup.append(_on_startup)
+    app.router.add_post("/getConnectionDetails", get_connection_details)
+    app.router.add_post("/connectAgent", connect_agent)
+    app.router.add_post("/disconnectAgent", disconnect_agent)
+    app.router.add_get("/getProfile", get_profile)
+    app.router.add_get("/waitProfile", wait_profile)
+    return app
+
+
+# ------------------ Démarrage ------------------
+def _run_worker(host, port, reuse_port):
+    web.run_app(
+        make_app(),
+        host=host,
+        port=port,
+        reuse_port=reuse_port,
+        access_log=None,
+        print=None,
+    )
+
+
+def serve(host="127.0.0.1", port=5001, workers=1):
+    logger.info(
+        f"🚀 Démarrage du serveur async sur http://{host}:{port} ({workers} worker(s))"
+    )
+    if workers <= 1:
+        _run_worker(host, port, reuse_port=False)
+        return
+
+    procs = [
+        multiprocessing.Process(
+            target=_run_worker, args=(host, port, True), daemon=True
+        )
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    try:
+        for proc in procs:
+            proc.join()
+    except KeyboardInterrupt:
+        for proc in procs:
+            proc.terminate()
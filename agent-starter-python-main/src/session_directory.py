@@ -0,0 +1,243 @@
+"""
+Annuaire des rooms partagé entre processus (serveur de tokens et workers).
+
+Le serveur gardait les profils dans un SessionStore en mémoire et les
+workers leurs rooms dans AGENT_SESSIONS : chacun ne voyait que son propre
+processus (le log « sessions actives » du serveur était toujours vide, et
+`server.py --async --workers N` ne pouvait pas servir /waitProfile depuis un
+autre processus que celui du /connectAgent). L'annuaire est un fichier
+SQLite en WAL, une ligne par room : profil (écrit par le serveur) et worker
+qui tient la room (écrit par l'agent). Lecture et écriture par clé primaire,
+expiration par TTL (prolongée à chaque écriture), purge périodique des
+lignes expirées et des plus anciennes au-delà de `max_size`. Chaque
+processus de job y publie aussi sa charge (rapports en vol, latence de
+boucle), que le worker LiveKit agrège sur ses rooms (voir worker_load).
+
+Tous les processus qui partagent SESSION_DIRECTORY_PATH voient les mêmes
+rooms ; sur plusieurs machines, le fichier doit être local à chacune (SQLite
+ne se partage pas par NFS) et le long-poll HTTP reste le chemin commun.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+# ---------------- Configuration ----------------
+SESSION_DIRECTORY_PATH = os.getenv(
+    "SESSION_DIRECTORY_PATH", "session_directory.sqlite3"
+)
+SESSION_DIRECTORY_TTL_S = float(os.getenv("SESSION_DIRECTORY_TTL_S", "3600"))
+SESSION_DIRECTORY_MAX = int(os.getenv("SESSION_DIRECTORY_MAX", "10000"))
+# Intervalle minimal entre deux purges (faites lors des écritures)
+SESSION_DIRECTORY_PURGE_S = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rooms (
+    room       TEXT PRIMARY KEY,
+    profile    TEXT,
+    worker     TEXT,
+    updated_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS rooms_expires_at ON rooms (expires_at)"
+_LOAD_SCHEMA = """
+CREATE TABLE IF NOT EXISTS room_load (
+    room       TEXT PRIMARY KEY,
+    reports    INTEGER NOT NULL,
+    lag_ms     REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+_SET_PROFILE = """
+INSERT INTO rooms (room, profile, updated_at, expires_at) VALUES (?, ?, ?, ?)
+ON CONFLICT(room) DO UPDATE SET
+    profile = excluded.profile, updated_at = excluded.updated_at, expires_at = excluded.expires_at
+"""
+_SET_WORKER = """
+INSERT INTO rooms (room, worker, updated_at, expires_at) VALUES (?, ?, ?, ?)
+ON CONFLICT(room) DO UPDATE SET
+    worker = excluded.worker, updated_at = excluded.updated_at, expires_at = excluded.expires_at
+"""
+_SET_LOAD = """
+INSERT INTO room_load (room, reports, lag_ms, updated_at) VALUES (?, ?, ?, ?)
+ON CONFLICT(room) DO UPDATE SET
+    reports = excluded.reports, lag_ms = excluded.lag_ms, updated_at = excluded.updated_at
+"""
+
+
+def worker_id():
+    """Identifiant du processus courant : « hôte:pid »."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class SessionDirectory:
+    def __init__(
+        self,
+        path=SESSION_DIRECTORY_PATH,
+        *,
+        ttl=SESSION_DIRECTORY_TTL_S,
+        max_size=SESSION_DIRECTORY_MAX,
+        purge_interval=SESSION_DIRECTORY_PURGE_S,
+        clock=time.time,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.purge_interval = purge_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Connexion ouverte au premier accès, et rouverte après un fork
+        self._db = None
+        self._pid = None
+        self._last_purge = float("-inf")
+        self.purged = 0
+        # Résumé relevé à chaque purge, lisible sans requête depuis une boucle asyncio
+        self.last_summary = None
+
+    # ---------------- Stockage ----------------
+    def _conn(self):
+        if self._pid != os.getpid():
+            db = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA busy_timeout=5000")
+            db.execute(_SCHEMA)
+            db.execute(_INDEX)
+            db.execute(_LOAD_SCHEMA)
+            self._db, self._pid = db, os.getpid()
+        return self._db
+
+    def _write(self, sql, params):
+        now = self._clock()
+        with self._lock:
+            db = self._conn()
+            cursor = db.execute(sql, params)
+            if now - self._last_purge >= self.purge_interval:
+                self._last_purge = now
+                self._purge(db, now)
+        return cursor.rowcount
+
+    def _purge(self, db, now):
+        expired = db.execute("DELETE FROM rooms WHERE expires_at <= ?", (now,)).rowcount
+        overflow = db.execute(
+            "DELETE FROM rooms WHERE room IN ("
+            "SELECT room FROM rooms ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_size,),
+        ).rowcount
+        self.purged += expired + overflow
+        db.execute("DELETE FROM room_load WHERE updated_at <= ?", (now - self.ttl,))
+        self.last_summary = self._summary(db, now)
+
+    def _row(self, room):
+        with self._lock:
+            return (
+                self._conn()
+                .execute(
+                    "SELECT profile, worker FROM rooms WHERE room = ? AND expires_at > ?",
+                    (room, self._clock()),
+                )
+                .fetchone()
+            )
+
+    # ---------------- Profils (serveur) ----------------
+    def __setitem__(self, room, profile):
+        now = self._clock()
+        self._write(
+            _SET_PROFILE,
+            (room, json.dumps(profile, ensure_ascii=False), now, now + self.ttl),
+        )
+
+    def get(self, room, default=None):
+        """Profil de la room, ou `default`."""
+        row = self._row(room)
+        if row is None or row[0] is None:
+            return default
+        return json.loads(row[0])
+
+    def __contains__(self, room):
+        row = self._row(room)
+        return row is not None and row[0] is not None
+
+    def pop(self, room, default=None):
+        """Retire la room (profil et worker) ; retourne son profil ou `default`."""
+        profile = self.get(room, default)
+        self._write("DELETE FROM rooms WHERE room = ?", (room,))
+        return profile
+
+    # ---------------- Workers (agent) ----------------
+    def assign(self, room, worker):
+        now = self._clock()
+        self._write(_SET_WORKER, (room, worker, now, now + self.ttl))
+
+    def worker(self, room):
+        row = self._row(room)
+        return None if row is None else row[1]
+
+    def unassign(self, room, worker):
+        """Libère la room si `worker` la tient encore (un autre a pu la reprendre)."""
+        released = bool(
+            self._write(
+                "UPDATE rooms SET worker = NULL WHERE room = ? AND worker = ?",
+                (room, worker),
+            )
+        )
+        if released:
+            self._write("DELETE FROM room_load WHERE room = ?", (room,))
+        return released
+
+    # ---------------- Charge des jobs (agent) ----------------
+    def publish_load(self, room, reports, lag_ms):
+        self._write(_SET_LOAD, (room, reports, lag_ms, self._clock()))
+
+    def load_signals(self, rooms, max_age):
+        """
+        Rapports en vol (somme) et latence de boucle (max) publiés pour `rooms`
+        depuis moins de `max_age` secondes : un job mort n'est plus compté.
+        """
+        rooms = list(rooms)
+        if not rooms:
+            return {"reports": 0, "lag_ms": 0.0}
+        with self._lock:
+            reports, lag_ms = (
+                self._conn()
+                .execute(
+                    "SELECT COALESCE(SUM(reports), 0), COALESCE(MAX(lag_ms), 0.0) FROM room_load "
+                    f"WHERE room IN ({', '.join('?' * len(rooms))}) AND updated_at > ?",
+                    (*rooms, self._clock() - max_age),
+                )
+                .fetchone()
+            )
+        return {"reports": reports, "lag_ms": lag_ms}
+
+    def clear(self):
+        self._write("DELETE FROM rooms", ())
+
+    # ---------------- Observabilité ----------------
+    def _summary(self, db, now):
+        rooms, profiles, assigned, workers = db.execute(
+            "SELECT COUNT(*), COUNT(profile), COUNT(worker), COUNT(DISTINCT worker) "
+            "FROM rooms WHERE expires_at > ?",
+            (now,),
+        ).fetchone()
+        return {
+            "rooms": rooms,
+            "profiles": profiles,
+            "assigned": assigned,
+            "workers": workers,
+        }
+
+    def summary(self):
+        """Parcourt la table : à appeler hors de la boucle (asyncio.to_thread)."""
+        with self._lock:
+            return self._summary(self._conn(), self._clock())
+
+    def close(self):
+        with self._lock:
+            if self._db is not None and self._pid == os.getpid():
+                self._db.close()
+            self._db = self._pid = None
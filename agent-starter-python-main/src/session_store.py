@@ -0,0 +1,147 @@
+"""
+Registre borné des sessions par room (TTL + éviction LRU).
+
+Remplace les dicts globaux AGENT_SESSIONS / AGENT_CONTEXT qui ne
+supprimaient jamais rien. Les entrées sont ordonnées par dernier accès ;
+avec un TTL glissant cet ordre est aussi l'ordre d'expiration, donc la
+purge et l'éviction se font en tête de l'OrderedDict, en O(1) amorti.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+_MISSING = object()
+
+
+class SessionStore(MutableMapping):
+    def __init__(
+        self, *, max_size=10_000, ttl=3600.0, sliding=True, clock=time.monotonic
+    ):
+        """
+        `ttl` en secondes (None = pas d'expiration). Si `sliding` est faux, les
+        lectures ne prolongent pas l'entrée et ne la déplacent pas : l'éviction
+        devient FIFO mais l'expiration reste absolue.
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sliding = sliding
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # ---------------- Internes ----------------
+    def _expires_at(self):
+        return None if self.ttl is None else self._clock() + self.ttl
+
+    def _purge(self):
+        now = self._clock()
+        data = self._data
+        while data:
+            key, (_, expires_at) = next(iter(data.items()))
+            if expires_at is None or expires_at > now:
+                break
+            del data[key]
+            self.expirations += 1
+
+    def _lookup(self, key, count):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= self._clock():
+                del self._data[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return _MISSING
+            if count:
+                self.hits += 1
+            if self.sliding:
+                self._data[key] = (entry[0], self._expires_at())
+                self._data.move_to_end(key)
+            return entry[0]
+
+    # ---------------- API dict ----------------
+    def __getitem__(self, key):
+        value = self._lookup(key, count=True)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        value = self._lookup(key, count=True)
+        return default if value is _MISSING else value
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and (entry[1] is None or entry[1] > self._clock())
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._data[key] = (value, self._expires_at())
+            self._data.move_to_end(key)
+            self._purge()
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._data[key]
+
+    def pop(self, key, default=_MISSING):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        if entry is None:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        return entry[0]
+
+    def __iter__(self):
+        with self._lock:
+            self._purge()
+            return iter(list(self._data))
+
+    def __len__(self):
+        with self._lock:
+            self._purge()
+            return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    # ---------------- Observabilité ----------------
+    def metrics(self):
+        with self._lock:
+            self._purge()
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def summary(self, recent=3):
+        """Résumé court pour les logs, à la place d'un dump complet."""
+        m = self.metrics()
+        with self._lock:
+            keys = list(self._data)[-recent:] if recent else []
+        return (
+            f"size={m['size']}/{m['max_size']} evictions={m['evictions']} "
+            f"expired={m['expirations']} hit_rate={m['hit_rate']:.2f} recent={keys}"
+        )
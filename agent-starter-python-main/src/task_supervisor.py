@@ -0,0 +1,115 @@
+"""
+Suivi des tâches de rapport d'une room et vidange à la fermeture.
+
+Une demande `GENERATE_REPORT` tourne en tâche de fond. Quand la room ou le
+worker s'arrête (déploiement, SIGTERM), ces tâches étaient annulées avec la
+room et le rapport perdu. Le TaskSupervisor garde une référence à chaque
+tâche, par room, et `drain` leur laisse jusqu'à une échéance pour finir.
+Celles qui restent sont annulées et leur `on_abandon` est appelé pour les
+confier à un stockage persistant (voir report_pending). Durée de vidange et
+nombre de tâches abandonnées sont exposés dans `metrics()`.
+"""
+
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger("agent.reports")
+
+
+class TaskSupervisor:
+    def __init__(self, *, clock=time.perf_counter):
+        self._clock = clock
+        # room -> {tâche: callback d'abandon ou None}
+        self._tasks = {}
+        self.spawned = 0
+        self.finished = 0
+        self.abandoned = 0
+        self.last_drain_ms = None
+
+    def spawn(self, room, coro, *, on_abandon=None):
+        """Lance `coro` pour `room` ; la tâche reste référencée jusqu'à sa fin."""
+        task = asyncio.get_running_loop().create_task(coro)
+        tasks = self._tasks.setdefault(room, {})
+        tasks[task] = on_abandon
+        self.spawned += 1
+
+        def _done(t):
+            tasks.pop(t, None)
+            if not t.cancelled():
+                self.finished += 1
+            if not tasks and self._tasks.get(room) is tasks:
+                del self._tasks[room]
+
+        task.add_done_callback(_done)
+        return task
+
+    def on_abandon(self, callback):
+        """
+        (Re)définit le callback d'abandon de la tâche courante : appelé si
+        elle est encore en cours à l'échéance de `drain`. None le retire.
+        """
+        task = asyncio.current_task()
+        for tasks in self._tasks.values():
+            if task in tasks:
+                tasks[task] = callback
+                return
+
+    def pending(self, room=None):
+        if room is not None:
+            return len(self._tasks.get(room, ()))
+        return sum(len(tasks) for tasks in self._tasks.values())
+
+    async def drain(self, room=None, *, timeout):
+        """
+        Attend les tâches de `room` (toutes si None) au plus `timeout` secondes,
+        puis annule les restantes et appelle leur callback d'abandon.
+        Retourne {"finished", "abandoned", "drain_ms"}.
+        """
+        start = self._clock()
+        rooms = [room] if room is not None else list(self._tasks)
+        tasks = {t: cb for r in rooms for t, cb in self._tasks.get(r, {}).items()}
+        if not tasks:
+            return {"finished": 0, "abandoned": 0, "drain_ms": 0.0}
+
+        done, pending = await asyncio.wait(tasks, timeout=max(0.0, timeout))
+        # Le callback peut avoir changé pendant l'attente
+        handoffs = {t: self._callback(t, tasks[t]) for t in pending}
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        for callback in handoffs.values():
+            self.abandoned += 1
+            if callback is None:
+                continue
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"❌ Rapport abandonné non sauvegardé: {e!r}")
+
+        self.last_drain_ms = round((self._clock() - start) * 1000, 1)
+        if pending:
+            logger.warning(
+                f"⚠️ {len(pending)} tâche(s) de rapport abandonnée(s) après {self.last_drain_ms} ms"
+            )
+        return {
+            "finished": len(done),
+            "abandoned": len(pending),
+            "drain_ms": self.last_drain_ms,
+        }
+
+    def _callback(self, task, default):
+        for tasks in self._tasks.values():
+            if task in tasks:
+                return tasks[task]
+        return default
+
+    def metrics(self):
+        return {
+            "pending": self.pending(),
+            "spawned": self.spawned,
+            "finished": self.finished,
+            "abandoned": self.abandoned,
+            "last_drain_ms": self.last_drain_ms,
+        }
@@ -0,0 +1,178 @@
+"""
+Mesures de latence par room : spans chronométrés, histogrammes agrégés,
+logs non bloquants et endpoint local de métriques.
+
+Un span (`with TELEMETRY.span("profile_fetch", room)`) coûte deux appels à
+`perf_counter` et une insertion dans un histogramme à seaux fixes : pas
+d'I/O sur le chemin critique. Les logs passent par une file lue par un
+thread (QueueHandler) : un `logger.info` ne fait plus d'écriture sur stdout
+dans la boucle. Les agrégats sont servis en JSON sur `GET /metrics`.
+"""
+
+import atexit
+import bisect
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from contextlib import contextmanager
+
+from session_store import SessionStore
+
+logger = logging.getLogger("agent.telemetry")
+
+# ---------------- Configuration ----------------
+# 0 = pas d'endpoint ; sinon chaque processus prend le premier port libre à partir de celui-ci
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT_RANGE = 16
+# Dernières mesures gardées par room (rooms fermées évincées par LRU + TTL)
+METRICS_ROOMS_MAX = int(os.getenv("METRICS_ROOMS_MAX", "256"))
+
+# Bornes supérieures des seaux, en millisecondes
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        # Un seau de plus pour les valeurs au-delà de la dernière borne
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def quantile(self, q):
+        """Borne supérieure du seau contenant le quantile `q` (max si hors seaux)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return float(min(bound, self.max))
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 2) if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max, 2),
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.counts)),
+        }
+
+
+class Telemetry:
+    def __init__(self, *, rooms_max=METRICS_ROOMS_MAX, clock=time.perf_counter):
+        self._clock = clock
+        self._histograms = {}
+        self._rooms = SessionStore(max_size=rooms_max, ttl=None)
+
+    def record(self, name, ms, room=None):
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = Histogram()
+        histogram.observe(ms)
+        if room is not None:
+            spans = self._rooms.get(room)
+            if spans is None:
+                spans = self._rooms[room] = {}
+            spans[name] = round(ms, 2)
+
+    @contextmanager
+    def span(self, name, room=None):
+        """Chronomètre le bloc ; enregistré même si le bloc lève une exception."""
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.record(name, (self._clock() - start) * 1000, room)
+
+    def room(self, room):
+        """Dernière durée de chaque span pour cette room."""
+        return dict(self._rooms.get(room) or {})
+
+    def snapshot(self):
+        return {
+            "spans": {
+                name: h.snapshot() for name, h in sorted(self._histograms.items())
+            },
+            "rooms": len(self._rooms),
+        }
+
+
+# Registre du processus : chaque job du worker y écrit
+TELEMETRY = Telemetry()
+
+
+# ---------------- Logs non bloquants ----------------
+def queue_logging(logger, handler):
+    """
+    Branche `handler` derrière une file : `logger` ne fait plus que mettre
+    l'enregistrement en file, un thread écrit. Retourne le QueueListener.
+    """
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(
+        records, handler, respect_handler_level=True
+    )
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    listener.start()
+
+    def flush_at_exit():
+        # Vide la file au plus tard à la sortie du processus (stop() non réentrant)
+        if listener._thread is not None:
+            listener.stop()
+
+    atexit.register(flush_at_exit)
+    return listener
+
+
+# ---------------- Endpoint ----------------
+async def start_metrics_server(
+    telemetry=TELEMETRY, *, host=METRICS_HOST, port=METRICS_PORT, extra=None
+):
+    """
+    Sert `GET /metrics` (JSON). `extra()` peut ajouter des compteurs (outbox,
+    cache...). Retourne (runner, port) ou (None, None) si désactivé.
+    """
+    from aiohttp import web
+
+    async def metrics(request):
+        payload = telemetry.snapshot()
+        room = request.query.get("room")
+        if room:
+            payload["room"] = {"name": room, "spans": telemetry.room(room)}
+        if extra is not None:
+            payload.update(extra())
+        return web.json_response(payload)
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    # Plusieurs processus de jobs par worker : on prend le premier port libre
+    candidates = [port] if port == 0 else range(port, port + METRICS_PORT_RANGE)
+    for candidate in candidates:
+        site = web.TCPSite(runner, host, candidate)
+        try:
+            await site.start()
+        except OSError:
+            continue
+        bound = site._server.sockets[0].getsockname()[1]
+        logger.info(f"📈 Métriques sur http://{host}:{bound}/metrics")
+        return runner, bound
+    await runner.cleanup()
+    logger.warning(f"⚠️ Aucun port libre pour les métriques à partir de {port}")
+    return None, None
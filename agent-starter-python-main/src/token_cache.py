@@ -0,0 +1,75 @@
+"""
+Cache des tokens d'accès LiveKit signés par /getConnectionDetails.
+
+Une tempête de reconnexions (même identité, même room, à quelques secondes
+d'intervalle) ne doit pas se transformer en rafale de signatures JWT. Les
+tokens sont mis en cache par (room, identité, nom, grants), bornés en
+taille, et expirent bien avant l'expiration du token lui-même.
+"""
+
+import datetime
+import os
+
+from livekit import api
+
+from session_store import SessionStore
+
+# ---------------- Configuration ----------------
+TOKEN_TTL_S = float(os.getenv("TOKEN_TTL_S", str(6 * 3600)))
+TOKEN_CACHE_TTL_S = float(os.getenv("TOKEN_CACHE_TTL_S", "300"))
+TOKEN_CACHE_MAX = int(os.getenv("TOKEN_CACHE_MAX", "10000"))
+# Durée de validité minimale restante d'un token servi depuis le cache
+TOKEN_MIN_REMAINING_S = 600.0
+
+
+class TokenCache:
+    def __init__(
+        self,
+        api_key,
+        api_secret,
+        *,
+        token_ttl=TOKEN_TTL_S,
+        cache_ttl=TOKEN_CACHE_TTL_S,
+        max_size=TOKEN_CACHE_MAX,
+        clock=None,
+    ):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.token_ttl = token_ttl
+        # Un token servi depuis le cache garde toujours au moins
+        # TOKEN_MIN_REMAINING_S de validité (ou la moitié de son TTL si plus court)
+        ttl = min(cache_ttl, token_ttl - min(TOKEN_MIN_REMAINING_S, token_ttl / 2))
+        self.enabled = ttl > 0 and max_size > 0
+        kwargs = {"clock": clock} if clock is not None else {}
+        self._store = SessionStore(
+            max_size=max(max_size, 1), ttl=max(ttl, 0), sliding=False, **kwargs
+        )
+        self.signed = 0
+
+    def sign(self, room, identity, name, **grants):
+        self.signed += 1
+        return (
+            api.AccessToken(self.api_key, self.api_secret)
+            .with_identity(identity)
+            .with_name(name)
+            .with_ttl(datetime.timedelta(seconds=self.token_ttl))
+            .with_grants(api.VideoGrants(room=room, **grants))
+            .to_jwt()
+        )
+
+    def token(self, room, identity, name, **grants):
+        """Retourne un JWT pour ces paramètres, signé seulement en cas de miss."""
+        if not self.enabled:
+            return self.sign(room, identity, name, **grants)
+
+        key = (room, identity, name, tuple(sorted(grants.items())))
+        jwt = self._store.get(key)
+        if jwt is None:
+            jwt = self.sign(room, identity, name, **grants)
+            self._store[key] = jwt
+        return jwt
+
+    def metrics(self):
+        metrics = self._store.metrics()
+        metrics["signed"] = self.signed
+        return metrics
@@ -0,0 +1,273 @@
+"""
+Transcription incrémentale des sessions, écrite hors de la boucle.
+
+Remplace `log_conversation`, qui relisait et journalisait tout l'historique
+à chaque appel (coût quadratique sur une session, print + flush bloquants).
+Chaque tour n'est traité qu'une fois : il est anonymisé (nom, identifiant et
+coordonnées du profil), gardé dans un tampon circulaire de la room, puis mis
+en file pour un thread d'écriture unique par processus qui ajoute la ligne
+au fichier de la room et fait tourner les fichiers trop gros. L'écho dans
+les logs est limité en débit.
+"""
+
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger("agent.transcript")
+
+# ---------------- Configuration ----------------
+TRANSCRIPT_DIR = os.getenv("TRANSCRIPT_DIR", "transcripts")
+TRANSCRIPT_MAX_BYTES = int(os.getenv("TRANSCRIPT_MAX_BYTES", str(1024 * 1024)))
+TRANSCRIPT_BACKUPS = int(os.getenv("TRANSCRIPT_BACKUPS", "3"))
+# Derniers tours gardés en mémoire par room
+TRANSCRIPT_RING = int(os.getenv("TRANSCRIPT_RING", "200"))
+# Tours recopiés dans les logs par seconde (0 = aucun)
+TRANSCRIPT_LOG_RATE = float(os.getenv("TRANSCRIPT_LOG_RATE", "2"))
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE = re.compile(r"(?<!\w)\+?\d[\d .-]{7,}\d(?!\w)")
+# Identifiant plus court : trop proche d'un âge, d'une heure ou d'un score
+_MIN_ID_LEN = 4
+
+
+def redactor(profile):
+    """Fonction `texte -> texte` masquant les données identifiantes du profil."""
+    names = set()
+    for key in ("name", "last_name", "first_name"):
+        names.update(
+            p
+            for p in str(profile.get(key) or "").split()
+            if len(p) > 1 and p != "Unknown"
+        )
+    ids = {
+        str(v)
+        for v in (profile.get("id"), profile.get("user_id"))
+        if v and v != "unknown" and len(str(v)) >= _MIN_ID_LEN
+    }
+    name_re = (
+        re.compile(
+            r"\b(?:"
+            + "|".join(map(re.escape, sorted(names, key=len, reverse=True)))
+            + r")\b",
+            re.IGNORECASE,
+        )
+        if names
+        else None
+    )
+    # Identifiant entier seulement : "4821" ne touche pas "14821" ni "48210"
+    id_re = (
+        re.compile(
+            r"(?<!\w)(?:"
+            + "|".join(map(re.escape, sorted(ids, key=len, reverse=True)))
+            + r")(?!\w)"
+        )
+        if ids
+        else None
+    )
+
+    def redact(text):
+        text = _EMAIL.sub("[EMAIL]", text)
+        text = _PHONE.sub("[PHONE]", text)
+        if id_re is not None:
+            text = id_re.sub("[ID]", text)
+        if name_re is not None:
+            text = name_re.sub("[NAME]", text)
+        return text
+
+    return redact
+
+
+class TranscriptWriter:
+    """Thread d'écriture partagé par toutes les rooms du processus."""
+
+    def __init__(
+        self,
+        directory=TRANSCRIPT_DIR,
+        *,
+        max_bytes=TRANSCRIPT_MAX_BYTES,
+        backups=TRANSCRIPT_BACKUPS,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # Utilisés uniquement par le thread d'écriture
+        self._files = {}
+        self.lines = 0
+        self.rotations = 0
+
+    def write(self, room, line):
+        """Met la ligne en file ; ne fait aucune I/O dans l'appelant."""
+        self._ensure_started()
+        self._queue.put((room, line))
+
+    def close_room(self, room):
+        self._ensure_started()
+        self._queue.put((room, None))
+
+    def flush(self, timeout=None):
+        """Attend que tout ce qui est en file soit écrit (tests, arrêt)."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put((None, done))
+        return done.wait(timeout)
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put((None, None))
+            self._thread.join()
+            self._thread = None
+
+    def path(self, room):
+        safe = re.sub(r"[^\w.-]", "_", room)
+        return os.path.join(self.directory, f"{safe}.jsonl")
+
+    # ---------------- Thread d'écriture ----------------
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="transcript-writer", daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        os.makedirs(self.directory, exist_ok=True)
+        while True:
+            room, item = self._queue.get()
+            if room is None:
+                if item is None:
+                    break
+                item.set()
+                continue
+            try:
+                if item is None:
+                    f = self._files.pop(room, None)
+                    if f is not None:
+                        f.close()
+                else:
+                    self._append(room, item)
+            except OSError as e:
+                logger.error(
+                    f"❌ Écriture de la transcription {room} impossible: {e!r}"
+                )
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def _append(self, room, line):
+        f = self._files.get(room)
+        if f is None:
+            # Fichier gardé ouvert pour la room, fermé à la rotation ou par close()
+            f = self._files[room] = open(self.path(room), "a", encoding="utf-8")  # noqa: SIM115
+        f.write(line)
+        f.flush()
+        self.lines += 1
+        if f.tell() >= self.max_bytes:
+            f.close()
+            self._rotate(self.path(room))
+            self._files[room] = open(self.path(room), "a", encoding="utf-8")  # noqa: SIM115
+
+    def _rotate(self, path):
+        self.rotations += 1
+        if self.backups <= 0:
+            os.remove(path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{path}.{i}"):
+                os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+        os.replace(path, f"{path}.1")
+
+
+# Écrivain du processus, démarré au premier tour
+TRANSCRIPTS = TranscriptWriter()
+
+
+class TranscriptSink:
+    """Transcription d'une room : chaque tour est traité une seule fois."""
+
+    def __init__(
+        self,
+        room,
+        profile=None,
+        *,
+        writer=TRANSCRIPTS,
+        ring_size=TRANSCRIPT_RING,
+        log_rate=TRANSCRIPT_LOG_RATE,
+        clock=time.monotonic,
+    ):
+        self.room = room
+        self._redact = redactor(profile or {})
+        self._writer = writer
+        self._ring = deque(maxlen=ring_size)
+        self._log_rate = log_rate
+        self._log_tokens = 1.0
+        self._log_updated = clock()
+        self._clock = clock
+        # Nombre de tours déjà traités : `sync` repart de là
+        self.cursor = 0
+        self.suppressed = 0
+
+    def add(self, speaker, text):
+        self.cursor += 1
+        text = self._redact(text)
+        turn = {
+            "i": self.cursor,
+            "t": round(time.time(), 3),
+            "speaker": speaker,
+            "text": text,
+        }
+        self._ring.append(turn)
+        if self._writer is not None:
+            self._writer.write(self.room, json.dumps(turn, ensure_ascii=False) + "\n")
+        self._echo(speaker, text)
+
+    def sync(self, conversation):
+        """Ajoute les tours de `conversation` au-delà du curseur (historique complet en entrée)."""
+        for turn in conversation[self.cursor :]:
+            if "question" in turn:
+                self.add("AI", turn["question"])
+            elif "answer" in turn:
+                self.add("Patient", turn["answer"])
+            else:
+                self.add(turn.get("speaker", "Patient"), turn.get("text", ""))
+
+    def _echo(self, speaker, text):
+        if self._log_rate <= 0:
+            return
+        now = self._clock()
+        self._log_tokens = min(
+            1.0, self._log_tokens + (now - self._log_updated) * self._log_rate
+        )
+        self._log_updated = now
+        if self._log_tokens < 1:
+            self.suppressed += 1
+            return
+        self._log_tokens -= 1
+        icon = "🤖" if speaker == "AI" else "💬"
+        logger.info(f"{icon} [{self.room}] {speaker}: {text[:200]}")
+
+    @property
+    def recent(self):
+        return list(self._ring)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close_room(self.room)
+
+    def stats(self):
+        return {
+            "turns": self.cursor,
+            "buffered": len(self._ring),
+            "log_suppressed": self.suppressed,
+        }
@@ -0,0 +1,100 @@
+"""
+Audio pré-synthétisé des phrases fixes de l'agent (message d'accueil...).
+
+Chaque room prononçait la même phrase d'ouverture en passant par le TTS :
+un aller-retour réseau complet avant le premier son. Les trames audio sont
+synthétisées une fois par processus, pendant `prewarm`, dans un thread avec
+sa propre boucle (prewarm tourne hors boucle), puis rejouées directement
+via `session.say(text, audio=...)`. Tant que le cache n'est pas prêt, ou si
+la synthèse a échoué, la phrase passe par le TTS comme avant.
+
+Hors job, LiveKit n'ouvre aucun contexte HTTP (`utils.http_context`) : le TTS
+de la pré-synthèse reçoit donc ses clients explicitement. `open_tts()` rend un
+gestionnaire de contexte asynchrone qui fournit le TTS et ferme ses clients à
+la sortie, dans la boucle du thread.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger("agent.tts")
+
+GREETING = "Hello, my name is Dr. Mira. I will ask you a few quick questions about how you feel."
+STATIC_UTTERANCES = (GREETING,)
+
+
+class UtteranceCache:
+    def __init__(self):
+        # (voix, texte) -> trames audio
+        self._audio = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.synth_ms = {}
+
+    def get(self, voice, text):
+        with self._lock:
+            frames = self._audio.get((voice, text))
+        if frames is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return frames
+
+    async def synthesize(self, tts, voice, text):
+        """Synthétise `text` avec `tts` et garde toutes les trames."""
+        start = time.perf_counter()
+        frames = []
+        async with tts.synthesize(text) as stream:
+            async for audio in stream:
+                frames.append(audio.frame)
+        if not frames:
+            raise RuntimeError(f"TTS returned no audio for {text!r}")
+        with self._lock:
+            self._audio[(voice, text)] = frames
+        self.synth_ms[text] = round((time.perf_counter() - start) * 1000, 1)
+        return frames
+
+    async def _fill(self, open_tts, voice, texts):
+        async with open_tts() as tts:
+            for text in texts:
+                await self.synthesize(tts, voice, text)
+
+    def fill_in_background(self, open_tts, voice, texts=STATIC_UTTERANCES):
+        """Lance la synthèse dans un thread ; retourne le thread (déjà démarré)."""
+
+        def run():
+            try:
+                asyncio.run(self._fill(open_tts, voice, texts))
+                logger.info(
+                    f"🔊 {len(texts)} phrase(s) pré-synthétisée(s) pour {voice}: {self.synth_ms}"
+                )
+            except Exception as e:
+                logger.warning(
+                    f"⚠️ Pré-synthèse impossible ({voice}), TTS en direct: {e!r}"
+                )
+
+        thread = threading.Thread(target=run, name="utterance-cache", daemon=True)
+        thread.start()
+        return thread
+
+    def say(self, session, voice, text, **kwargs):
+        """`session.say` avec l'audio en cache s'il existe, sinon via le TTS."""
+        frames = self.get(voice, text)
+        if frames is None:
+            return session.say(text, **kwargs)
+        return session.say(text, audio=_replay(frames), **kwargs)
+
+    def metrics(self):
+        return {"cached": len(self._audio), "hits": self.hits, "misses": self.misses}
+
+
+async def _replay(frames):
+    for frame in frames:
+        yield frame
+
+
+# Cache du processus, rempli dans prewarm
+UTTERANCES = UtteranceCache()
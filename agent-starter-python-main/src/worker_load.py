@@ -0,0 +1,177 @@
+"""
+Charge du worker et admission des jobs.
+
+La charge par défaut de LiveKit ne regarde que le CPU, alors qu'une room en
+conversation et un rapport Gemini en vol coûtent des choses très
+différentes. Ici la charge est le maximum de plusieurs ratios, chacun
+rapporté à son budget : rooms actives, rapports en cours de génération,
+latence de la boucle d'événements et CPU. Au-delà de
+WORKER_LOAD_THRESHOLD, LiveKit cesse d'envoyer des jobs au worker et
+`request_fnc` refuse ceux qui arrivent malgré tout, avant que la latence des
+rooms déjà ouvertes ne se dégrade.
+
+Chaque room vit dans son propre processus (exécuteur `process` de
+LiveKit) : rapports en vol et latence de boucle n'existent que là. Le job
+les publie toutes les WORKER_LOAD_PUBLISH_S dans l'annuaire des rooms
+(session_directory), et `load_fnc`, que LiveKit appelle dans un thread du
+worker, les y relit pour ses rooms actives.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+
+logger = logging.getLogger("agent.load")
+
+# ---------------- Configuration ----------------
+WORKER_MAX_ROOMS = int(os.getenv("WORKER_MAX_ROOMS", "20"))
+WORKER_MAX_REPORTS = int(os.getenv("WORKER_MAX_REPORTS", "8"))
+WORKER_MAX_LOOP_LAG_MS = float(os.getenv("WORKER_MAX_LOOP_LAG_MS", "100"))
+WORKER_MAX_CPU = float(os.getenv("WORKER_MAX_CPU", "0.9"))
+WORKER_LOAD_THRESHOLD = float(os.getenv("WORKER_LOAD_THRESHOLD", "0.8"))
+# Rythme de rafraîchissement de la charge par LiveKit (UPDATE_LOAD_INTERVAL)
+WORKER_LOAD_PUBLISH_S = 0.5
+# Au-delà, la charge publiée est celle d'un job mort ou figé : ignorée
+WORKER_LOAD_MAX_AGE_S = 5.0
+
+
+class LoopLagMonitor:
+    """Retard de réveil de la boucle, lissé (moyenne exponentielle) et pic récent."""
+
+    def __init__(self, *, interval=0.05, smoothing=0.2, clock=time.perf_counter):
+        self.interval = interval
+        self.smoothing = smoothing
+        self._clock = clock
+        self._task = None
+        self.lag_ms = 0.0
+        self.peak_ms = 0.0
+
+    def observe(self, lag_ms):
+        self.lag_ms += self.smoothing * (lag_ms - self.lag_ms)
+        # Le pic décroît pour qu'un ancien à-coup ne bloque pas l'admission
+        self.peak_ms = max(lag_ms, self.peak_ms * (1 - self.smoothing))
+
+    async def _run(self):
+        while True:
+            start = self._clock()
+            await asyncio.sleep(self.interval)
+            self.observe(max(0.0, (self._clock() - start - self.interval) * 1000))
+
+    def start(self):
+        """Démarre la mesure dans la boucle courante (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Mesure du processus, démarrée par le premier job
+LOOP_LAG = LoopLagMonitor()
+
+
+def _cpu_percent():
+    try:
+        import psutil
+    except ImportError:
+        return 0.0
+    # Non bloquant : moyenne depuis l'appel précédent
+    return psutil.cpu_percent(interval=None) / 100
+
+
+class LoadPolicy:
+    def __init__(
+        self,
+        *,
+        max_rooms=WORKER_MAX_ROOMS,
+        max_reports=WORKER_MAX_REPORTS,
+        max_loop_lag_ms=WORKER_MAX_LOOP_LAG_MS,
+        max_cpu=WORKER_MAX_CPU,
+        threshold=WORKER_LOAD_THRESHOLD,
+        cpu=_cpu_percent,
+    ):
+        self.max_rooms = max_rooms
+        self.max_reports = max_reports
+        self.max_loop_lag_ms = max_loop_lag_ms
+        self.max_cpu = max_cpu
+        self.threshold = threshold
+        self._cpu = cpu
+        # Derniers signaux vus par `load` (rafraîchis par LiveKit), réutilisés par `admit`
+        self.signals = {"rooms": 0, "reports": 0, "lag_ms": 0.0}
+        self.accepted = 0
+        self.rejected = 0
+
+    def components(self, *, rooms, reports, lag_ms, cpu=None):
+        """Chaque signal rapporté à son budget (1.0 = budget atteint)."""
+        cpu = self._cpu() if cpu is None else cpu
+        return {
+            "rooms": rooms / self.max_rooms,
+            "reports": reports / self.max_reports,
+            "loop_lag": lag_ms / self.max_loop_lag_ms,
+            "cpu": cpu / self.max_cpu,
+        }
+
+    def load(self, **signals):
+        self.signals = signals
+        return min(1.0, max(self.components(**signals).values()))
+
+    def admit(self, **signals):
+        """
+        (accepté, signal le plus chargé, charge) pour un nouveau job ; sans
+        signaux, utilise les derniers passés à `load`.
+        """
+        fresh = bool(signals)
+        parts = self.components(**(signals or self.signals))
+        # Une room de plus : le job entrant compte déjà dans les rooms
+        parts["rooms"] += 1 / self.max_rooms
+        busiest = max(parts, key=parts.get)
+        load = min(1.0, parts[busiest])
+        accepted = load <= self.threshold
+        if accepted:
+            self.accepted += 1
+            if not fresh:
+                # Jusqu'au prochain `load`, les jobs acceptés entre-temps comptent
+                self.signals = {**self.signals, "rooms": self.signals["rooms"] + 1}
+        else:
+            self.rejected += 1
+        return accepted, busiest, round(load, 3)
+
+
+def worker_signals(active_rooms, report_engine, monitor=LOOP_LAG):
+    """
+    Signaux de charge du processus courant ; `lag_ms` retient le pic récent.
+    `reports` vient du moteur : il compte tous les appels Gemini (rapports
+    demandés, préparations spéculatives, reprises), pas seulement le cache.
+    """
+    return {
+        "rooms": active_rooms,
+        "reports": report_engine.in_flight,
+        "lag_ms": max(monitor.lag_ms, monitor.peak_ms),
+    }
+
+
+def job_signals(directory, rooms, *, max_age=WORKER_LOAD_MAX_AGE_S):
+    """Signaux du worker : ses rooms actives et la charge qu'y publient leurs jobs."""
+    rooms = list(rooms)
+    return {"rooms": len(rooms), **directory.load_signals(rooms, max_age)}
+
+
+async def publish_job_load(
+    directory, room, report_engine, *, monitor=LOOP_LAG, interval=WORKER_LOAD_PUBLISH_S
+):
+    """Boucle du processus de job : publie ses signaux pour le worker, jusqu'à annulation."""
+    while True:
+        signals = worker_signals(0, report_engine, monitor)
+        try:
+            await asyncio.to_thread(
+                directory.publish_load, room, signals["reports"], signals["lag_ms"]
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Charge de {room} non publiée: {e!r}")
+        await asyncio.sleep(interval)
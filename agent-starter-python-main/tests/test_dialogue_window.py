@@ -0,0 +1,89 @@
+import pytest
+
+from dialogue_window import DialogueWindow, compact_dialogue
+from prompts import build_report_prompt
+
+
+def _session(turns):
+    dialogue = []
+    for i in range(turns):
+        dialogue.append({"speaker": "AI", "text": f"Question {i}: how was your day?"})
+        dialogue.append(
+            {
+                "speaker": "Patient",
+                "text": f"Day {i} was ordinary, I went to work and came home tired.",
+            }
+        )
+    return dialogue
+
+
+def test_short_session_is_not_compacted() -> None:
+    dialogue = _session(5)
+    summary, recent = compact_dialogue(dialogue, keep_last=20)
+    assert summary == ""
+    assert recent == dialogue
+
+
+def test_recent_turns_are_kept_verbatim() -> None:
+    dialogue = _session(50)
+    summary, recent = compact_dialogue(dialogue, keep_last=10)
+
+    assert recent == dialogue[-10:]
+    assert "Day 0 was ordinary" in summary
+    assert "Question 0" not in summary
+
+
+def test_short_answers_keep_their_question() -> None:
+    dialogue = [
+        {"speaker": "AI", "text": "Do you live alone?"},
+        {"speaker": "Patient", "text": "Yes."},
+        *_session(10),
+    ]
+    summary, _ = compact_dialogue(dialogue, keep_last=4)
+    assert "- Do you live alone? -> Yes." in summary
+
+
+def test_risk_statements_survive_a_tight_budget() -> None:
+    dialogue = [
+        {"speaker": "AI", "text": "Any thoughts of hurting yourself?"},
+        {
+            "speaker": "Patient",
+            "text": "Sometimes I think about suicide when I can't sleep.",
+        },
+        {"speaker": "Patient", "text": "I drink alcohol most nights to calm down."},
+        *_session(200),
+    ]
+    window = DialogueWindow(keep_last=10, summary_chars=400).extend(dialogue)
+
+    assert "suicide" in window.summary
+    assert "alcohol" in window.summary
+    assert len(window.summary) <= 400
+    assert "Day 0 was ordinary" not in window.summary
+    assert window.stats()["dropped_facts"] > 0
+
+
+def test_incremental_matches_batch() -> None:
+    dialogue = _session(30)
+    window = DialogueWindow(keep_last=8, summary_chars=1000)
+    folded = [window.add(t["speaker"], t["text"]) for t in dialogue]
+
+    assert folded.count(True) == len(dialogue) - 8
+    assert (window.summary, window.recent) == compact_dialogue(
+        dialogue, keep_last=8, summary_chars=1000
+    )
+
+
+def test_legacy_question_answer_turns() -> None:
+    dialogue = [{"question": "How old are you?"}, {"answer": "31"}, *_session(5)]
+    summary, _ = compact_dialogue(dialogue, keep_last=2)
+    assert "How old are you? -> 31" in summary
+
+
+def test_report_prompt_stays_bounded() -> None:
+    sizes = []
+    for turns in (100, 1000):
+        summary, recent = compact_dialogue(
+            _session(turns), keep_last=20, summary_chars=2000
+        )
+        sizes.append(len(build_report_prompt({}, recent, "s", summary)))
+    assert sizes[1] == pytest.approx(sizes[0], rel=0.05)
@@ -0,0 +1,180 @@
+import types
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import agent
+from http_client import BackendClient
+from session_directory import SessionDirectory
+
+
+async def _serve(routes):
+    app = web.Application()
+    app.add_routes(routes)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+@pytest.mark.asyncio
+async def test_reuses_one_session_and_connection() -> None:
+    peers = set()
+
+    async def profile(request):
+        peers.add(request.transport.get_extra_info("peername"))
+        return web.json_response({"profile": {"room": request.query["room"]}})
+
+    server = await _serve([web.get("/getProfile", profile)])
+    client = BackendClient()
+    try:
+        for i in range(5):
+            resp = await client.get(
+                server.make_url("/getProfile"), params={"room": str(i)}
+            )
+            assert resp.json() == {"profile": {"room": str(i)}}
+        assert len(peers) == 1
+    finally:
+        await client.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_get_retries_on_503() -> None:
+    calls = 0
+
+    async def flaky(request):
+        nonlocal calls
+        calls += 1
+        if calls < 3:
+            return web.Response(status=503)
+        return web.json_response({"ok": True})
+
+    server = await _serve([web.get("/flaky", flaky)])
+    client = BackendClient(retries=3, backoff_base=0.001)
+    try:
+        resp = await client.get(server.make_url("/flaky"))
+        assert resp.ok
+        assert calls == 3
+    finally:
+        await client.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_post_is_not_replayed_on_server_error() -> None:
+    calls = 0
+
+    async def report(request):
+        nonlocal calls
+        calls += 1
+        return web.Response(status=503, text="down")
+
+    server = await _serve([web.post("/api/reports", report)])
+    client = BackendClient(retries=3, backoff_base=0.001)
+    try:
+        resp = await client.post_json(server.make_url("/api/reports"), {"a": 1})
+        assert resp.status == 503
+        assert resp.text == "down"
+        assert calls == 1
+    finally:
+        await client.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_connection_refused_raises_after_retries() -> None:
+    client = BackendClient(retries=1, backoff_base=0.001)
+    with pytest.raises(aiohttp.ClientConnectorError):
+        await client.get("http://127.0.0.1:9/unreachable")
+    await client.close()
+
+
+def test_backoff_is_jittered_and_capped() -> None:
+    client = BackendClient(backoff_base=0.1, backoff_max=0.5)
+    delays = [client.backoff(10) for _ in range(50)]
+    assert all(0 <= d <= 0.5 for d in delays)
+    assert len(set(delays)) > 1
+
+
+class _Outbox:
+    stopped = 0
+
+    def start(self):
+        pass
+
+    async def flush(self, timeout):
+        return True
+
+    async def stop(self):
+        self.stopped += 1
+
+
+@pytest.mark.asyncio
+async def test_process_client_is_closed_after_the_last_job() -> None:
+    async def ok(request):
+        return web.json_response({"ok": True})
+
+    server = await _serve([web.get("/ok", ok)])
+    client = BackendClient()
+    userdata = {"http": client, "outbox": _Outbox()}
+    try:
+        agent.job_started(userdata)
+        agent.job_started(userdata)
+        await client.get(str(server.make_url("/ok")))
+        session = client.session
+
+        # Une autre room est encore en cours de fermeture : le pool reste ouvert
+        assert await agent.job_finished(userdata) is False
+        assert not session.closed
+        assert await agent.job_finished(userdata) is True
+        assert session.closed and userdata["outbox"].stopped == 1
+
+        # Job suivant dans le même processus : session rouverte à la demande
+        agent.job_started(userdata)
+        assert (await client.get(str(server.make_url("/ok")))).ok
+        assert await agent.job_finished(userdata) is True
+    finally:
+        await client.close()
+        await server.close()
+
+
+class _Backend:
+    closed = False
+
+    async def post_json(self, url, payload, retries=None):
+        return None
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_failed_job_setup_still_releases_the_process_client(
+    monkeypatch, tmp_path
+) -> None:
+    async def broken_resume(room_name, outbox):
+        raise ValueError("bad pending file")
+
+    monkeypatch.setattr(
+        agent, "DIRECTORY", SessionDirectory(str(tmp_path / "d.sqlite3"))
+    )
+    monkeypatch.setattr(agent, "resume_pending_reports", broken_resume)
+    userdata = {"http": _Backend(), "outbox": _Outbox()}
+    callbacks = []
+    ctx = types.SimpleNamespace(
+        room=types.SimpleNamespace(name="room-broken"),
+        proc=types.SimpleNamespace(userdata=userdata),
+        add_shutdown_callback=callbacks.append,
+    )
+
+    with pytest.raises(ValueError):
+        await agent.entrypoint(ctx)
+    # LiveKit appelle les callbacks d'arrêt même quand l'entrypoint a échoué
+    for callback in callbacks:
+        await callback()
+
+    assert userdata["active_jobs"] == 0
+    assert userdata["http"].closed and userdata["outbox"].stopped == 1
+    assert agent.DIRECTORY.worker("room-broken") is None
@@ -0,0 +1,110 @@
+import asyncio
+import gc
+import random
+
+import pytest
+
+from job_state import JobRegistry
+from session_store import SessionStore
+from transcript import TranscriptSink
+
+
+async def _fake_job(jobs, room, rng):
+    """Cycle de vie d'un job : profil, tours de parole, rapport, fermeture."""
+    state = jobs.open(room)
+    await asyncio.sleep(rng.random() * 0.01)
+    state.profile = {"id": f"patient-{room}", "name": "Jane Doe"}
+    state.transcript = TranscriptSink(room, state.profile, writer=None, log_rate=0)
+    for turn in range(20):
+        state.transcript.add("Patient", f"turn {turn} from {room}")
+        # Les autres jobs avancent entre deux tours
+        await asyncio.sleep(0)
+        assert state.patient_id == f"patient-{room}"
+    state.report_generated = True
+    await asyncio.sleep(rng.random() * 0.01)
+    turns = [t["text"] for t in state.transcript.recent]
+    jobs.close(room)
+    return turns
+
+
+@pytest.mark.asyncio
+async def test_many_concurrent_jobs_keep_separate_state() -> None:
+    jobs = JobRegistry(SessionStore(max_size=1000, ttl=None))
+    rng = random.Random(7)
+    rooms = [f"room-{i}" for i in range(300)]
+
+    results = await asyncio.gather(*(_fake_job(jobs, room, rng) for room in rooms))
+
+    for room, turns in zip(rooms, results):
+        assert len(turns) == 20
+        assert all(text.endswith(f"from {room}") for text in turns)
+    assert len(jobs) == 0
+    assert jobs.summary() == {"open": 0, "opened": 300, "closed": 300}
+    assert jobs.leaks() == []
+
+
+def test_close_clears_state_and_detects_leaks() -> None:
+    now = [0.0]
+    jobs = JobRegistry(clock=lambda: now[0])
+    held = jobs.open("room-a")
+    held.profile = {"id": "p1"}
+    jobs.open("room-b")
+
+    assert jobs.close("room-a") is held
+    assert jobs.close("room-a") is None
+    jobs.close("room-b")
+
+    assert held.closed and held.profile == {}
+    # Encore référencé ici : fuite, mais seulement une fois le délai de grâce passé
+    assert jobs.leaks(older_than=30) == []
+    now[0] += 60
+    assert jobs.leaks(older_than=30) == ["room-a"]
+    del held
+    assert jobs.leaks() == []
+
+
+def test_check_is_rate_limited() -> None:
+    now = [0.0]
+    jobs = JobRegistry(clock=lambda: now[0])
+    held = jobs.open("room-a")
+    jobs.close("room-a")
+
+    now[0] += 60
+    assert jobs.check(older_than=30) == ["room-a"]
+    # Vérifié il y a moins de 30 s : pas de nouveau parcours
+    now[0] += 10
+    assert jobs.check(older_than=30) == []
+    now[0] += 30
+    assert jobs.check(older_than=30) == ["room-a"]
+    assert held.closed
+
+
+def test_reopen_closes_previous_state_and_slots_reject_unknown_fields() -> None:
+    jobs = JobRegistry()
+    first = jobs.open("room-a")
+    second = jobs.open("room-a")
+
+    assert first.closed and not second.closed
+    assert jobs.get("room-a") is second
+    with pytest.raises(AttributeError):
+        second.conversation_history = []
+
+
+def test_leak_check_only_collects_when_a_closed_state_is_overdue(monkeypatch) -> None:
+    now = [0.0]
+    jobs = JobRegistry(clock=lambda: now[0])
+    collections = []
+    monkeypatch.setattr(gc, "collect", lambda: collections.append(1))
+
+    # Démarrage de jobs sans état fermé en retard : jamais de GC complet (il bloque la boucle)
+    for i in range(50):
+        jobs.open(f"room-{i}")
+        assert jobs.check(older_than=30) == []
+    held = jobs.close("room-0")  # encore référencé : candidat à la fuite
+    now[0] += 10
+    assert jobs.leaks(older_than=30) == []
+    assert collections == []
+
+    now[0] += 30
+    assert jobs.leaks(older_than=30) == ["room-0"]
+    assert collections == [1] and held.closed
@@ -0,0 +1,79 @@
+import sys
+import threading
+import time
+
+from model_registry import ModelRegistry
+
+
+def test_loader_runs_once_and_is_shared() -> None:
+    registry = ModelRegistry()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return object()
+
+    first = registry.load("vad", loader)
+    second = registry.load("vad", loader)
+
+    assert first is second
+    assert registry.get("vad") is first
+    assert len(calls) == 1
+    assert registry.stats()["vad"]["hits"] == 1
+
+
+def test_concurrent_first_load_is_serialized() -> None:
+    registry = ModelRegistry()
+    calls = []
+    results = []
+
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(registry.load("vad", slow_loader))
+        )
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_stats_report_load_time_and_memory() -> None:
+    registry = ModelRegistry()
+    registry.load("blob", lambda: (time.sleep(0.02), bytearray(20 * 1024 * 1024))[1])
+
+    stats = registry.stats()["blob"]
+    assert stats["load_s"] >= 0.02
+    assert stats["rss_delta_mb"] >= 10
+    assert "blob" in registry
+
+
+def test_concurrent_hits_are_all_counted() -> None:
+    registry = ModelRegistry()
+    # Intervalle de bascule minimal : les threads s'entrelacent au milieu des `+=`
+    switch = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [
+            threading.Thread(
+                target=lambda: [registry.load("vad", object) for _ in range(2000)]
+            )
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(switch)
+
+    assert registry.stats()["vad"]["hits"] == 8 * 2000 - 1
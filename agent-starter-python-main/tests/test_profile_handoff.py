@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from werkzeug.serving import make_server
+
+import agent
+import server
+from http_client import BackendClient
+from session_directory import SessionDirectory
+
+
+@pytest.fixture(autouse=True)
+def directory(monkeypatch, tmp_path):
+    # Le serveur et l'agent partagent l'annuaire, comme sur une même machine
+    directory = SessionDirectory(str(tmp_path / "directory.sqlite3"))
+    monkeypatch.setattr(server, "AGENT_CONTEXT", directory)
+    monkeypatch.setattr(agent, "DIRECTORY", directory)
+    return directory
+
+
+@pytest.fixture
+def profile_server(monkeypatch):
+    httpd = make_server("127.0.0.1", 0, server.app, threaded=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(
+        agent, "PROFILE_SERVER_URL", f"http://127.0.0.1:{httpd.server_port}"
+    )
+    server.AGENT_CONTEXT.clear()
+    yield server.app.test_client()
+    httpd.shutdown()
+    server.AGENT_CONTEXT.clear()
+
+
+def test_wait_profile_returns_immediately_when_stored(profile_server) -> None:
+    profile_server.post("/connectAgent", json={"room": "r1", "profile": {"age": 30}})
+
+    start = time.perf_counter()
+    resp = profile_server.get("/waitProfile", query_string={"room": "r1", "timeout": 5})
+
+    assert resp.status_code == 200
+    assert resp.get_json() == {"profile": {"age": 30}}
+    assert time.perf_counter() - start < 1
+
+
+def test_wait_profile_times_out_with_404(profile_server) -> None:
+    resp = profile_server.get(
+        "/waitProfile", query_string={"room": "none", "timeout": 0.05}
+    )
+    assert resp.status_code == 404
+
+
+@pytest.mark.parametrize("timeout", ["nan", "inf", "abc"])
+def test_wait_profile_rejects_invalid_timeout(profile_server, timeout) -> None:
+    resp = profile_server.get(
+        "/waitProfile", query_string={"room": "none", "timeout": timeout}
+    )
+    assert resp.status_code == 400
+    assert resp.get_json() == {"error": "invalid timeout"}
+
+
+@pytest.mark.asyncio
+async def test_agent_wakes_up_when_profile_is_pushed(profile_server) -> None:
+    backend = BackendClient()
+
+    def push_later():
+        time.sleep(0.3)
+        profile_server.post(
+            "/connectAgent", json={"room": "r2", "profile": {"age": 41}}
+        )
+
+    threading.Thread(target=push_later).start()
+    try:
+        profile, waited = await agent.wait_for_profile(backend, "r2", timeout=5)
+    finally:
+        await backend.close()
+
+    assert profile == {"age": 41}
+    # Réveil sur le push, pas sur un intervalle de poll
+    assert 0.25 < waited < 0.6
+
+
+@pytest.mark.asyncio
+async def test_agent_gives_up_at_deadline(profile_server) -> None:
+    backend = BackendClient()
+    try:
+        profile, waited = await agent.wait_for_profile(backend, "missing", timeout=0.3)
+    finally:
+        await backend.close()
+
+    assert profile == {}
+    assert waited == pytest.approx(0.3, abs=0.2)
+
+
+@pytest.mark.asyncio
+async def test_agent_falls_back_when_server_is_down(monkeypatch) -> None:
+    monkeypatch.setattr(agent, "PROFILE_SERVER_URL", "http://127.0.0.1:9")
+    backend = BackendClient()
+    try:
+        profile, waited = await asyncio.wait_for(
+            agent.wait_for_profile(backend, "r3", timeout=0.5), timeout=3
+        )
+    finally:
+        await backend.close()
+
+    assert profile == {}
+    assert waited >= 0.5
+
+
+@pytest.mark.asyncio
+async def test_agent_reads_profile_from_directory_without_http(
+    monkeypatch, directory
+) -> None:
+    # Serveur injoignable : seul l'annuaire peut fournir le profil
+    monkeypatch.setattr(agent, "PROFILE_SERVER_URL", "http://127.0.0.1:9")
+    directory["r4"] = {"age": 12}
+    backend = BackendClient()
+    try:
+        profile, waited = await agent.wait_for_profile(backend, "r4", timeout=5)
+    finally:
+        await backend.close()
+
+    assert profile == {"age": 12}
+    assert waited < 0.1
@@ -0,0 +1,35 @@
+import json
+
+from prompts import build_instructions, build_report_prompt, dumps, estimate_tokens
+
+PROFILE = {"id": "p1", "name": "Élise Martin", "age": 30, "tags": {"anxiety"}}
+DIALOGUE = [
+    {"speaker": "AI", "text": "Comment dormez-vous ?"},
+    {"speaker": "Patient", "text": "Mal, je me réveille souvent."},
+]
+
+
+def test_report_prompt_embeds_compact_json() -> None:
+    prompt = build_report_prompt(PROFILE, DIALOGUE, "s1")
+
+    assert f"Patient profile: {dumps(PROFILE)}\n" in prompt
+    assert f"Dialogue: {dumps(DIALOGUE)}\n" in prompt
+    assert "Session ID: s1\n" in prompt
+    assert prompt.endswith("Return only the JSON object without any extra text.")
+    assert "Élise" in prompt
+    assert json.loads(dumps(DIALOGUE)) == DIALOGUE
+
+
+def test_compact_prompt_is_smaller_than_indented() -> None:
+    dialogue = DIALOGUE * 50
+    compact = build_report_prompt(PROFILE, dialogue, "s1")
+    indented = json.dumps(dialogue, indent=2)
+
+    assert len(dumps(dialogue)) < len(indented) * 0.8
+    assert estimate_tokens(compact) == (len(compact) + 3) // 4
+
+
+def test_instructions_contain_profile() -> None:
+    instructions = build_instructions(PROFILE)
+    assert dumps(PROFILE) in instructions
+    assert "[SESSION_END]" in instructions
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from report_batch import JsonlSink, RateLimiter, run_batch
+
+
+def _records(n):
+    return [
+        {
+            "session_id": f"s{i}",
+            "profile": {"id": f"p{i}"},
+            "dialogue": [{"speaker": "Patient", "text": str(i)}],
+        }
+        for i in range(n)
+    ]
+
+
+class _Generator:
+    def __init__(self, fail=(), delay=0.01):
+        self.fail = set(fail)
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, profile, dialogue, session_id):
+        self.calls.append(session_id)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        if session_id in self.fail:
+            return {}
+        return {"overview": {"name": dialogue[0]["text"]}}
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.asyncio
+async def test_generates_concurrently_and_writes_every_report(tmp_path) -> None:
+    out, ckpt = tmp_path / "out.jsonl", tmp_path / "ckpt"
+    generate = _Generator()
+
+    stats = await run_batch(
+        _records(20), generate, JsonlSink(out), checkpoint=ckpt, concurrency=4
+    )
+
+    assert stats["generated"] == 20
+    assert generate.max_active == 4
+    reports = _read(out)
+    assert sorted(r["session_id"] for r in reports) == sorted(
+        f"s{i}" for i in range(20)
+    )
+    assert reports[0]["patient_id"] == f"p{reports[0]['session_id'][1:]}"
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_checkpointed_sessions_and_retries_failures(
+    tmp_path,
+) -> None:
+    out, ckpt = tmp_path / "out.jsonl", tmp_path / "ckpt"
+    first = _Generator(fail={"s3", "s7"})
+    stats = await run_batch(_records(10), first, JsonlSink(out), checkpoint=ckpt)
+    assert (stats["generated"], stats["failed"]) == (8, 2)
+
+    second = _Generator()
+    stats = await run_batch(_records(10), second, JsonlSink(out), checkpoint=ckpt)
+
+    assert sorted(second.calls) == ["s3", "s7"]
+    assert (stats["generated"], stats["skipped"]) == (2, 8)
+    assert len(_read(out)) == 10
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_spaces_out_starts() -> None:
+    limiter = RateLimiter(rate=50, burst=1)
+    start = time.monotonic()
+    for _ in range(6):
+        await limiter.acquire()
+    # Premier jeton immédiat, puis un toutes les 20 ms
+    assert time.monotonic() - start >= 0.09
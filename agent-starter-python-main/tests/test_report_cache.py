@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from report_cache import ReportCache, content_key
+
+PROFILE = {"id": "p1", "name": "Jane"}
+DIALOGUE = [{"speaker": "Patient", "text": "I sleep badly."}]
+
+
+class _Generator:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"narrative": {"description": f"report {self.calls}"}}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_share_one_generation() -> None:
+    cache = ReportCache()
+    generate = _Generator()
+
+    reports = await asyncio.gather(
+        *(cache.get_or_generate("s1", PROFILE, DIALOGUE, generate) for _ in range(5))
+    )
+
+    assert generate.calls == 1
+    assert all(r == reports[0] for r in reports)
+    # Chaque appelant a sa copie
+    reports[0]["narrative"]["description"] = "edited"
+    assert reports[1]["narrative"]["description"] == "report 1"
+    m = cache.metrics()
+    assert (m["requests"], m["coalesced"], m["generated"]) == (5, 4, 1)
+    assert m["hit_rate"] == 0.8
+    assert cache.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_repeat_request_is_served_from_cache() -> None:
+    cache = ReportCache()
+    generate = _Generator(delay=0.2)
+    await cache.get_or_generate("s1", PROFILE, DIALOGUE, generate)
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await cache.get_or_generate(
+        "s1", dict(reversed(PROFILE.items())), DIALOGUE, generate
+    )
+
+    assert loop.time() - start < 0.05
+    assert generate.calls == 1
+    assert cache.metrics()["cache_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_new_dialogue_triggers_new_generation() -> None:
+    cache = ReportCache()
+    generate = _Generator()
+    longer = [*DIALOGUE, {"speaker": "AI", "text": "Since when?"}]
+
+    await asyncio.gather(
+        cache.get_or_generate("s1", PROFILE, DIALOGUE, generate),
+        cache.get_or_generate("s1", PROFILE, longer, generate),
+    )
+    assert generate.calls == 2
+    assert content_key(PROFILE, DIALOGUE) != content_key(PROFILE, longer)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_follower_does_not_cancel_generation() -> None:
+    cache = ReportCache()
+    generate = _Generator(delay=0.1)
+
+    leader = asyncio.ensure_future(
+        cache.get_or_generate("s1", PROFILE, DIALOGUE, generate)
+    )
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(
+        cache.get_or_generate("s1", PROFILE, DIALOGUE, generate)
+    )
+    await asyncio.sleep(0.01)
+    follower.cancel()
+
+    assert (await leader)["narrative"]["description"] == "report 1"
+    assert follower.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_failures_and_empty_reports_are_not_cached() -> None:
+    cache = ReportCache()
+
+    async def failing():
+        raise RuntimeError("model down")
+
+    async def empty():
+        return {}
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_generate("s1", PROFILE, DIALOGUE, failing)
+    assert await cache.get_or_generate("s1", PROFILE, DIALOGUE, empty) == {}
+    assert cache.metrics()["size"] == 0
+    assert cache.in_flight() == 0
@@ -0,0 +1,172 @@
+import asyncio
+import time
+
+import pytest
+
+from report_engine import ReportEngine, ReportTimeoutError
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class _AsyncModels:
+    def __init__(self, delay):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+
+    async def generate_content(self, *, model, contents, config=None):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return _Response(f"{model}:{contents}")
+
+    async def generate_content_stream(self, *, model, contents, config=None):
+        async def _chunks():
+            for piece in contents.split():
+                await asyncio.sleep(self.delay)
+                yield _Response(piece)
+
+        return _chunks()
+
+
+class _AsyncClient:
+    def __init__(self, delay=0.0):
+        self.aio = type("Aio", (), {})()
+        self.aio.models = _AsyncModels(delay)
+
+
+class _SyncModels:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def generate_content(self, *, model, contents, config=None):
+        time.sleep(self.delay)
+        return _Response(contents)
+
+    def generate_content_stream(self, *, model, contents, config=None):
+        for piece in contents.split():
+            time.sleep(self.delay)
+            yield _Response(piece)
+
+
+class _SyncClient:
+    def __init__(self, delay=0.0):
+        self.models = _SyncModels(delay)
+
+
+@pytest.mark.asyncio
+async def test_uses_native_async_client() -> None:
+    engine = ReportEngine(_AsyncClient(), model="fake-model")
+    assert await engine.generate("hello") == "fake-model:hello"
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded() -> None:
+    client = _AsyncClient(delay=0.02)
+    engine = ReportEngine(client, max_concurrency=2)
+
+    await asyncio.gather(*(engine.generate(str(i)) for i in range(6)))
+
+    assert client.aio.models.max_active == 2
+    assert engine.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_timeout_raises_report_timeout() -> None:
+    engine = ReportEngine(_AsyncClient(delay=1.0), timeout=0.01)
+
+    with pytest.raises(ReportTimeoutError):
+        await engine.generate("slow")
+    assert engine.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_sync_fallback_does_not_block_loop() -> None:
+    engine = ReportEngine(_SyncClient(delay=0.2), max_concurrency=2)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    probe = asyncio.create_task(ticker())
+    assert await engine.generate("sync") == "sync"
+    probe.cancel()
+    engine.shutdown()
+
+    # Une boucle bloquée pendant 200 ms n'aurait avancé que d'un tick
+    assert ticks >= 5
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_chunks_from_both_clients() -> None:
+    aio_engine = ReportEngine(_AsyncClient())
+    sync_engine = ReportEngine(_SyncClient())
+
+    assert [c async for c in aio_engine.stream("a b c")] == ["a", "b", "c"]
+    assert [c async for c in sync_engine.stream("a b c")] == ["a", "b", "c"]
+    assert aio_engine.in_flight == sync_engine.in_flight == 0
+    sync_engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_stream_timeout_covers_the_whole_stream() -> None:
+    engine = ReportEngine(_AsyncClient(delay=0.1), timeout=0.25)
+    received = []
+
+    with pytest.raises(ReportTimeoutError):
+        async for chunk in engine.stream("a b c d e"):
+            received.append(chunk)
+    assert received == ["a", "b"]
+    assert engine.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_speculation_is_skipped_rather_than_queued_before_reports() -> None:
+    client = _AsyncClient(delay=0.1)
+    engine = ReportEngine(
+        client, model="fake-model", max_concurrency=2, max_speculative=5
+    )
+    assert engine.max_speculative == 1
+    assert ReportEngine(client, max_concurrency=1).max_speculative == 0
+
+    async def speculate(prompt):
+        with engine.speculation() as slot:
+            return await engine.generate(prompt) if slot else None
+
+    first = asyncio.create_task(speculate("spec-a"))
+    await asyncio.sleep(0)
+    assert await speculate("spec-b") is None
+
+    # Le rapport demandé garde sa place pendant la préparation en cours
+    start = time.perf_counter()
+    assert await engine.generate("final") == "fake-model:final"
+    assert time.perf_counter() - start < 0.18
+    assert await first == "fake-model:spec-a"
+    assert (engine.speculating, engine.speculations_skipped) == (0, 1)
+
+
+@pytest.mark.asyncio
+async def test_cancel_room_cancels_only_its_tasks() -> None:
+    engine = ReportEngine(_AsyncClient(delay=5.0))
+
+    task_a = engine.run_for_room("room-a", engine.generate("a"))
+    task_b = engine.run_for_room("room-b", engine.generate("b"))
+    await asyncio.sleep(0)
+    assert engine.pending() == 2
+
+    await engine.cancel_room("room-a")
+
+    assert task_a.cancelled()
+    assert not task_b.done()
+    assert engine.pending("room-a") == 0
+    await engine.cancel_room("room-b")
+    assert engine.pending() == 0
@@ -0,0 +1,150 @@
+import asyncio
+import itertools
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from http_client import BackendClient
+from report_outbox import ReportOutbox
+
+
+async def _stub_backend(fail_every=0):
+    """Backend /api/reports qui répond 503 une requête sur `fail_every`."""
+    received = {}
+    counter = itertools.count(1)
+
+    async def post_report(request):
+        payload = await request.json()
+        if fail_every and next(counter) % fail_every == 0:
+            return web.Response(status=503)
+        received[payload["session_id"]] = payload
+        return web.json_response({"success": True}, status=201)
+
+    app = web.Application()
+    app.router.add_post("/api/reports", post_report)
+    server = TestServer(app)
+    await server.start_server()
+    return server, received
+
+
+def _outbox(client, server, path, **kwargs):
+    kwargs.setdefault("backoff_base", 0.001)
+    kwargs.setdefault("backoff_max", 0.01)
+    return ReportOutbox(
+        client, str(server.make_url("/api/reports")), path=str(path), **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_delivers_everything_despite_intermittent_failures(tmp_path) -> None:
+    server, received = await _stub_backend(fail_every=3)
+    client = BackendClient()
+    outbox = _outbox(client, server, tmp_path / "outbox.sqlite3")
+    try:
+        for i in range(50):
+            await outbox.put({"session_id": f"s{i}", "patient_id": "p"})
+        assert await outbox.flush(timeout=10)
+
+        assert len(received) == 50
+        m = outbox.metrics()
+        assert (m["pending"], m["dead"], m["delivered"]) == (0, 0, 50)
+        assert m["failed"] > 0
+    finally:
+        await outbox.stop()
+        outbox.close()
+        await client.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_one_row_per_session_and_final_wins(tmp_path) -> None:
+    server, received = await _stub_backend()
+    client = BackendClient()
+    outbox = _outbox(client, server, tmp_path / "outbox.sqlite3")
+    try:
+        # Pas de boucle d'envoi ici : on inspecte la file avant livraison
+        await asyncio.to_thread(
+            outbox._put, "s1", "draft", '{"session_id": "s1", "v": 1}'
+        )
+        await asyncio.to_thread(
+            outbox._put, "s1", "finalized", '{"session_id": "s1", "v": 2}'
+        )
+        await asyncio.to_thread(
+            outbox._put, "s1", "draft", '{"session_id": "s1", "v": 3}'
+        )
+        assert outbox.pending() == 1
+
+        await outbox.send_due()
+        assert received["s1"]["v"] == 2
+        assert outbox.pending() == 0
+    finally:
+        outbox.close()
+        await client.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_pending_reports_survive_a_restart(tmp_path) -> None:
+    path = tmp_path / "outbox.sqlite3"
+    down, _ = await _stub_backend(fail_every=1)
+    client = BackendClient()
+    # Bail court : un envoi interrompu par stop() redevient vite disponible
+    outbox = _outbox(client, down, path, lease=0.05, max_attempts=1000)
+    await outbox.put({"session_id": "s1"})
+    await asyncio.sleep(0.05)
+    await outbox.stop()
+    outbox.close()
+    await down.close()
+
+    server, received = await _stub_backend()
+    restarted = _outbox(client, server, path, lease=0.05)
+    try:
+        assert restarted.pending() == 1
+        restarted.start()
+        assert await restarted.flush(timeout=5)
+        assert received["s1"]["status"] == "finalized"
+    finally:
+        await restarted.stop()
+        restarted.close()
+        await client.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts(tmp_path) -> None:
+    server, received = await _stub_backend(fail_every=1)
+    client = BackendClient()
+    outbox = _outbox(client, server, tmp_path / "outbox.sqlite3", max_attempts=3)
+    try:
+        await outbox.put({"session_id": "s1"})
+        assert await outbox.flush(timeout=5)
+        assert received == {}
+        assert outbox.metrics()["dead"] == 1
+    finally:
+        await outbox.stop()
+        outbox.close()
+        await client.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_metrics_do_not_query_sqlite(tmp_path) -> None:
+    server, _ = await _stub_backend(fail_every=1)
+    client = BackendClient()
+    outbox = _outbox(client, server, tmp_path / "outbox.sqlite3", max_attempts=1)
+    try:
+        await outbox.put({"session_id": "s1"})
+        await outbox.put({"session_id": "s2"})
+        await asyncio.to_thread(outbox._put, "s3", "draft", '{"session_id": "s3"}')
+        assert await outbox.flush(timeout=5)
+
+        queries = []
+        outbox._db.set_trace_callback(queries.append)
+        assert outbox.metrics()["dead"] == 3 and outbox.metrics()["pending"] == 0
+        assert queries == []
+    finally:
+        await outbox.stop()
+        outbox.close()
+        await client.close()
+        await server.close()
@@ -0,0 +1,130 @@
+import copy
+import json
+
+import pytest
+
+import agent
+from report_schema import ReportParser
+
+REPORT = {
+    "session_id": "s1",
+    "patient_id": "p1",
+    "overview": {
+        "name": "Jane Doe",
+        "age": 34,
+        "scores": [{"tool": "GAD-7", "intake": 14, "current": 12}],
+    },
+    "narrative": {"description": "Worry, poor sleep.", "symptoms_observed": ["worry"]},
+    "dialogue": [
+        {"speaker": "AI", "text": "How do you sleep?"},
+        {"speaker": "Patient", "text": "Badly."},
+    ],
+    "doctor_notes": "",
+    "notified_to_doctor": True,
+}
+
+
+def test_clean_structured_output_is_parsed_as_is() -> None:
+    parser = ReportParser()
+    assert parser.parse(json.dumps(REPORT)) == REPORT
+    assert parser.metrics() == {
+        "parsed": 1,
+        "clean": 1,
+        "syntax_repairs": 0,
+        "field_repairs": 0,
+        "failures": 0,
+    }
+
+
+def test_fenced_output_with_prose() -> None:
+    parser = ReportParser()
+    text = (
+        "Here is the report:\n```json\n"
+        + json.dumps(REPORT, indent=2)
+        + "\n```\nThanks!"
+    )
+    assert parser.parse(text) == REPORT
+    assert parser.clean == 1
+
+
+def test_field_level_repairs() -> None:
+    broken = copy.deepcopy(REPORT)
+    broken["overview"]["age"] = "34"
+    broken["overview"]["scores"].append(
+        {"tool": "PHQ-9", "intake": "n/a", "current": 3}
+    )
+    broken["narrative"]["symptoms_observed"] = "worry"
+    broken["dialogue"][0]["speaker"] = "assistant"
+    broken["dialogue"][1]["speaker"] = "patient"
+    broken["notified_to_doctor"] = "true"
+    del broken["patient_id"]
+
+    parser = ReportParser()
+    report = parser.parse(json.dumps(broken))
+
+    assert report["overview"]["age"] == 34
+    assert report["overview"]["scores"] == REPORT["overview"]["scores"]
+    assert report["narrative"]["symptoms_observed"] == ["worry"]
+    assert [t["speaker"] for t in report["dialogue"]] == ["AI", "Patient"]
+    assert report["notified_to_doctor"] is True
+    # Identifiant manquant : laissé absent, jamais inventé
+    assert "patient_id" not in report
+    assert parser.field_repairs == 1
+
+
+def test_trailing_commas_and_truncation_are_repaired() -> None:
+    parser = ReportParser()
+    text = json.dumps(REPORT, indent=2).replace('"worry"\n', '"worry",\n')
+    assert parser.parse(text) == REPORT
+
+    truncated = json.dumps(REPORT)[: json.dumps(REPORT).index('"doctor_notes"') + 10]
+    report = parser.parse(truncated)
+    assert report["narrative"] == REPORT["narrative"]
+    assert report["dialogue"] == REPORT["dialogue"]
+    assert parser.syntax_repairs == 2
+    assert parser.failures == 0
+
+
+def test_unusable_output_counts_a_failure() -> None:
+    parser = ReportParser()
+    assert parser.parse("I'm sorry, I can't do that.") == {}
+    assert parser.parse('{"overview": "nothing"') == {}
+    assert parser.failures == 2
+
+
+class _Outbox:
+    def __init__(self):
+        self.items = []
+
+    async def put(self, report, status):
+        self.items.append((report, status))
+
+
+@pytest.mark.asyncio
+async def test_agent_sets_patient_id_missing_from_model_reply(monkeypatch) -> None:
+    reply = copy.deepcopy(REPORT)
+    del reply["patient_id"]
+
+    async def generate(profile, dialogue, session_id, on_draft=None):
+        return agent.report_parser.parse(json.dumps(reply))
+
+    monkeypatch.setattr(agent, "generate_report_with_gemini", generate)
+    outbox = _Outbox()
+    record = {
+        "session_id": "s-missing-id",
+        "patient_id": "p42",
+        "profile": {"id": "p42"},
+        "dialogue": REPORT["dialogue"],
+    }
+    await agent.regenerate_pending_report(record, outbox)
+
+    assert [
+        (r["session_id"], r["patient_id"], status) for r, status in outbox.items
+    ] == [("s-missing-id", "p42", "finalized")]
+    # Même étape que la demande GENERATE_REPORT de la room
+    assert (
+        agent.stamp_report(agent.report_parser.parse(json.dumps(reply)), "s1", "p1")[
+            "patient_id"
+        ]
+        == "p1"
+    )
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from report_speculation import PLACEHOLDER_SESSION_ID, ReportSpeculator
+
+
+class _Model:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    async def __call__(self, dialogue):
+        self.calls.append(len(dialogue))
+        await asyncio.sleep(self.delay)
+        return {
+            "session_id": PLACEHOLDER_SESSION_ID,
+            "overview": {
+                "session_info": f"Session {PLACEHOLDER_SESSION_ID} - Consultation"
+            },
+            "dialogue": dialogue[-2:],
+        }
+
+
+def _session(speculator, turns):
+    dialogue = []
+    for i in range(turns):
+        speaker, text = (
+            ("AI", f"Question {i}?") if i % 2 == 0 else ("Patient", f"Answer {i}.")
+        )
+        speculator.add(speaker, text)
+        dialogue.append({"speaker": speaker, "text": text})
+    return dialogue
+
+
+@pytest.mark.asyncio
+async def test_session_end_report_is_reused_with_final_dialogue() -> None:
+    model = _Model()
+    speculator = ReportSpeculator(
+        model, asyncio.ensure_future, every_turns=0, max_delta=2
+    )
+    dialogue = _session(speculator, 6)
+    assert speculator.add("AI", "Take care. [SESSION_END]")
+    await asyncio.sleep(0.01)
+
+    # Le frontend ajoute un au revoir du patient après la fin de session
+    final = [
+        *dialogue,
+        {"speaker": "AI", "text": "Take care."},
+        {"speaker": "Patient", "text": "Bye!"},
+    ]
+    report = await speculator.reconcile(final, "s-42")
+
+    assert model.calls == [7]
+    assert report["session_id"] == "s-42"
+    assert report["overview"]["session_info"] == "Session s-42 - Consultation"
+    assert report["dialogue"] == final
+    assert speculator.metrics()["reused"] == 1
+
+
+@pytest.mark.asyncio
+async def test_risky_or_divergent_delta_needs_a_new_report() -> None:
+    speculator = ReportSpeculator(
+        _Model(), asyncio.ensure_future, every_turns=4, max_delta=2
+    )
+    dialogue = _session(speculator, 4)
+    await asyncio.sleep(0.01)
+
+    risky = [
+        *dialogue,
+        {"speaker": "Patient", "text": "Sometimes I think about overdose."},
+    ]
+    divergent = [{"speaker": "AI", "text": "Something else"}, *dialogue[1:]]
+    too_long = dialogue + [{"speaker": "AI", "text": "More?"}] * 3
+
+    assert await speculator.reconcile(dialogue, "s") is not None
+    assert await speculator.reconcile(risky, "s") is None
+    assert await speculator.reconcile(divergent, "s") is None
+    assert await speculator.reconcile(too_long, "s") is None
+
+
+@pytest.mark.asyncio
+async def test_final_request_waits_for_running_speculation() -> None:
+    model = _Model(delay=0.1)
+    speculator = ReportSpeculator(model, asyncio.ensure_future, every_turns=0)
+    dialogue = _session(speculator, 4)
+    speculator.add("AI", "Goodbye [SESSION_END]")
+
+    report = await speculator.reconcile(
+        [*dialogue, {"speaker": "AI", "text": "Goodbye"}], "s"
+    )
+
+    assert report is not None
+    assert model.calls == [5]
+
+
+@pytest.mark.asyncio
+async def test_one_generation_at_a_time_and_session_end_preempts() -> None:
+    model = _Model(delay=0.1)
+    speculator = ReportSpeculator(model, asyncio.ensure_future, every_turns=2)
+    _session(speculator, 6)
+    await asyncio.sleep(0)
+
+    # Déclenchements pendant la génération : une seule relance en attente
+    assert model.calls == [2]
+
+    speculator.add("AI", "Bye [SESSION_END]")
+    await asyncio.sleep(0.15)
+
+    assert model.calls == [2, 7]
+    assert speculator.latest[0][-1]["text"] == "Bye [SESSION_END]"
@@ -0,0 +1,66 @@
+import json
+
+from report_stream import StreamingReportParser
+
+REPORT = {
+    "session_id": "s1",
+    "patient_id": "p1",
+    "overview": {"name": 'Jane "J" Doe', "scores": [{"tool": "GAD-7", "intake": 14}]},
+    "narrative": {"description": "braces } and ] in text, commas too"},
+    "dialogue": [{"speaker": "AI", "text": "Bonjour\\nça va ?"}],
+    "notified_to_doctor": True,
+}
+TEXT = "```json\n" + json.dumps(REPORT, indent=2, ensure_ascii=False) + "\n```"
+
+
+def _feed(text, size):
+    parser = StreamingReportParser()
+    seen = []
+    for i in range(0, len(text), size):
+        seen += [key for key, _ in parser.feed(text[i : i + size])]
+    return parser, seen
+
+
+def test_sections_are_emitted_as_soon_as_complete() -> None:
+    parser = StreamingReportParser()
+    head = TEXT[: TEXT.index('"narrative"')]
+
+    assert [key for key, _ in parser.feed(head)] == [
+        "session_id",
+        "patient_id",
+        "overview",
+    ]
+    assert parser.sections["overview"] == REPORT["overview"]
+    assert not parser.complete
+
+
+def test_any_chunking_gives_the_full_report() -> None:
+    for size in (1, 2, 3, 7, 64, len(TEXT)):
+        parser, seen = _feed(TEXT, size)
+        assert seen == list(REPORT)
+        assert parser.complete
+        assert parser.sections == REPORT
+        assert parser.text == TEXT
+
+
+def test_trailing_text_is_ignored() -> None:
+    parser, seen = _feed(TEXT + "\nHope this helps! {not json}", 5)
+    assert seen == list(REPORT)
+    assert parser.sections == REPORT
+
+
+def test_truncated_stream_keeps_completed_sections() -> None:
+    cut = TEXT.index('"dialogue"') + 15
+    parser, seen = _feed(TEXT[:cut], 4)
+
+    assert "dialogue" not in seen
+    assert parser.sections["narrative"] == REPORT["narrative"]
+    assert "dialogue" not in parser.sections
+    assert not parser.complete
+
+
+def test_unparseable_output_yields_no_sections() -> None:
+    parser, seen = _feed("Sorry, I cannot help with that.", 4)
+    assert seen == []
+    assert parser.sections == {}
+    assert not parser.complete
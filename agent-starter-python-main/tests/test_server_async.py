@@ -0,0 +1,168 @@
+import asyncio
+import time
+
+import jwt
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+import server
+from server_async import make_app
+from session_directory import SessionDirectory
+
+
+@pytest.fixture
+async def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        server, "AGENT_CONTEXT", SessionDirectory(str(tmp_path / "directory.sqlite3"))
+    )
+    async with TestClient(TestServer(make_app())) as c:
+        yield c
+    server.AGENT_CONTEXT.clear()
+
+
+@pytest.mark.asyncio
+async def test_connection_details_contract(client) -> None:
+    resp = await client.post(
+        "/getConnectionDetails", json={"room": "r1", "identity": "u1", "name": "Jane"}
+    )
+    body = await resp.json()
+
+    assert resp.status == 200
+    assert set(body) == {"serverUrl", "roomName", "participantName", "participantToken"}
+    assert body["roomName"] == "r1"
+    claims = jwt.decode(body["participantToken"], options={"verify_signature": False})
+    assert claims["sub"] == "u1"
+    assert claims["video"]["room"] == "r1"
+
+
+@pytest.mark.asyncio
+async def test_same_json_as_flask_for_profile_routes(client) -> None:
+    flask_client = server.app.test_client()
+    cases = [
+        ("post", "/connectAgent", {"json": {"room": "r1"}}),
+        ("post", "/connectAgent", {"json": {"room": "r1", "profile": {"age": 9}}}),
+        ("get", "/getProfile", {"params": {"room": "r1"}}),
+        ("get", "/getProfile", {"params": {"room": "unknown"}}),
+        ("get", "/getProfile", {"params": {}}),
+        ("post", "/disconnectAgent", {"json": {"room": "r1"}}),
+        ("post", "/getConnectionDetails", {"json": {}}),
+    ]
+    for method, path, kwargs in cases:
+        server.AGENT_CONTEXT.clear()
+        if path != "/connectAgent":
+            server.AGENT_CONTEXT["r1"] = {"age": 9}
+        resp = await getattr(client, method)(path, **kwargs)
+        async_result = (resp.status, await resp.json())
+
+        server.AGENT_CONTEXT.clear()
+        if path != "/connectAgent":
+            server.AGENT_CONTEXT["r1"] = {"age": 9}
+        flask_kwargs = (
+            {"query_string": kwargs["params"]} if "params" in kwargs else kwargs
+        )
+        flask_resp = getattr(flask_client, method)(path, **flask_kwargs)
+
+        assert async_result == (flask_resp.status_code, flask_resp.get_json()), path
+
+
+@pytest.mark.asyncio
+async def test_wait_profile_wakes_on_connect(client) -> None:
+    async def push_later():
+        await asyncio.sleep(0.2)
+        await client.post("/connectAgent", json={"room": "r2", "profile": {"age": 5}})
+
+    start = time.perf_counter()
+    pusher = asyncio.create_task(push_later())
+    resp = await client.get("/waitProfile", params={"room": "r2", "timeout": "5"})
+    await pusher
+
+    assert resp.status == 200
+    assert await resp.json() == {"profile": {"age": 5}}
+    assert time.perf_counter() - start < 1
+
+
+@pytest.mark.asyncio
+async def test_wait_profile_timeout_and_validation(client) -> None:
+    resp = await client.get("/waitProfile", params={"room": "r3", "timeout": "0.05"})
+    assert resp.status == 404
+    for timeout in ("abc", "nan", "-inf"):
+        resp = await asyncio.wait_for(
+            client.get("/waitProfile", params={"room": "r3", "timeout": timeout}), 5
+        )
+        assert resp.status == 400
+
+
+@pytest.mark.asyncio
+async def test_cors_for_frontend_origin(client) -> None:
+    resp = await client.options(
+        "/connectAgent",
+        headers={
+            "Origin": "http://localhost:3000",
+            "Access-Control-Request-Method": "POST",
+        },
+    )
+    assert resp.headers["Access-Control-Allow-Origin"] == "http://localhost:3000"
+
+    resp = await client.get(
+        "/getProfile", params={"room": "x"}, headers={"Origin": "http://evil"}
+    )
+    assert "Access-Control-Allow-Origin" not in resp.headers
+
+
+class _SlowDirectory(SessionDirectory):
+    """Annuaire sur un disque lent : chaque lecture bloque son thread."""
+
+    def _row(self, room):
+        time.sleep(0.05)
+        return super()._row(room)
+
+
+@pytest.mark.asyncio
+async def test_directory_reads_stay_off_the_event_loop(
+    client, monkeypatch, tmp_path
+) -> None:
+    monkeypatch.setattr(
+        server, "AGENT_CONTEXT", _SlowDirectory(str(tmp_path / "slow.sqlite3"))
+    )
+    gaps = []
+
+    async def ticker():
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    ticking = asyncio.create_task(ticker())
+    try:
+        await asyncio.gather(
+            client.get("/waitProfile", params={"room": "r4", "timeout": "0.4"}),
+            client.post("/connectAgent", json={"room": "r5", "profile": {"age": 5}}),
+            client.get("/getProfile", params={"room": "r5"}),
+        )
+    finally:
+        ticking.cancel()
+
+    # Lectures de 50 ms chacune, et pourtant la boucle n'est jamais bloquée
+    assert max(gaps) < 0.04
+
+
+@pytest.mark.asyncio
+async def test_concurrent_long_polls_do_not_queue_behind_directory_reads(
+    client, monkeypatch, tmp_path
+) -> None:
+    monkeypatch.setattr(
+        server, "AGENT_CONTEXT", _SlowDirectory(str(tmp_path / "slow.sqlite3"))
+    )
+
+    async def wait(room):
+        start = time.perf_counter()
+        resp = await client.get("/waitProfile", params={"room": room, "timeout": "0.3"})
+        return resp.status, time.perf_counter() - start
+
+    results = await asyncio.gather(*(wait(f"missing-{i}") for i in range(8)))
+
+    # Verrou tenu pendant les lectures : 8 x 50 ms par tour de relecture
+    assert all(status == 404 for status, _ in results)
+    assert max(waited for _, waited in results) < 0.6
@@ -0,0 +1,197 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+import server
+from server_async import make_app
+from session_directory import SessionDirectory, worker_id
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _register_rooms(path, index, rooms, barrier, results):
+    """Processus séparé : écrit ses rooms puis relit celles de tous les autres."""
+    directory = SessionDirectory(path)
+    for r in range(rooms):
+        room = f"room-{index}-{r}"
+        directory[room] = {"process": index, "room": r}
+        directory.assign(room, worker_id())
+    barrier.wait(30)
+    seen = sum(
+        directory.get(f"room-{i}-{r}") is not None
+        for i in range(barrier.parties)
+        for r in range(rooms)
+    )
+    results.put(
+        (
+            index,
+            os.getpid(),
+            seen,
+            directory.worker(f"room-{(index + 1) % barrier.parties}-0"),
+        )
+    )
+
+
+def _push_profile_later(path, room, delay):
+    time.sleep(delay)
+    SessionDirectory(path)[room] = {"age": 7}
+
+
+def test_processes_see_each_others_rooms(tmp_path) -> None:
+    path = str(tmp_path / "directory.sqlite3")
+    ctx = multiprocessing.get_context("spawn")
+    processes, rooms = 4, 50
+    barrier, results = ctx.Barrier(processes), ctx.Queue()
+    workers = [
+        ctx.Process(target=_register_rooms, args=(path, i, rooms, barrier, results))
+        for i in range(processes)
+    ]
+    for p in workers:
+        p.start()
+    reports = [results.get(timeout=60) for _ in workers]
+    for p in workers:
+        p.join(10)
+        assert p.exitcode == 0
+
+    pids = {index: pid for index, pid, _, _ in reports}
+    for index, _, seen, neighbour in reports:
+        assert seen == processes * rooms
+        # Le worker d'une room tenue par un autre processus est visible
+        assert neighbour.endswith(f":{pids[(index + 1) % processes]}")
+    assert SessionDirectory(path).summary() == {
+        "rooms": processes * rooms,
+        "profiles": processes * rooms,
+        "assigned": processes * rooms,
+        "workers": processes,
+    }
+
+
+def test_connection_is_reopened_after_fork(tmp_path) -> None:
+    directory = SessionDirectory(str(tmp_path / "directory.sqlite3"))
+    directory["parent"] = {"age": 1}
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            directory["child"] = {"age": 2}
+            os._exit(0 if directory.get("parent") == {"age": 1} else 1)
+        except BaseException:
+            os._exit(2)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert directory.get("child") == {"age": 2}
+
+
+def test_ttl_expires_rooms_and_writes_extend_it(tmp_path) -> None:
+    clock = _Clock()
+    directory = SessionDirectory(
+        str(tmp_path / "directory.sqlite3"), ttl=10, purge_interval=0, clock=clock
+    )
+    directory["a"] = {"age": 1}
+    directory["b"] = {"age": 2}
+
+    clock.now = 8
+    directory.assign("a", "host:1")  # prolonge "a"
+    clock.now = 12
+
+    assert "b" not in directory and directory.get("b") is None
+    assert directory.get("a") == {"age": 1} and directory.worker("a") == "host:1"
+
+    directory.assign("c", "host:1")  # écriture : purge des lignes expirées
+    assert directory.purged == 1
+    assert directory.summary() == {
+        "rooms": 2,
+        "profiles": 1,
+        "assigned": 2,
+        "workers": 1,
+    }
+    assert directory.last_summary == directory.summary()
+
+
+def test_purge_keeps_the_most_recent_rooms(tmp_path) -> None:
+    clock = _Clock()
+    directory = SessionDirectory(
+        str(tmp_path / "directory.sqlite3"), max_size=3, purge_interval=5, clock=clock
+    )
+    for i in range(6):
+        clock.now = i
+        directory[f"r{i}"] = {"index": i}
+
+    # Purges à t=0 et t=5 seulement : au plus max_size lignes après la dernière
+    assert [r for r in (f"r{i}" for i in range(6)) if r in directory] == [
+        "r3",
+        "r4",
+        "r5",
+    ]
+    assert directory.purged == 3
+
+
+def test_unassign_only_releases_the_owner(tmp_path) -> None:
+    directory = SessionDirectory(str(tmp_path / "directory.sqlite3"))
+    directory["r1"] = {"age": 30}
+    directory.assign("r1", "host:2")  # room reprise par un autre worker
+
+    assert directory.unassign("r1", "host:1") is False
+    assert directory.worker("r1") == "host:2"
+    assert directory.unassign("r1", "host:2") is True
+    assert directory.worker("r1") is None
+    # Le profil reste jusqu'au /disconnectAgent
+    assert directory.pop("r1") == {"age": 30}
+    assert directory.pop("r1") is None and "r1" not in directory
+
+
+def test_wait_profile_sees_profile_written_by_another_process(
+    monkeypatch, tmp_path
+) -> None:
+    path = str(tmp_path / "directory.sqlite3")
+    monkeypatch.setattr(server, "AGENT_CONTEXT", SessionDirectory(path))
+    writer = multiprocessing.get_context("spawn").Process(
+        target=_push_profile_later, args=(path, "r1", 0.3)
+    )
+    writer.start()
+    try:
+        start = time.perf_counter()
+        resp = server.app.test_client().get(
+            "/waitProfile", query_string={"room": "r1", "timeout": 10}
+        )
+        waited = time.perf_counter() - start
+    finally:
+        writer.join(10)
+
+    assert resp.status_code == 200
+    assert resp.get_json() == {"profile": {"age": 7}}
+    # Réveil au prochain tour de relecture, pas à l'échéance du long-poll
+    assert waited < 0.3 + 2 + server.PROFILE_POLL_S
+
+
+@pytest.mark.asyncio
+async def test_async_wait_profile_sees_profile_written_by_another_process(
+    monkeypatch, tmp_path
+) -> None:
+    path = str(tmp_path / "directory.sqlite3")
+    monkeypatch.setattr(server, "AGENT_CONTEXT", SessionDirectory(path))
+    writer = multiprocessing.get_context("spawn").Process(
+        target=_push_profile_later, args=(path, "r2", 0.3)
+    )
+    async with TestClient(TestServer(make_app())) as client:
+        writer.start()
+        try:
+            resp = await client.get(
+                "/waitProfile", params={"room": "r2", "timeout": "10"}
+            )
+            body = await resp.json()
+        finally:
+            writer.join(10)
+
+    assert resp.status == 200
+    assert body == {"profile": {"age": 7}}
@@ -0,0 +1,102 @@
+import time
+import tracemalloc
+
+import pytest
+
+from session_store import SessionStore
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used() -> None:
+    store = SessionStore(max_size=2, ttl=None)
+    store["a"] = 1
+    store["b"] = 2
+    assert store["a"] == 1  # "a" devient le plus récent
+    store["c"] = 3
+
+    assert "b" not in store
+    assert set(store) == {"a", "c"}
+    assert store.metrics()["evictions"] == 1
+
+
+def test_ttl_expires_idle_entries() -> None:
+    clock = _Clock()
+    store = SessionStore(max_size=10, ttl=10, clock=clock)
+    store["a"] = 1
+    store["b"] = 2
+
+    clock.now = 8
+    assert store.get("a") == 1  # TTL glissant : "a" est prolongé
+    clock.now = 12
+
+    assert store.get("b") is None
+    assert store.get("a") == 1
+    m = store.metrics()
+    assert m["size"] == 1
+    assert m["expirations"] == 1
+
+
+def test_absolute_ttl_is_not_extended_by_reads() -> None:
+    clock = _Clock()
+    store = SessionStore(max_size=10, ttl=10, sliding=False, clock=clock)
+    store["a"] = 1
+    clock.now = 8
+    assert store["a"] == 1
+    clock.now = 11
+    with pytest.raises(KeyError):
+        store["a"]
+
+
+def test_pop_and_metrics() -> None:
+    store = SessionStore(max_size=10, ttl=None)
+    store["room"] = {"age": 3}
+    assert store.get("missing") is None
+    assert store.pop("room") == {"age": 3}
+    assert store.pop("room", None) is None
+
+    m = store.metrics()
+    assert (m["size"], m["hits"], m["misses"]) == (0, 0, 1)
+
+
+def test_summary_does_not_dump_values() -> None:
+    store = SessionStore(max_size=10, ttl=None)
+    store["room-1"] = {"secret": "patient notes"}
+    summary = store.summary()
+    assert "size=1/10" in summary
+    assert "room-1" in summary
+    assert "patient notes" not in summary
+
+
+def test_soak_100k_rooms_stays_bounded() -> None:
+    clock = _Clock()
+    store = SessionStore(max_size=5_000, ttl=600, clock=clock)
+    profile = {"user_id": {"id": "x", "name": "Jane"}, "age": 30, "notes": "n" * 100}
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    peak_size = 0
+    for i in range(100_000):
+        clock.now = i * 0.01  # une room toutes les 10 ms, 1000 s au total
+        store[f"room-{i}"] = dict(profile)
+        if i % 3 == 0:
+            store.get(f"room-{i - 1}")
+        if i % 2 == 0:
+            store.pop(f"room-{i - 10}", None)  # rooms fermées proprement
+        peak_size = max(peak_size, len(store._data))
+    elapsed = time.perf_counter() - start
+    _, peak_mem = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    m = store.metrics()
+    assert peak_size <= 5_000
+    assert m["size"] <= 5_000
+    assert m["expirations"] + m["evictions"] > 0
+    assert peak_mem < 50 * 1024 * 1024
+    assert elapsed < 10
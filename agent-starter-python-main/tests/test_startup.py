@@ -0,0 +1,37 @@
+import json
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+HEAVY = ("agent", "google.genai", "livekit.plugins.deepgram", "livekit.plugins.silero")
+
+
+def _loaded_after(code):
+    """Modules lourds présents dans sys.modules après `code`, dans un interpréteur neuf."""
+    probe = f"{code}\nimport json, sys\nprint(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    env = {**os.environ, "PYTHONPATH": SRC, "GENAI_API_KEY": "offline"}
+    out = subprocess.run(
+        [sys.executable, "-c", probe],
+        env=env,
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def test_token_servers_do_not_import_the_agent() -> None:
+    assert _loaded_after("import server") == []
+    assert _loaded_after("import server_async") == []
+
+
+def test_agent_defers_gemini_and_plugins_until_needed() -> None:
+    assert _loaded_after("import agent") == ["agent"]
+    assert _loaded_after("import agent; agent.load_plugins()") == [
+        "agent",
+        "google.genai",
+        "livekit.plugins.deepgram",
+        "livekit.plugins.silero",
+    ]
@@ -0,0 +1,148 @@
+import asyncio
+import functools
+import os
+import signal
+
+import pytest
+
+import agent
+from report_batch import read_records
+from report_pending import PendingReports
+from task_supervisor import TaskSupervisor
+
+
+def _report_request(supervisor, pending, delivered, session_id, generation_s):
+    async def process():
+        record = {
+            "session_id": session_id,
+            "profile": {"id": "p1"},
+            "dialogue": [{"speaker": "AI", "text": "Hi"}],
+        }
+        supervisor.on_abandon(functools.partial(pending.put, record))
+        await asyncio.sleep(generation_s)  # génération Gemini
+        delivered.append(session_id)
+        supervisor.on_abandon(None)
+
+    return process()
+
+
+async def _sigterm_during(supervisor, timeout):
+    """Comme le worker LiveKit : SIGTERM -> fermeture des rooms -> vidange."""
+    loop = asyncio.get_running_loop()
+    drained = loop.create_future()
+
+    def on_sigterm():
+        task = loop.create_task(supervisor.drain(timeout=timeout))
+        task.add_done_callback(lambda t: drained.set_result(t.result()))
+
+    loop.add_signal_handler(signal.SIGTERM, on_sigterm)
+    try:
+        await asyncio.sleep(0.01)
+        os.kill(os.getpid(), signal.SIGTERM)
+        return await asyncio.wait_for(drained, 5)
+    finally:
+        loop.remove_signal_handler(signal.SIGTERM)
+
+
+@pytest.mark.asyncio
+async def test_sigterm_lets_short_generations_finish(tmp_path) -> None:
+    supervisor = TaskSupervisor()
+    pending = PendingReports(str(tmp_path / "pending.jsonl"))
+    delivered = []
+    for i in range(3):
+        supervisor.spawn(
+            "room-a", _report_request(supervisor, pending, delivered, f"s{i}", 0.05)
+        )
+
+    result = await _sigterm_during(supervisor, timeout=1.0)
+
+    assert result["finished"] == 3 and result["abandoned"] == 0
+    assert sorted(delivered) == ["s0", "s1", "s2"]
+    assert pending.claim() == []
+    assert supervisor.metrics()["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_sigterm_mid_generation_hands_reports_to_disk(tmp_path) -> None:
+    supervisor = TaskSupervisor()
+    path = tmp_path / "pending.jsonl"
+    pending = PendingReports(str(path))
+    delivered = []
+    supervisor.spawn(
+        "room-a", _report_request(supervisor, pending, delivered, "fast", 0.02)
+    )
+    slow = supervisor.spawn(
+        "room-b", _report_request(supervisor, pending, delivered, "slow", 10)
+    )
+
+    result = await _sigterm_during(supervisor, timeout=0.1)
+
+    assert result["finished"] == 1 and result["abandoned"] == 1
+    assert 100 <= result["drain_ms"] < 1000
+    assert slow.cancelled() and delivered == ["fast"]
+    # Lisible par `agent.py batch`
+    assert [r["session_id"] for r in read_records(path)] == ["slow"]
+    assert supervisor.metrics()["abandoned"] == 1
+
+    # Le worker suivant reprend la demande, une seule fois
+    records = pending.claim()
+    assert [r["session_id"] for r in records] == ["slow"]
+    assert not path.exists() and pending.claim() == []
+
+
+@pytest.mark.asyncio
+async def test_drain_is_per_room_and_ignores_finished_requests(tmp_path) -> None:
+    supervisor = TaskSupervisor()
+    pending = PendingReports(str(tmp_path / "pending.jsonl"))
+    delivered = []
+    other = supervisor.spawn("room-b", asyncio.sleep(10))
+    supervisor.spawn(
+        "room-a", _report_request(supervisor, pending, delivered, "done", 0)
+    )
+    await asyncio.sleep(0.01)
+
+    assert await supervisor.drain("room-a", timeout=0.1) == {
+        "finished": 0,
+        "abandoned": 0,
+        "drain_ms": 0.0,
+    }
+    assert not other.done() and supervisor.pending("room-b") == 1
+
+    # Tâche sans callback : annulée et comptée, rien d'écrit
+    result = await supervisor.drain("room-b", timeout=0.01)
+    assert result["abandoned"] == 1 and other.cancelled()
+    assert pending.saved == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_resume_puts_the_request_back_on_disk(
+    monkeypatch, tmp_path
+) -> None:
+    path = tmp_path / "pending.jsonl"
+    pending = PendingReports(str(path), max_attempts=2)
+    monkeypatch.setattr(agent, "pending_reports", pending)
+    monkeypatch.setattr(agent, "report_tasks", TaskSupervisor())
+
+    async def gemini_down(profile, dialogue, session_id, on_draft=None):
+        raise RuntimeError("503 UNAVAILABLE")
+
+    monkeypatch.setattr(agent, "generate_report_with_gemini", gemini_down)
+    pending.put(
+        {
+            "session_id": "s-retry",
+            "profile": {"id": "p1"},
+            "dialogue": [{"speaker": "AI", "text": "Hi"}],
+        }
+    )
+
+    await agent.resume_pending_reports("room-a", outbox=None)
+    await agent.report_tasks.drain(timeout=1)
+    assert [(r["session_id"], r["attempts"]) for r in read_records(path)] == [
+        ("s-retry", 1)
+    ]
+
+    # Deuxième échec : limite atteinte, la demande n'est plus remise
+    await agent.resume_pending_reports("room-a", outbox=None)
+    await agent.report_tasks.drain(timeout=1)
+    assert not path.exists()
+    assert pending.metrics() == {"saved": 2, "resumed": 2, "retried": 1, "dropped": 1}
@@ -0,0 +1,88 @@
+import logging
+import time
+
+import aiohttp
+import pytest
+
+from telemetry import Histogram, Telemetry, queue_logging, start_metrics_server
+
+
+def test_histogram_quantiles_use_bucket_bounds() -> None:
+    h = Histogram(buckets=(10, 100, 1000))
+    for ms in [1] * 90 + [50] * 9 + [5000]:
+        h.observe(ms)
+
+    assert h.quantile(0.5) == 10
+    assert h.quantile(0.95) == 100
+    # Au-delà de la dernière borne : le max observé
+    assert h.quantile(1.0) == 5000
+    snap = h.snapshot()
+    assert snap["count"] == 100
+    assert snap["buckets"] == {"10": 90, "100": 9, "1000": 0, "+Inf": 1}
+
+
+def test_span_records_per_room_even_on_error() -> None:
+    now = [0.0]
+    telemetry = Telemetry(clock=lambda: now[0])
+
+    with telemetry.span("profile_fetch", "room-a"):
+        now[0] += 0.120
+    with pytest.raises(RuntimeError), telemetry.span("session_start", "room-a"):
+        now[0] += 0.040
+        raise RuntimeError("boom")
+
+    assert telemetry.room("room-a") == {"profile_fetch": 120.0, "session_start": 40.0}
+    spans = telemetry.snapshot()["spans"]
+    assert spans["profile_fetch"]["count"] == 1
+    assert spans["session_start"]["max_ms"] == 40.0
+
+
+def test_instrumentation_overhead_within_budget() -> None:
+    """Un span reste sous 50 µs ; un log ne paie pas le coût de sa sortie."""
+    telemetry = Telemetry()
+    n = 5000
+    start = time.perf_counter()
+    for i in range(n):
+        with telemetry.span("turn", f"room-{i % 50}"):
+            pass
+    span_us = (time.perf_counter() - start) / n * 1e6
+    assert telemetry.snapshot()["spans"]["turn"]["count"] == n
+    assert span_us < 50, f"{span_us:.1f} µs par span"
+
+    log = logging.getLogger("test.telemetry.overhead")
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    # Sortie lente (1 ms par ligne) : ne doit pas ralentir l'appelant
+    slow = logging.Handler()
+    slow.emit = lambda record: time.sleep(0.001)
+    listener = queue_logging(log, slow)
+    try:
+        start = time.perf_counter()
+        for i in range(1000):
+            log.info("tour %d", i)
+        log_us = (time.perf_counter() - start) / 1000 * 1e6
+    finally:
+        listener.stop()
+    assert log_us < 200, f"{log_us:.1f} µs par log"
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_serves_snapshot() -> None:
+    telemetry = Telemetry()
+    telemetry.record("report_generation", 850.0, "room-a")
+    runner, port = await start_metrics_server(
+        telemetry, port=0, extra=lambda: {"outbox": {"pending": 2}}
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/metrics"
+        async with (
+            aiohttp.ClientSession() as session,
+            session.get(url, params={"room": "room-a"}) as resp,
+        ):
+            data = await resp.json()
+    finally:
+        await runner.cleanup()
+
+    assert data["spans"]["report_generation"]["count"] == 1
+    assert data["room"]["spans"] == {"report_generation": 850.0}
+    assert data["outbox"] == {"pending": 2}
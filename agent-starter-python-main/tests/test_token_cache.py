@@ -0,0 +1,77 @@
+import jwt
+
+from token_cache import TokenCache
+
+SECRET = "s" * 32
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _claims(token):
+    return jwt.decode(token, SECRET, algorithms=["HS256"])
+
+
+def test_reconnect_reuses_signed_token() -> None:
+    cache = TokenCache("key", SECRET)
+    first = cache.token("room", "alice", "Alice", room_join=True)
+    second = cache.token("room", "alice", "Alice", room_join=True)
+
+    assert first == second
+    assert cache.signed == 1
+    m = cache.metrics()
+    assert (m["hits"], m["misses"]) == (1, 1)
+    claims = _claims(first)
+    assert claims["sub"] == "alice"
+    assert claims["video"]["room"] == "room"
+    assert claims["video"]["roomJoin"] is True
+
+
+def test_key_includes_room_identity_name_and_grants() -> None:
+    cache = TokenCache("key", SECRET)
+    base = cache.token("room", "alice", "Alice", room_join=True)
+
+    assert cache.token("other", "alice", "Alice", room_join=True) != base
+    assert cache.token("room", "bob", "Alice", room_join=True) != base
+    assert cache.token("room", "alice", "Al", room_join=True) != base
+    assert (
+        cache.token("room", "alice", "Alice", room_join=True, can_publish=False) != base
+    )
+    assert cache.signed == 5
+
+
+def test_entries_expire_well_before_token_expiry() -> None:
+    clock = _Clock()
+    cache = TokenCache("key", SECRET, token_ttl=900, cache_ttl=3600, clock=clock)
+    token = cache.token("room", "alice", "Alice", room_join=True)
+    claims = _claims(token)
+    assert claims["exp"] - claims["nbf"] == 900
+
+    # Cache borné à token_ttl - 450 s : on ne sert jamais un token presque expiré
+    clock.now = 449
+    assert cache.token("room", "alice", "Alice", room_join=True) == token
+    clock.now = 451
+    cache.token("room", "alice", "Alice", room_join=True)
+    assert cache.signed == 2
+
+
+def test_cache_is_bounded() -> None:
+    cache = TokenCache("key", SECRET, max_size=10)
+    for i in range(50):
+        cache.token("room", f"user-{i}", "x", room_join=True)
+
+    m = cache.metrics()
+    assert m["size"] == 10
+    assert m["evictions"] == 40
+
+
+def test_disabled_cache_always_signs() -> None:
+    cache = TokenCache("key", SECRET, cache_ttl=0)
+    cache.token("room", "alice", "Alice", room_join=True)
+    cache.token("room", "alice", "Alice", room_join=True)
+    assert cache.signed == 2
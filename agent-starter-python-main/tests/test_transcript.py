@@ -0,0 +1,85 @@
+import json
+
+from transcript import TranscriptSink, TranscriptWriter, redactor
+
+
+def test_redacts_profile_identifiers() -> None:
+    redact = redactor({"id": "u-4821", "name": "Jane Doe"})
+
+    text = redact(
+        "I'm jane doe (u-4821), mail jane.d@example.com or call +33 6 12 34 56 78"
+    )
+
+    assert text == "I'm [NAME] [NAME] ([ID]), mail [EMAIL] or call [PHONE]"
+    # Profil vide : rien d'autre que les coordonnées n'est touché
+    assert (
+        redactor({"name": "Unknown", "id": "unknown"})("Unknown user") == "Unknown user"
+    )
+
+
+def test_ids_are_only_masked_as_whole_tokens() -> None:
+    redact = redactor({"id": "4821"})
+
+    assert (
+        redact("My id is 4821. I slept 4 h, walked 14821 steps, score 48210.")
+        == "My id is [ID]. I slept 4 h, walked 14821 steps, score 48210."
+    )
+    # Identifiant trop court : il masquerait âges, heures et scores
+    assert redactor({"id": "12"})("I am 12, since 12:30 I feel 120% tired") == (
+        "I am 12, since 12:30 I feel 120% tired"
+    )
+
+
+def test_sync_only_processes_new_turns(tmp_path) -> None:
+    writer = TranscriptWriter(str(tmp_path))
+    sink = TranscriptSink("room-a", {"name": "Jane Doe"}, writer=writer, log_rate=0)
+    history = [{"question": "How are you, Jane?"}, {"answer": "Tired."}]
+
+    sink.sync(history)
+    history.append({"answer": "I sleep badly."})
+    sink.sync(history)
+    sink.sync(history)
+    sink.close()
+    assert writer.flush(timeout=5)
+    writer.stop()
+
+    with open(writer.path("room-a"), encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [(t["i"], t["speaker"], t["text"]) for t in lines] == [
+        (1, "AI", "How are you, [NAME]?"),
+        (2, "Patient", "Tired."),
+        (3, "Patient", "I sleep badly."),
+    ]
+    assert sink.cursor == 3
+
+
+def test_rotates_files_and_keeps_ring(tmp_path) -> None:
+    writer = TranscriptWriter(str(tmp_path), max_bytes=500, backups=2)
+    sink = TranscriptSink("room-b", writer=writer, ring_size=10, log_rate=0)
+
+    for i in range(100):
+        sink.add("Patient", f"turn {i} " + "x" * 40)
+    assert writer.flush(timeout=5)
+    writer.stop()
+
+    path = writer.path("room-b")
+    assert writer.lines == 100
+    assert writer.rotations > 2
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == ["room-b.jsonl", "room-b.jsonl.1", "room-b.jsonl.2"]
+    with open(path + ".1", encoding="utf-8") as f:
+        assert len(f.read()) >= 500
+    assert [t["i"] for t in sink.recent] == list(range(91, 101))
+
+
+def test_log_echo_is_rate_limited() -> None:
+    now = [0.0]
+    sink = TranscriptSink("room-c", writer=None, log_rate=2, clock=lambda: now[0])
+
+    for _ in range(10):
+        sink.add("Patient", "hello")
+    now[0] += 1.0
+    sink.add("Patient", "hello")
+
+    # 1 tour logué tout de suite, 9 supprimés, puis 1 après une seconde
+    assert sink.stats() == {"turns": 11, "buffered": 11, "log_suppressed": 9}
@@ -0,0 +1,221 @@
+import asyncio
+import contextlib
+import inspect
+import time
+import types
+
+import pytest
+from livekit.agents.utils import http_context
+
+import agent
+from model_registry import ModelRegistry
+from pipeline_presets import PIPELINE_PRESETS, get_preset, llm_options, voice_key
+from utterance_cache import GREETING, UtteranceCache
+
+
+class _Audio:
+    def __init__(self, frame):
+        self.frame = frame
+
+
+class _Stream:
+    def __init__(self, frames, delay):
+        self._frames = frames
+        self._delay = delay
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        await asyncio.sleep(self._delay)
+        for frame in self._frames:
+            yield _Audio(frame)
+
+
+class _TTS:
+    def __init__(self, frames=("f0", "f1", "f2"), delay=0.0):
+        self.frames = frames
+        self.delay = delay
+        self.calls = 0
+        self.closed = False
+
+    def synthesize(self, text):
+        self.calls += 1
+        return _Stream(self.frames, self.delay)
+
+    async def aclose(self):
+        self.closed = True
+
+
+@contextlib.asynccontextmanager
+async def _opened(tts):
+    try:
+        yield tts
+    finally:
+        await tts.aclose()
+
+
+_PLUGIN_TTS = []
+
+
+class _PluginTTS(_TTS):
+    """Plugin qui, sans client fourni, prend la session HTTP du job LiveKit."""
+
+    def __init__(self, *, client=None, **options):
+        super().__init__()
+        if client is None:
+            http_context.http_session()
+        self.client = client
+        _PLUGIN_TTS.append(self)
+
+
+class _Session:
+    def __init__(self):
+        self.said = []
+
+    async def say(self, text, *, audio=None):
+        frames = None if audio is None else [frame async for frame in audio]
+        self.said.append((text, frames))
+
+
+@pytest.mark.asyncio
+async def test_say_uses_tts_until_the_cache_is_filled() -> None:
+    cache = UtteranceCache()
+    session = _Session()
+
+    await cache.say(session, "voice", GREETING)
+    assert session.said == [(GREETING, None)]
+
+    tts = _TTS()
+    await asyncio.to_thread(
+        cache.fill_in_background(lambda: _opened(tts), "voice").join
+    )
+    assert tts.closed
+
+    await cache.say(session, "voice", GREETING)
+    await cache.say(session, "other-voice", GREETING)
+    assert session.said[1] == (GREETING, ["f0", "f1", "f2"])
+    assert session.said[2] == (GREETING, None)
+    assert cache.metrics() == {"cached": 1, "hits": 1, "misses": 2}
+
+
+@pytest.mark.asyncio
+async def test_failed_fill_keeps_live_synthesis() -> None:
+    cache = UtteranceCache()
+
+    # Aucune trame : rien n'est mis en cache
+    await asyncio.to_thread(
+        cache.fill_in_background(lambda: _opened(_TTS(frames=())), "voice").join
+    )
+
+    def broken():
+        raise RuntimeError("no api key")
+
+    await asyncio.to_thread(cache.fill_in_background(broken, "voice").join)
+
+    assert cache.get("voice", GREETING) is None
+
+
+def test_prewarm_fills_the_greeting_cache_outside_a_job(monkeypatch) -> None:
+    cache = UtteranceCache()
+    monkeypatch.setattr(agent, "UTTERANCES", cache)
+    monkeypatch.setattr(agent, "GREETING_CACHE", True)
+    monkeypatch.setattr(agent, "MODELS", ModelRegistry())
+    monkeypatch.setattr(agent, "ReportOutbox", lambda *args: None)
+    monkeypatch.setattr(agent, "speechify", types.SimpleNamespace(TTS=_PluginTTS))
+    # Plugins déjà chargés : load_plugins ne réimporte rien
+    monkeypatch.setattr(agent, "deepgram", object())
+    monkeypatch.setattr(agent, "google", object())
+    monkeypatch.setattr(
+        agent, "silero", types.SimpleNamespace(VAD=types.SimpleNamespace(load=object))
+    )
+
+    agent.prewarm(types.SimpleNamespace(userdata={}))
+    deadline = time.monotonic() + 5
+    while cache.get(agent.VOICE, GREETING) is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert cache.get(agent.VOICE, GREETING) == ["f0", "f1", "f2"]
+    tts = _PLUGIN_TTS[-1]
+    assert tts.client is not None and tts.closed
+
+
+@pytest.mark.asyncio
+async def test_cached_greeting_skips_tts_first_byte() -> None:
+    cache = UtteranceCache()
+    await cache.synthesize(_TTS(delay=0.2), "voice", GREETING)
+
+    session = _Session()
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await cache.say(session, "voice", GREETING)
+
+    assert loop.time() - start < 0.05
+
+
+def test_presets_are_complete() -> None:
+    for name, preset in PIPELINE_PRESETS.items():
+        assert set(preset) == {"stt", "llm", "tts", "session"}, name
+        assert voice_key(preset) == "simba-english:jack"
+
+    assert "thinking_config" in llm_options(PIPELINE_PRESETS["low_latency"])
+    assert "thinking_budget" in PIPELINE_PRESETS["low_latency"]["llm"]
+    with pytest.raises(ValueError):
+        get_preset("fastest")
+
+
+# Valeurs par défaut de l'AgentSession (EndpointingOptions de LiveKit)
+_SESSION_DEFAULTS = {
+    "min_endpointing_delay": 0.5,
+    "max_endpointing_delay": 3.0,
+    "preemptive_generation": False,
+}
+
+
+def _effective(preset):
+    stt_defaults = {
+        name: param.default
+        for name, param in inspect.signature(agent.deepgram.STT).parameters.items()
+    }
+    return {
+        "stt": {**stt_defaults, **preset["stt"]},
+        "llm": dict(preset["llm"]),
+        "session": {**_SESSION_DEFAULTS, **preset["session"]},
+    }
+
+
+def test_presets_only_set_options_that_change_something() -> None:
+    agent.load_plugins()
+    balanced = _effective(PIPELINE_PRESETS["balanced"])
+    for name, preset in PIPELINE_PRESETS.items():
+        effective = _effective(preset)
+        for part, defaults in (
+            ("stt", balanced["stt"]),
+            ("session", _SESSION_DEFAULTS),
+        ):
+            for key in set(preset[part]) - {
+                "model",
+                "language",
+                "use_tts_aligned_transcript",
+            }:
+                # Une option égale à la valeur par défaut ne règle rien
+                assert preset[part][key] != defaults.get(key), (name, part, key)
+        if name != "balanced":
+            assert effective != balanced, name
+
+    low = _effective(PIPELINE_PRESETS["low_latency"])
+    assert (
+        low["session"]["min_endpointing_delay"]
+        < balanced["session"]["min_endpointing_delay"]
+    )
+    assert (
+        low["session"]["preemptive_generation"] and low["llm"]["thinking_budget"] == 0
+    )
+    patient = _effective(PIPELINE_PRESETS["patient"])
+    assert patient["stt"]["endpointing_ms"] > balanced["stt"]["endpointing_ms"]
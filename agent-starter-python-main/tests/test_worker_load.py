@@ -0,0 +1,154 @@
+import asyncio
+import time
+import types
+
+import pytest
+
+from report_engine import ReportEngine
+from session_directory import SessionDirectory
+from worker_load import (
+    LoadPolicy,
+    LoopLagMonitor,
+    job_signals,
+    publish_job_load,
+    worker_signals,
+)
+
+
+def _policy(**kwargs):
+    kwargs.setdefault("cpu", lambda: 0.0)
+    return LoadPolicy(
+        max_rooms=10, max_reports=4, max_loop_lag_ms=100, threshold=0.8, **kwargs
+    )
+
+
+def test_load_is_the_busiest_signal() -> None:
+    policy = _policy()
+
+    assert policy.load(rooms=2, reports=0, lag_ms=10) == pytest.approx(0.2)
+    assert policy.load(rooms=2, reports=3, lag_ms=10) == pytest.approx(0.75)
+    assert policy.load(rooms=2, reports=0, lag_ms=500) == 1.0
+
+
+def test_admit_rejects_before_the_budget_is_reached() -> None:
+    policy = _policy()
+
+    # 7 rooms + l'entrante = 0.8 : dernière acceptée
+    assert policy.admit(rooms=7, reports=0, lag_ms=0) == (True, "rooms", 0.8)
+    assert policy.admit(rooms=8, reports=0, lag_ms=0) == (False, "rooms", 0.9)
+    assert policy.admit(rooms=1, reports=4, lag_ms=0) == (False, "reports", 1.0)
+    assert policy.admit(rooms=1, reports=0, lag_ms=95) == (False, "loop_lag", 0.95)
+    assert (policy.accepted, policy.rejected) == (1, 3)
+
+
+def test_admit_counts_jobs_accepted_since_last_load() -> None:
+    policy = _policy()
+    policy.load(rooms=5, reports=0, lag_ms=0)
+
+    # Rafale entre deux rafraîchissements de la charge par LiveKit
+    decisions = [policy.admit()[0] for _ in range(5)]
+
+    assert decisions == [True, True, True, False, False]
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_sees_blocking_work() -> None:
+    monitor = LoopLagMonitor(interval=0.01, smoothing=0.5)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    assert monitor.peak_ms < 50
+
+    time.sleep(0.2)
+    await asyncio.sleep(0.001)
+    assert monitor.peak_ms > 100
+
+    # Le pic s'efface une fois la boucle redevenue fluide
+    await asyncio.sleep(0.3)
+    await monitor.stop()
+    assert monitor.peak_ms < 20
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Engine:
+    def __init__(self, in_flight):
+        self.in_flight = in_flight
+
+
+def test_worker_sees_load_published_by_its_job_processes(tmp_path) -> None:
+    path = str(tmp_path / "directory.sqlite3")
+    clock = _Clock()
+    worker = SessionDirectory(path, clock=clock)
+    # Un annuaire par processus de job, même fichier
+    SessionDirectory(path, clock=clock).publish_load("r1", 2, 30.0)
+    SessionDirectory(path, clock=clock).publish_load("r2", 1, 120.0)
+    SessionDirectory(path, clock=clock).publish_load("other-worker", 5, 900.0)
+
+    signals = job_signals(worker, ["r1", "r2", "r3"])
+    assert signals == {"rooms": 3, "reports": 3, "lag_ms": 120.0}
+    assert _policy().load(**signals) == 1.0  # latence de r2 au-delà du budget
+
+    # Job mort : sa dernière publication vieillit et cesse de compter
+    clock.now += 10
+    SessionDirectory(path, clock=clock).publish_load("r1", 1, 10.0)
+    assert job_signals(worker, ["r1", "r2"]) == {
+        "rooms": 2,
+        "reports": 1,
+        "lag_ms": 10.0,
+    }
+    assert job_signals(worker, []) == {"rooms": 0, "reports": 0, "lag_ms": 0.0}
+
+    # Fin de la room : plus de charge publiée
+    worker.assign("r1", "host:1")
+    worker.unassign("r1", "host:1")
+    assert job_signals(worker, ["r1"])["reports"] == 0
+
+
+@pytest.mark.asyncio
+async def test_job_publishes_its_signals_until_cancelled(tmp_path) -> None:
+    directory = SessionDirectory(str(tmp_path / "directory.sqlite3"))
+    monitor = LoopLagMonitor()
+    monitor.observe(40.0)
+    publisher = asyncio.create_task(
+        publish_job_load(directory, "r1", _Engine(2), monitor=monitor, interval=0.01)
+    )
+    await asyncio.sleep(0.05)
+    publisher.cancel()
+    await asyncio.gather(publisher, return_exceptions=True)
+
+    signals = directory.load_signals(["r1"], max_age=5)
+    assert signals["reports"] == 2
+    assert signals["lag_ms"] == pytest.approx(max(monitor.lag_ms, monitor.peak_ms))
+
+
+class _SlowModels:
+    async def generate_content(self, *, model, contents, config=None):
+        await asyncio.sleep(0.2)
+        return contents
+
+
+@pytest.mark.asyncio
+async def test_gemini_calls_outside_the_report_cache_count_as_load() -> None:
+    client = types.SimpleNamespace(aio=types.SimpleNamespace(models=_SlowModels()))
+    engine = ReportEngine(client, max_concurrency=4)
+
+    async def speculate():
+        # Préparation spéculative : appel direct au moteur, sans ReportCache
+        with engine.speculation():
+            return await engine.generate("draft")
+
+    tasks = [
+        asyncio.create_task(speculate()),
+        asyncio.create_task(engine.generate("resumed")),
+    ]
+    await asyncio.sleep(0.05)
+    assert worker_signals(0, engine)["reports"] == 2
+
+    await asyncio.gather(*tasks)
+    assert worker_signals(0, engine)["reports"] == 0
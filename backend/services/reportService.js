@@ -47,9 +47,23 @@ async createReport(reportData) {
       },
       dialogue: reportData.dialogue || [],
       doctor_notes: reportData.doctor_notes || "",
-      notified_to_doctor: reportData.notified_to_doctor || false
+      notified_to_doctor: reportData.notified_to_doctor || false,
+      status: reportData.status === "draft" ? "draft" : "finalized"
     };
 
+    // Brouillons successifs (streaming IA) : on met à jour le rapport de la session.
+    // Un rapport déjà finalisé n'est jamais réécrit : les renvois de l'outbox sont idempotents.
+    const existing = await Report.findOne({ session_id: reportData.session_id });
+    if (existing && existing.status !== "draft") {
+      return existing;
+    }
+    if (existing) {
+      existing.set(structuredReport);
+      existing.version += 1;
+      await existing.save();
+      return existing;
+    }
+
     // Enregistrer
     const report = new Report(structuredReport);
     await report.save();